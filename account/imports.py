@@ -0,0 +1,177 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from .serializers import UserImportSerializer
+
+User = get_user_model()
+
+# below this many passwords, starting the pool costs more than it saves
+MIN_POOL_SIZE = 16
+
+USERNAME_TAKEN = "A user with that username already exists."
+
+
+def setup_worker():
+    """
+    Util function to set Django up in a hashing process without warming it
+    up, which a DJANGO_WARMUP=1 inherited from a web worker would trigger.
+    """
+    os.environ["DJANGO_WARMUP"] = "0"
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hashes passwords with the configured hasher, in a pool of processes.
+
+    Password hashers are deliberately slow and CPU bound, so the work is
+    spread over `workers` processes (one per core by default). Workers are
+    spawned rather than forked, which is safe from threaded web workers.
+    Returns the hashes, in the order of `passwords`.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(passwords) < MIN_POOL_SIZE:
+        return [make_password(password) for password in passwords]
+
+    context = multiprocessing.get_context("spawn")
+    chunksize = max(1, len(passwords) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=setup_worker) as executor:
+        return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+def get_existing_usernames(usernames):
+    """
+    Util function to find which of `usernames` are taken, 500 at a time.
+    """
+    existing = set()
+
+    for start in range(0, len(usernames), 500):
+        existing.update(
+            User.objects.filter(username__in=usernames[start:start + 500]).values_list("username", flat=True)
+        )
+
+    return existing
+
+
+def insert_users(users, chunk_size=500):
+    """
+    Inserts users with `bulk_create`, in chunks of `chunk_size` committed
+    one by one.
+
+    Hashing leaves a long window after validation, in which other imports
+    or registrations may take some of the usernames. These are checked
+    again inside each chunk's transaction, and a clash landing between the
+    check and the insert makes that chunk fall back to inserting row by
+    row, so one taken username only skips its own row.
+    Returns (number of users created, usernames skipped).
+    """
+    created, skipped = 0, []
+
+    for start in range(0, len(users), chunk_size):
+        chunk = users[start:start + chunk_size]
+
+        with transaction.atomic():
+            existing = get_existing_usernames([user.username for user in chunk])
+            skipped.extend(user.username for user in chunk if user.username in existing)
+            chunk = [user for user in chunk if user.username not in existing]
+
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create(chunk)
+                created += len(chunk)
+                continue
+            except IntegrityError:
+                pass
+
+            for user in chunk:
+                try:
+                    with transaction.atomic():
+                        User.objects.bulk_create([user])
+                    created += 1
+                except IntegrityError:
+                    skipped.append(user.username)
+
+    return created, skipped
+
+
+def validate_rows(rows, validate_passwords=True):
+    """
+    Validates the rows of an import, including username clashes with
+    existing users and between rows.
+    Returns (valid rows as (index, data) tuples, errors as (index, errors) tuples).
+    """
+    valid, errors = [], []
+    seen = set()
+
+    for index, row in enumerate(rows):
+        serializer = UserImportSerializer(data=row, context={"validate_passwords": validate_passwords})
+
+        if not serializer.is_valid():
+            errors.append((index, serializer.errors))
+        elif serializer.validated_data["username"] in seen:
+            errors.append((index, {"username": ["Duplicate username in this import."]}))
+        else:
+            seen.add(serializer.validated_data["username"])
+            valid.append((index, serializer.validated_data))
+
+    existing = get_existing_usernames(list(seen))
+
+    if existing:
+        errors.extend(
+            (index, {"username": [USERNAME_TAKEN]})
+            for index, data in valid if data["username"] in existing
+        )
+        valid = [(index, data) for index, data in valid if data["username"] not in existing]
+        errors.sort(key=lambda error: error[0])
+
+    return valid, errors
+
+
+def import_users(rows, workers=None, chunk_size=500, validate_passwords=True):
+    """
+    Creates users in bulk from rows of username, email and password.
+
+    Invalid rows are skipped and reported. Passwords of the valid ones are
+    hashed in a process pool, then users are inserted with `bulk_create`
+    in chunks of `chunk_size`, without per-user signals. Rows whose
+    username was taken in the meantime are skipped and reported too.
+    Returns a dict with the number created, the errors by row index, and
+    timings.
+    """
+    start = time.perf_counter()
+    valid, errors = validate_rows(rows, validate_passwords)
+
+    hash_start = time.perf_counter()
+    hashes = hash_passwords([data["password"] for _, data in valid], workers)
+    hash_seconds = time.perf_counter() - hash_start
+
+    users = [
+        User(username=data["username"], email=User.objects.normalize_email(data["email"]), password=password)
+        for (_, data), password in zip(valid, hashes)
+    ]
+
+    created, skipped = insert_users(users, chunk_size)
+
+    if skipped:
+        indexes = {data["username"]: index for index, data in valid}
+        errors.extend((indexes[username], {"username": [USERNAME_TAKEN]}) for username in skipped)
+        errors.sort(key=lambda error: error[0])
+
+    seconds = time.perf_counter() - start
+
+    return {
+        "created": created,
+        "errors": [{"index": index, "errors": row_errors} for index, row_errors in errors],
+        "seconds": round(seconds, 3),
+        "hash_seconds": round(hash_seconds, 3),
+        "users_per_second": round(created / seconds, 1) if seconds else None,
+    }
@@ -1,9 +1,23 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
 
 User = get_user_model()
 
 
+def check_password_strength(attrs):
+    """
+    Util function to run AUTH_PASSWORD_VALIDATORS on a password, comparing
+    it with the other attributes of the user being created.
+    """
+    user = User(username=attrs.get("username", ""), email=attrs.get("email", ""))
+
+    try:
+        validate_password(attrs["password"], user)
+    except ValidationError as error:
+        raise serializers.ValidationError({"password": list(error.messages)})
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -20,6 +34,9 @@ class UserSerializer(serializers.ModelSerializer):
 class RegisterUserSerializer(serializers.ModelSerializer):
     """
     Serializer for handling user registration.
+
+    Passwords are checked against AUTH_PASSWORD_VALIDATORS and stored
+    hashed through `create_user`.
     """
 
     class Meta:
@@ -33,6 +50,42 @@ class RegisterUserSerializer(serializers.ModelSerializer):
             'password':{'write_only': True}
         }
 
+    def validate(self, attrs):
+        check_password_strength(attrs)
+        return attrs
+
+    def create(self, validated_data):
+        return User.objects.create_user(**validated_data)
+
+
+class UserImportSerializer(serializers.Serializer):
+    """
+    Serializer for one user of a bulk import.
+
+    Uniqueness of usernames is checked by the import itself, in bulk.
+    """
+
+    username = serializers.CharField(max_length=150, validators=[User.username_validator])
+    email = serializers.EmailField(required=False, allow_blank=True, default="")
+    password = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        if self.context.get("validate_passwords", True):
+            check_password_strength(attrs)
+        return attrs
+
+
+class UserImportRequestSerializer(serializers.Serializer):
+    """
+    Serializer for bulk user import requests.
+
+    Fields:
+        users (list): the users to create, at most `max_users`.
+    """
+    max_users = 1000
+
+    users = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=max_users)
+
 class LoginSerializer(serializers.Serializer):
     """
     Serializer for handling user login.
@@ -1,3 +1,118 @@
-from django.test import TestCase
+import os
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .imports import MIN_POOL_SIZE, hash_passwords, import_users, insert_users, setup_worker
+
+User = get_user_model()
+
+PASSWORD = "Correct-horse-42"
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class UserImportTests(TestCase):
+    """
+    Tests for the bulk user import.
+    """
+
+    def setUp(self):
+        User.objects.create_user(username="taken", password=PASSWORD)
+
+    def test_duplicate_usernames(self):
+        result = import_users([
+            {"username": "alice", "email": "alice@example.com", "password": PASSWORD},
+            {"username": "taken", "password": PASSWORD},
+            {"username": "alice", "password": PASSWORD},
+            {"username": "bob", "password": PASSWORD},
+        ], workers=1)
+
+        self.assertEqual(result["created"], 2)
+        self.assertEqual([error["index"] for error in result["errors"]], [1, 2])
+        self.assertEqual(User.objects.get(username="alice").email, "alice@example.com")
+        self.assertTrue(User.objects.get(username="bob").check_password(PASSWORD))
+
+    def test_username_taken_while_hashing(self):
+        def hash_and_register(passwords, workers=None):
+            User.objects.create_user(username="late", password=PASSWORD)
+            return hash_passwords(passwords, workers)
+
+        with mock.patch("account.imports.hash_passwords", hash_and_register):
+            result = import_users([
+                {"username": "early", "password": PASSWORD},
+                {"username": "late", "password": PASSWORD},
+            ], workers=1)
+
+        self.assertEqual(result["created"], 1)
+        self.assertEqual(result["errors"], [
+            {"index": 1, "errors": {"username": ["A user with that username already exists."]}},
+        ])
+        self.assertTrue(User.objects.filter(username="early").exists())
+
+    def test_pool_workers_skip_warm_up(self):
+        with mock.patch("account.imports.ProcessPoolExecutor") as executor:
+            executor.return_value.__enter__.return_value.map.return_value = []
+            hash_passwords([PASSWORD] * MIN_POOL_SIZE, workers=2)
+
+        self.assertIs(executor.call_args.kwargs["initializer"], setup_worker)
+
+        with mock.patch.dict(os.environ, {"DJANGO_WARMUP": "1"}), mock.patch("django.setup") as setup:
+            setup.side_effect = lambda: self.assertEqual(os.environ["DJANGO_WARMUP"], "0")
+            setup_worker()
+
+        setup.assert_called_once_with()
+
+    def test_insert_falls_back_to_rows(self):
+        """
+        A clash the re-check cannot see, here within the chunk itself, only
+        skips the clashing row.
+        """
+        users = [User(username=username) for username in ("one", "two", "one", "three")]
+
+        created, skipped = insert_users(users, chunk_size=2)
+
+        self.assertEqual((created, skipped), (3, ["one"]))
+        self.assertEqual(
+            sorted(User.objects.exclude(username="taken").values_list("username", flat=True)),
+            ["one", "three", "two"],
+        )
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class UserImportAPITests(APITestCase):
+    """
+    Tests for the bulk user import endpoint.
+    """
+
+    url = "/api/account/users/import/"
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(username="staff", is_staff=True))
+
+    def test_reports_duplicates(self):
+        response = self.client.post(self.url, {"users": [
+            {"username": "staff", "password": PASSWORD},
+            {"username": "carol", "password": PASSWORD},
+            {"username": "carol", "password": PASSWORD},
+        ]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [0, 2])
+
+    def test_all_duplicates(self):
+        response = self.client.post(self.url, {"users": [{"username": "staff", "password": PASSWORD}]},
+                                    format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["created"], 0)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user(username="member"))
+
+        response = self.client.post(self.url, {"users": []}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
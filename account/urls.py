@@ -2,11 +2,12 @@ from django.urls import path
 from rest_framework_simplejwt.views import (TokenBlacklistView,
                                             TokenObtainPairView, TokenRefreshView)
 
-from .views import RegisterAPIView, LoginAPIView
+from .views import RegisterAPIView, LoginAPIView, UserImportAPIView
 
 urlpatterns = [
     path("register/", RegisterAPIView.as_view(), name="register"),
     path("login/", LoginAPIView.as_view(), name="login"),
+    path("users/import/", UserImportAPIView.as_view(), name="users-import"),
     path('token/blacklist/', TokenBlacklistView.as_view(), name='token_blacklist'),
     path('token/obtain/', TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path('token/refresh/', TokenRefreshView.as_view(), name="token_refresh"),
@@ -3,10 +3,11 @@ from django.contrib.auth import authenticate
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .serializers import RegisterUserSerializer, LoginSerializer
+from .imports import import_users
+from .serializers import RegisterUserSerializer, LoginSerializer, UserImportRequestSerializer
 
 User = get_user_model()
 
@@ -81,5 +82,36 @@ class LoginAPIView(APIView):
                     status=status.HTTP_200_OK
                 )
             return Response({"message":"Invalid credentials"}, status=status.HTTP_400_BAD_REQUEST)
-        return Response( serializer.errors, status=status.HTTP_400_BAD_REQUEST)    
+        return Response( serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+
+class UserImportAPIView(APIView):
+    """
+    Endpoint for creating many users at once, e.g. when onboarding a partner site.
+
+    Passwords are validated and hashed in a pool of processes, and users are
+    inserted in bulk. Invalid rows are skipped and reported by index.
+
+    Users must be staff.
+
+    Methods:
+        POST:
+
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        """
+        Handles POST request for importing users.
+        Returns the number of users created, the errors and the import rate.
+        """
+
+        serializer = UserImportRequestSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        result = import_users(serializer.validated_data["users"])
+
+        return Response(result, status=status.HTTP_201_CREATED if result["created"] else status.HTTP_400_BAD_REQUEST)
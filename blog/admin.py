@@ -1,7 +1,14 @@
 from django.contrib import admin
-from .models import Article, Comment, Like, Share
+from .models import (Article, Comment, Like, Share, ShareDailyRollup, AuthorStats, AuthorDailyStats, ArticleRevision,
+                     CommentFingerprint, ShareMarker)
 
 admin.site.register(Article)
 admin.site.register(Comment)
 admin.site.register(Like)
 admin.site.register(Share)
+admin.site.register(ShareDailyRollup)
+admin.site.register(AuthorStats)
+admin.site.register(AuthorDailyStats)
+admin.site.register(ArticleRevision)
+admin.site.register(CommentFingerprint)
+admin.site.register(ShareMarker)
@@ -0,0 +1,89 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# per-user flags, filled in on every request instead of being cached
+USER_STATE_FIELDS = ("liked_by_me", "shared_by_me")
+
+
+def get_article_cache():
+    """
+    Util function to fetch the cache holding article payloads.
+    Returns the cache or None when BLOG_ARTICLE_CACHE is not set.
+    """
+    alias = getattr(settings, "BLOG_ARTICLE_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def get_stamp_key(article_id):
+    return f"article-stamp:{article_id}"
+
+
+def get_payload_key(article_id, stamp):
+    return f"article:{article_id}:{stamp}"
+
+
+def get_article_stamp(cache, article_id):
+    """
+    Util function to fetch the version stamp payload keys of an article are
+    built from, creating one if the article has none.
+    Returns the stamp.
+    """
+    key = get_stamp_key(article_id)
+    stamp = cache.get(key)
+
+    if stamp is None:
+        stamp = uuid.uuid4().hex
+        # another worker may have created one meanwhile, theirs wins
+        if not cache.add(key, stamp, timeout=None):
+            stamp = cache.get(key, stamp)
+
+    return stamp
+
+
+def get_cached_article(article_id):
+    """
+    Fetches the cached detail payload of an article, without the user flags.
+    Returns (stamp, payload), with None for the payload on a miss and for
+    both when caching is disabled.
+    """
+    cache = get_article_cache()
+
+    if cache is None:
+        return None, None
+
+    stamp = get_article_stamp(cache, article_id)
+    return stamp, cache.get(get_payload_key(article_id, stamp))
+
+
+def cache_article(article_id, stamp, data):
+    """
+    Caches the detail payload of an article under its stamp, leaving out the
+    user flags.
+    """
+    cache = get_article_cache()
+
+    if cache is None or stamp is None:
+        return
+
+    payload = {name: value for name, value in data.items() if name not in USER_STATE_FIELDS}
+    cache.set(get_payload_key(article_id, stamp), payload)
+
+
+def invalidate_article(article_id):
+    """
+    Drops the cached payload of an article by dropping its stamp, once the
+    current transaction commits.
+
+    Readers that loaded the stamp earlier may still cache what they read,
+    but under the old stamp no one looks up anymore, so a stale payload is
+    never served; it is evicted like any unused entry.
+    """
+    cache = get_article_cache()
+
+    if cache is None:
+        return
+
+    transaction.on_commit(lambda: cache.delete(get_stamp_key(article_id)))
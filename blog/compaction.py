@@ -0,0 +1,105 @@
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from django.db import router, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .filters import day_range, start_of_day
+from .models import Share, ShareDailyRollup, ShareMarker
+
+
+def rollup_day(day, archive_dir=None, batch_size=500):
+    """
+    Folds the raw shares made on `day` into daily per-article rollups.
+
+    The rollups are updated, a marker is kept per (article, user) for
+    `shared_by_me`, and the raw rows are deleted in one transaction, so
+    share counts never see a share twice or not at all. With `archive_dir`,
+    the raw rows are first appended to a per-month JSON lines file
+    (`shares-YYYY-MM.jsonl`); a run failing mid-day may repeat rows there.
+    Returns the number of raw shares compacted.
+    """
+    start, end = day_range(day)
+    shares = Share.objects.filter(shared_date__gte=start, shared_date__lt=end).order_by()
+
+    with transaction.atomic():
+        counts = dict(shares.values_list("article").annotate(total=Count("pk")))
+        if not counts:
+            return 0
+
+        existing = set(
+            ShareDailyRollup.objects.filter(date=day, article__in=counts).values_list("article", flat=True)
+        )
+        ShareDailyRollup.objects.bulk_create(
+            [ShareDailyRollup(article_id=article_id, date=day, count=total)
+             for article_id, total in counts.items() if article_id not in existing],
+            batch_size=batch_size,
+        )
+        for article_id in existing:
+            ShareDailyRollup.objects.filter(article_id=article_id, date=day).update(
+                count=F("count") + counts[article_id]
+            )
+
+        # keeps `shared_by_me` true for the users whose shares go away
+        ShareMarker.objects.bulk_create(
+            [ShareMarker(article_id=article_id, user_id=user_id)
+             for article_id, user_id in shares.values_list("article", "user").distinct()],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+        if archive_dir is not None:
+            archive_shares(shares, Path(archive_dir) / f"shares-{day:%Y-%m}.jsonl")
+
+        # The shares still count, through the rollups and markers, so the
+        # post_delete receivers must not run: `share_deleted` would take them
+        # off the author's stats and `engagement_changed` would drop cached
+        # payloads that are still right. `delete()` sends the signals
+        # whenever receivers are connected, and disconnecting them would
+        # also silence the deletes of other threads meanwhile, so the rows
+        # go through `_raw_delete()`, which runs a bare DELETE. Nothing
+        # references a share, so no cascade is skipped.
+        using = router.db_for_write(Share)
+        while True:
+            pks = list(shares.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            Share.objects.filter(pk__in=pks)._raw_delete(using)
+
+    return sum(counts.values())
+
+
+def archive_shares(shares, path):
+    """
+    Util function to append raw share rows to a JSON lines file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with path.open("a") as archive:
+        for share_id, article_id, user_id, shared_date in shares.values_list(
+            "id", "article_id", "user_id", "shared_date"
+        ).iterator():
+            archive.write(json.dumps({
+                "id": str(share_id),
+                "article": str(article_id),
+                "user": user_id,
+                "shared_date": shared_date.isoformat(),
+            }) + "\n")
+
+
+def compact_shares(retention_days, archive_dir=None, batch_size=500):
+    """
+    Compacts every raw share older than the retention window, one day at a
+    time, oldest first.
+    Returns the number of (days, shares) compacted.
+    """
+    cutoff = start_of_day(timezone.localdate() - timedelta(days=retention_days))
+    days = list(Share.objects.filter(shared_date__lt=cutoff).dates("shared_date", "day"))
+
+    compacted = 0
+    for day in days:
+        compacted += rollup_day(day, archive_dir=archive_dir, batch_size=batch_size)
+
+    return len(days), compacted
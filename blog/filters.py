@@ -0,0 +1,110 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+
+# ranges end the next day or month, which must still be a valid date
+MAX_YEAR = date.max.year - 1
+
+
+def parse_date(value, param):
+    """
+    Util function to parse a 'YYYY-MM-DD' query parameter.
+    Returns a date or raises a ValidationError naming the parameter.
+    """
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({param: "Enter a valid date (YYYY-MM-DD)."})
+
+    if day.year > MAX_YEAR:
+        raise ValidationError({param: f"Enter a date before the year {MAX_YEAR + 1}."})
+
+    return day
+
+
+def parse_month(value, param):
+    """
+    Util function to parse a 'YYYY-MM' query parameter.
+    Returns the first day of the month or raises a ValidationError.
+    """
+    try:
+        first = datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise ValidationError({param: "Enter a valid month (YYYY-MM)."})
+
+    if first.year > MAX_YEAR:
+        raise ValidationError({param: f"Enter a month before the year {MAX_YEAR + 1}."})
+
+    return first
+
+
+def start_of_day(day):
+    """
+    Util function to get the aware datetime a day starts at in the current timezone.
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def day_range(day):
+    """
+    Util function to get the aware datetimes bounding a day.
+    Returns a (start, end) tuple, end being exclusive.
+    """
+    return start_of_day(day), start_of_day(day + timedelta(days=1))
+
+
+def month_range(day):
+    """
+    Util function to get the aware datetimes bounding the month of `day`.
+    Returns a (start, end) tuple, end being exclusive.
+    """
+    first = day.replace(day=1)
+    return start_of_day(first), start_of_day((first + timedelta(days=32)).replace(day=1))
+
+
+def article_filters(params):
+    """
+    Translates the article listing query parameters into predicates.
+
+    Dates become half-open `>=`/`<` ranges on the indexed `published_date`
+    column, never `__date` lookups that wrap the column in a function.
+    This module owns the date parsing and range logic of the blog views:
+
+        tags: articles whose tags contain the value.
+        published_date (YYYY-MM-DD): articles published that day.
+        published_after (YYYY-MM-DD): articles published on or after that day.
+        published_before (YYYY-MM-DD): articles published before that day.
+        month (YYYY-MM): articles published that month.
+
+    Returns a list of Q objects, to be applied with a single `filter()`.
+    """
+    conditions = []
+
+    tags = params.get('tags')
+    if tags:
+        conditions.append(Q(tags__icontains=tags))
+
+    published_date = params.get('published_date')
+    if published_date:
+        start, end = day_range(parse_date(published_date, 'published_date'))
+        conditions.append(Q(published_date__gte=start, published_date__lt=end))
+
+    published_after = params.get('published_after')
+    if published_after:
+        day = parse_date(published_after, 'published_after')
+        conditions.append(Q(published_date__gte=start_of_day(day)))
+
+    published_before = params.get('published_before')
+    if published_before:
+        day = parse_date(published_before, 'published_before')
+        conditions.append(Q(published_date__lt=start_of_day(day)))
+
+    month = params.get('month')
+    if month:
+        start, end = month_range(parse_month(month, 'month'))
+        conditions.append(Q(published_date__gte=start, published_date__lt=end))
+
+    return conditions
@@ -0,0 +1,120 @@
+import hashlib
+import random
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import CommentFingerprint
+
+# 20 MinHash values split into 5 bands of 4: comments sharing ~90% of their
+# shingles almost always share a band, ~50% a quarter of the time, ~30% rarely
+NUM_HASHES = 20
+BANDS = 5
+ROWS = NUM_HASHES // BANDS
+SHINGLE_SIZE = 3
+
+MERSENNE_PRIME = (1 << 61) - 1
+# fixed seed: fingerprints must stay comparable across processes and restarts
+_rng = random.Random(20241019)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_HASHES)
+]
+
+WORD_RE = re.compile(r"\w+")
+
+
+def hash64(data):
+    """
+    Util function to hash bytes into an unsigned 64-bit integer.
+    """
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def get_shingles(text):
+    """
+    Util function to split a comment into overlapping word n-grams, after
+    case folding and dropping punctuation, so trivial edits do not matter.
+    Returns a set of shingle hashes.
+    """
+    words = WORD_RE.findall(text.casefold())
+
+    if len(words) <= SHINGLE_SIZE:
+        return {hash64(" ".join(words).encode())}
+
+    return {
+        hash64(" ".join(words[index:index + SHINGLE_SIZE]).encode())
+        for index in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def get_fingerprint(text):
+    """
+    Computes the locality-sensitive fingerprint of a comment.
+
+    Builds a MinHash signature over the comment's shingles and hashes each
+    band of it into a key. Near-duplicates share at least one key.
+    Returns the list of band keys, as signed 64-bit integers.
+    """
+    shingles = get_shingles(text)
+    signature = [min((a * shingle + b) % MERSENNE_PRIME for shingle in shingles) for a, b in PERMUTATIONS]
+
+    keys = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hash64(f"{band}:{values}".encode())
+        # fits a BigIntegerField
+        keys.append(digest - (1 << 64) if digest >= 1 << 63 else digest)
+
+    return keys
+
+
+def get_duplicate_window():
+    """
+    Util function to read how long fingerprints are checked against.
+    Returns a timedelta, or None when duplicate detection is disabled.
+    """
+    seconds = getattr(settings, "BLOG_COMMENT_DUPLICATE_WINDOW", 3600)
+    return timedelta(seconds=seconds) if seconds else None
+
+
+def is_duplicate_comment(article, user, keys):
+    """
+    Checks if `user` recently posted a near-duplicate comment on `article`,
+    with a single lookup on the (article, user, key) index.
+    """
+    window = get_duplicate_window()
+
+    if window is None:
+        return False
+
+    return CommentFingerprint.objects.filter(
+        article=article, user=user, key__in=keys, created_date__gte=timezone.now() - window
+    ).exists()
+
+
+def record_fingerprint(comment, keys):
+    """
+    Stores the fingerprint of a new comment.
+    """
+    CommentFingerprint.objects.bulk_create(
+        CommentFingerprint(comment=comment, article_id=comment.article_id, user_id=comment.user_id, key=key)
+        for key in keys
+    )
+
+
+def prune_fingerprints(batch_size=500):
+    """
+    Removes fingerprints older than the duplicate window, in batches.
+    Returns the number of rows deleted.
+    """
+    window = get_duplicate_window() or timedelta(0)
+    stale = CommentFingerprint.objects.filter(created_date__lt=timezone.now() - window)
+
+    deleted = 0
+    while True:
+        pks = list(stale.order_by().values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += CommentFingerprint.objects.filter(pk__in=pks).delete()[0]
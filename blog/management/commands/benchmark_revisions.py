@@ -0,0 +1,93 @@
+import random
+import time
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from blog.models import Article, ArticleRevision
+from blog.revisions import get_revision
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the storage and rebuild cost of article revisions.
+
+    For each keyframe interval an article is edited repeatedly through
+    `Article.conditional_update`, like the detail view does, inside a
+    transaction that is rolled back afterwards. Storage is compared to
+    keeping a full copy of the body per revision, raw and compressed.
+    """
+
+    help = "Reports revision storage ratios and rebuild times per keyframe interval."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=500, help="Lines in the seeded article body.")
+        parser.add_argument("--edits", type=int, default=100, help="Edits made to the article.")
+        parser.add_argument(
+            "--intervals", type=int, nargs="+", default=[1, 5, 10, 20], help="Keyframe intervals to compare."
+        )
+
+    def edit(self, body, rng):
+        """
+        Util function to make a small edit, like an author fixing a paragraph.
+        Returns the edited body.
+        """
+        lines = body.split("\n")
+        position = rng.randrange(len(lines))
+
+        lines[position] = f"{lines[position]} Revised {rng.random():.6f}."
+        if rng.random() < 0.3:
+            lines.insert(rng.randrange(len(lines)), f"A new sentence {rng.random():.6f}.")
+
+        return "\n".join(lines)
+
+    def run(self, interval, options):
+        rng = random.Random(interval)
+        user = User.objects.create_user(username="benchmark-revisions", password=None)
+        body = "\n".join(
+            f"Paragraph {i}: lorem ipsum dolor sit amet, consectetur adipiscing elit." for i in range(options["lines"])
+        )
+
+        with override_settings(BLOG_REVISION_KEYFRAME_INTERVAL=interval):
+            article = Article.objects.create(user=user, title="Revisions", tags="#bench", body=body)
+
+            for _ in range(options["edits"]):
+                version = article.version
+                article.body = self.edit(article.body, rng)
+                article.conditional_update(version, ["body"])
+
+        revisions = list(ArticleRevision.objects.filter(article=article))
+        stored = sum(len(revision.data) for revision in revisions)
+        full = sum(revision.body_size for revision in revisions)
+
+        compressed = 0
+        timings = []
+        for revision in revisions:
+            start = time.perf_counter()
+            body = get_revision(article.pk, revision.version).body
+            timings.append(time.perf_counter() - start)
+            compressed += len(zlib.compress(body.encode()))
+
+        return stored, full, compressed, timings
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'interval':>8} {'stored KiB':>11} {'full KiB':>9} {'ratio':>7} {'zlib KiB':>9} {'ratio':>7}"
+            f" {'avg rebuild':>12} {'max rebuild':>12}"
+        )
+
+        for interval in options["intervals"]:
+            with transaction.atomic():
+                stored, full, compressed, timings = self.run(interval, options)
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{interval:>8} {stored / 1024:>11.1f} {full / 1024:>9.1f} {stored / full:>7.1%}"
+                f" {compressed / 1024:>9.1f} {stored / compressed:>7.1%}"
+                f" {sum(timings) / len(timings) * 1000:>10.2f}ms {max(timings) * 1000:>10.2f}ms"
+            )
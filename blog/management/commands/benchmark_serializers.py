@@ -0,0 +1,88 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from blog.models import Article, Comment
+from blog.serializers import ArticleSerializer, ArticleSummarySerializer
+from simplepersonalblogapi.renderers import FastJSONRenderer, orjson
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the article list serialization and rendering paths.
+
+    Seeds articles inside a transaction that is rolled back afterwards, so
+    it can be run against any database without leaving data behind.
+    """
+
+    help = "Compares the default and fast JSON serialization paths for article listings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--articles", type=int, default=500, help="Number of articles to seed.")
+        parser.add_argument("--comments", type=int, default=3, help="Comments seeded per article.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per path, the best is reported.")
+
+    def seed(self, articles, comments):
+        user = User.objects.create_user(username="benchmark-serializers", password=None)
+        body = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40
+
+        created = [Article(user=user, title=f"Article {i}", tags="#bench", body=body) for i in range(articles)]
+        # bulk_create skips save(), render like saved articles are
+        for article in created:
+            article.render_body()
+
+        Article.objects.bulk_create(created, batch_size=500)
+        Comment.objects.bulk_create(
+            [Comment(article=article, user=user, comment="Nice read.") for article in created for _ in range(comments)],
+            batch_size=500,
+        )
+
+    def measure(self, func, repeat):
+        best, size = None, 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            size = len(func())
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, size
+
+    def handle(self, *args, **options):
+        default_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+        payload = {}
+
+        # (group, label, path): speedups are reported against the first path of each group
+        paths = [
+            ("render", "JSONRenderer (render only)", lambda: default_renderer.render(payload["data"])),
+            ("render", "FastJSONRenderer (render only)", lambda: fast_renderer.render(payload["data"])),
+            ("detail", "ArticleSerializer + JSONRenderer", lambda: default_renderer.render(
+                ArticleSerializer(Article.objects.all(), many=True).data)),
+            ("detail", "ArticleSerializer + FastJSONRenderer", lambda: fast_renderer.render(
+                ArticleSerializer(Article.objects.all(), many=True).data)),
+            ("summary", "ArticleSummarySerializer (model path) + JSONRenderer", lambda: default_renderer.render(
+                serializers.ListSerializer(Article.objects.with_counts(), child=ArticleSummarySerializer()).data)),
+            ("summary", "ArticleSummarySerializer (values path) + FastJSONRenderer", lambda: fast_renderer.render(
+                ArticleSummarySerializer(Article.objects.with_counts(), many=True).data)),
+        ]
+
+        self.stdout.write(f"orjson installed: {orjson is not None}")
+
+        with transaction.atomic():
+            self.seed(options["articles"], options["comments"])
+            payload["data"] = ArticleSerializer(Article.objects.all(), many=True).data
+
+            baselines = {}
+            for group, label, func in paths:
+                elapsed, size = self.measure(func, options["repeat"])
+                baseline = baselines.setdefault(group, elapsed)
+                self.stdout.write(
+                    f"{label:<60} {elapsed * 1000:9.1f} ms {size / 1024:9.1f} KiB {baseline / elapsed:6.1f}x"
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.compaction import compact_shares
+
+
+class Command(BaseCommand):
+    """
+    Compacts raw shares older than the retention window into daily rollups.
+
+    Meant to run daily, e.g. from cron. Share counts stay exact: they are
+    served from the rollups plus the raw rows still inside the window.
+    """
+
+    help = "Rolls up shares older than the retention window per article and day, then prunes them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days", type=int, default=getattr(settings, "BLOG_SHARE_RETENTION_DAYS", 90),
+            help="Days of raw shares to keep.",
+        )
+        parser.add_argument("--archive-dir", help="Append pruned shares to per-month JSON lines files here.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows deleted per statement.")
+
+    def handle(self, *args, **options):
+        days, compacted = compact_shares(
+            options["retention_days"], archive_dir=options["archive_dir"], batch_size=options["batch_size"]
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Compacted {compacted} shares from {days} days."))
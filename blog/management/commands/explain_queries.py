@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog.models import Article, Comment, Like, Share
+from blog.views import (ArticleListAPIView, ArticleSummaryListAPIView, ArticleArchiveAPIView, ArticleListCreateAPIView,
+                        ArticleBatchAPIView, ArticleDetailAPIView, CommentCreateView, LikeArticleView, ShareArticleView,
+                        AuthorStatsAPIView, ArticleRevisionListAPIView, ArticleRevisionDetailAPIView)
+
+User = get_user_model()
+
+
+def get_access_paths(author, article):
+    """
+    Lists the requests covering every access path of the blog views.
+    Returns (label, view class, method, path data, url kwargs) tuples.
+    """
+    today = timezone.localdate()
+
+    return [
+        ("featured articles", ArticleListAPIView, "get", {}, {}),
+        ("featured articles by tags", ArticleListAPIView, "get", {"tags": "#explain"}, {}),
+        ("featured articles by date", ArticleListAPIView, "get", {"published_date": today.isoformat()}, {}),
+        ("featured articles by date range", ArticleListAPIView, "get",
+         {"published_after": today.isoformat(), "published_before": (today + timedelta(days=1)).isoformat()}, {}),
+        ("featured articles by month", ArticleListAPIView, "get", {"month": today.strftime("%Y-%m")}, {}),
+        ("featured articles summary", ArticleSummaryListAPIView, "get", {}, {}),
+        ("featured articles archive", ArticleArchiveAPIView, "get", {}, {}),
+        ("author's articles", ArticleListCreateAPIView, "get", {}, {}),
+        ("articles batch", ArticleBatchAPIView, "post", {"ids": [article.pk]}, {}),
+        ("article detail", ArticleDetailAPIView, "get", {}, {"pk": article.pk}),
+        ("comment on article", CommentCreateView, "post", {"comment": "Explained."}, {"pk": article.pk}),
+        ("like article", LikeArticleView, "post", {}, {"pk": article.pk}),
+        ("share article", ShareArticleView, "post", {}, {"pk": article.pk}),
+        ("author stats", AuthorStatsAPIView, "get", {}, {"username": author.username}),
+        ("update article", ArticleDetailAPIView, "patch", {"title": "Explained again"}, {"pk": article.pk}),
+        ("article revisions", ArticleRevisionListAPIView, "get", {}, {"pk": article.pk}),
+        ("article revision", ArticleRevisionDetailAPIView, "get", {}, {"pk": article.pk, "version": 2}),
+        # last, as it removes the seeded article
+        ("delete article", ArticleDetailAPIView, "delete", {}, {"pk": article.pk}),
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Audits the query plans of every blog view.
+
+    Each access path is requested against seeded rows inside a transaction
+    that is rolled back afterwards. Every statement the view runs is
+    captured and explained, and the command fails if any of them does a
+    full table scan. Plans are only checked on SQLite (EXPLAIN QUERY PLAN);
+    other databases get their plans printed.
+    """
+
+    help = "Runs EXPLAIN QUERY PLAN on every view's queries and fails on full table scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plans", action="store_true", help="Print the plan of every statement.")
+
+    def seed(self):
+        author = User.objects.create_user(username="explain-queries-author", password=None)
+        reader = User.objects.create_user(username="explain-queries-reader", password=None)
+
+        article = Article.objects.create(user=author, title="Explain", tags="#explain", body="Explained.")
+        Comment.objects.create(article=article, user=reader, comment="Explained.")
+        Like.objects.create(article=article, user=author)
+        Share.objects.create(article=article, user=author)
+
+        return author, reader, article
+
+    def capture(self, view_class, method, data, kwargs, user):
+        """
+        Util function to run a request against a view.
+        Returns the (sql, params) of every statement executed.
+        """
+        statements = []
+
+        def wrapper(execute, sql, params, many, context):
+            statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        factory = APIRequestFactory()
+        request = getattr(factory, method)("/", data, format="json" if method != "get" else None)
+        force_authenticate(request, user=user)
+
+        with connection.execute_wrapper(wrapper):
+            response = view_class.as_view()(request, **kwargs)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elif hasattr(response, "render"):
+                response.render()
+
+        return statements
+
+    def explain(self, sql, params):
+        """
+        Util function to fetch the plan of a statement.
+        Returns a list of plan lines.
+        """
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                return [row[-1] for row in cursor.fetchall()]
+
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+
+    def find_scans(self, plan, tables):
+        """
+        Util function to find the full table scans in a SQLite plan.
+        Returns the offending plan lines.
+        """
+        scans = []
+        for line in plan:
+            words = line.split()
+            if words[:1] == ["SCAN"] and "USING" not in words and words[1] in tables:
+                scans.append(line)
+        return scans
+
+    def handle(self, *args, **options):
+        tables = set(connection.introspection.table_names())
+        failures = []
+
+        with transaction.atomic():
+            author, reader, article = self.seed()
+
+            for label, view_class, method, data, kwargs in get_access_paths(author, article):
+                user = reader if method == "post" else author
+                statements = self.capture(view_class, method, data, kwargs, user)
+
+                self.stdout.write(f"{label} ({view_class.__name__}): {len(statements)} statements")
+
+                for sql, params in statements:
+                    if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                        continue
+
+                    plan = self.explain(sql, params)
+                    scans = self.find_scans(plan, tables) if connection.vendor == "sqlite" else []
+
+                    if options["verbose_plans"] or scans or connection.vendor != "sqlite":
+                        self.stdout.write(f"  {sql}")
+                        for line in plan:
+                            self.stdout.write(f"    {line}")
+
+                    failures.extend((label, sql, scan) for scan in scans)
+
+            transaction.set_rollback(True)
+
+        if failures:
+            for label, sql, scan in failures:
+                self.stderr.write(f"{label}: {scan}\n  {sql}")
+            raise CommandError(f"{len(failures)} full table scans found.")
+
+        self.stdout.write(self.style.SUCCESS("No full table scans found."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blog.fingerprints import prune_fingerprints
+
+
+class Command(BaseCommand):
+    """
+    Removes comment fingerprints older than the duplicate window.
+
+    They are never matched again, so keeping them only grows the index.
+    Meant to run periodically, e.g. daily from cron.
+    """
+
+    help = "Deletes comment fingerprints older than BLOG_COMMENT_DUPLICATE_WINDOW in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows deleted per statement.")
+
+    def handle(self, *args, **options):
+        deleted = prune_fingerprints(batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} comment fingerprints."))
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.purge import purge_deleted_articles
+
+
+class Command(BaseCommand):
+    """
+    Purges soft-deleted articles and the rows referencing them.
+
+    Articles are normally purged in the background right after deletion;
+    this command catches up on any left behind, e.g. by a restarted worker,
+    or does all purging when BLOG_PURGE_IN_BACKGROUND is disabled.
+    """
+
+    help = "Removes soft-deleted articles and their comments, likes and shares in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows deleted per statement.")
+        parser.add_argument(
+            "--older-than", type=int, default=0, metavar="MINUTES",
+            help="Only purge articles deleted at least this many minutes ago.",
+        )
+
+    def handle(self, *args, **options):
+        older_than = None
+        if options["older_than"]:
+            older_than = timezone.now() - timedelta(minutes=options["older_than"])
+
+        purged, deleted = purge_deleted_articles(batch_size=options["batch_size"], older_than=older_than)
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} articles ({deleted} rows)."))
@@ -0,0 +1,94 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from blog.models import Article, Comment, Like, Share, ShareDailyRollup, AuthorStats, AuthorDailyStats
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the author stats tables from the article and engagement tables.
+
+    Used to backfill existing data and to repair drift; day to day the
+    tables are maintained incrementally by `blog.signals`.
+
+    Likes have no timestamp, so their daily buckets cannot be rebuilt: the
+    likes total is recounted, but the daily like counts recorded live are
+    kept as they are.
+    """
+
+    help = "Rebuilds AuthorStats and AuthorDailyStats from scratch."
+
+    def handle(self, *args, **options):
+        totals = defaultdict(lambda: defaultdict(int))
+        daily = defaultdict(lambda: defaultdict(int))
+
+        # rows of soft-deleted articles were removed from the stats when the
+        # article was, and are not counted until purged; Article.objects
+        # already leaves these articles out
+        live = {"article__deleted_at__isnull": True}
+
+        # one grouped query per source table
+        sources = [
+            ("articles_count", Article.objects.all(), "user", "published_date"),
+            ("comments_count", Comment.objects.filter(**live), "article__user", "created_date"),
+            ("shares_count", Share.objects.filter(**live), "article__user", "shared_date"),
+        ]
+
+        for field, queryset, author, timestamp in sources:
+            rows = (
+                queryset.order_by()
+                .annotate(day=TruncDate(timestamp))
+                .values(author, "day")
+                .annotate(total=Count("pk"))
+            )
+            for row in rows:
+                totals[row[author]][field] += row["total"]
+                daily[(row[author], row["day"])][field] += row["total"]
+
+        # compacted shares
+        rollups = (
+            ShareDailyRollup.objects.filter(**live).order_by()
+            .values("article__user", "date")
+            .annotate(total=Sum("count"))
+        )
+        for row in rollups:
+            totals[row["article__user"]]["shares_count"] += row["total"]
+            daily[(row["article__user"], row["date"])]["shares_count"] += row["total"]
+
+        # likes are not timestamped, so they only feed the totals
+        likes = Like.objects.filter(**live).order_by().values("article__user").annotate(total=Count("pk"))
+        for row in likes:
+            totals[row["article__user"]]["likes_count"] += row["total"]
+
+        with transaction.atomic():
+            # daily likes cannot be rebuilt, the counts recorded live are kept
+            daily_likes = (
+                AuthorDailyStats.objects.select_for_update()
+                .filter(likes_count__gt=0)
+                .values_list("user_id", "date", "likes_count")
+            )
+            for user_id, day, count in daily_likes:
+                daily[(user_id, day)]["likes_count"] = count
+
+            AuthorStats.objects.all().delete()
+            AuthorDailyStats.objects.all().delete()
+
+            AuthorStats.objects.bulk_create(
+                [AuthorStats(user_id=user_id, **counts) for user_id, counts in totals.items()],
+                batch_size=500,
+            )
+            AuthorDailyStats.objects.bulk_create(
+                [
+                    AuthorDailyStats(user_id=user_id, date=day, **counts)
+                    for (user_id, day), counts in daily.items()
+                ],
+                batch_size=500,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt stats for {len(totals)} authors ({len(daily)} daily buckets)."
+        ))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import invalidate_article
+from blog.models import Article
+
+
+class Command(BaseCommand):
+    """
+    Backfills the rendered HTML, excerpt and reading time of articles.
+
+    Walks every article in primary key order, loading only the body and its
+    hash, and writes the rendered fields of those whose body changed since
+    they were rendered (or never were) with `bulk_update`, which leaves
+    `updated_date` and the version alone. Safe to re-run; after a renderer
+    change (see `blog.rendering.RENDERER_VERSION`) it re-renders every row.
+    """
+
+    help = "Renders the bodies of articles that were never rendered or rendered from an older body."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Articles loaded and written per batch.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        articles = Article.all_objects.order_by("pk").only("pk", "body", "body_hash")
+
+        checked = rendered = 0
+        last_pk = None
+
+        while True:
+            batch = list((articles.filter(pk__gt=last_pk) if last_pk else articles)[:batch_size])
+            if not batch:
+                break
+
+            changed = [article for article in batch if article.render_body()]
+            Article.all_objects.bulk_update(changed, Article.RENDERED_FIELDS)
+
+            # bulk_update sends no signals
+            for article in changed:
+                invalidate_article(article.pk)
+
+            checked += len(batch)
+            rendered += len(changed)
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} of {checked} articles."))
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0003_authorstats_authordailystats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                condition=models.Q(("featured", True)),
+                fields=["-updated_date"],
+                name="article_featured_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                condition=models.Q(("featured", True)),
+                fields=["published_date"],
+                name="article_featured_published_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                fields=["user", "-updated_date"], name="article_user_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["article", "-created_date"], name="comment_article_created_idx"
+            ),
+        ),
+    ]
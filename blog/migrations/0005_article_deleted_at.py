@@ -0,0 +1,52 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0004_article_comment_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="article",
+            name="article_featured_updated_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="article",
+            name="article_featured_published_idx",
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True), ("featured", True)),
+                fields=["-updated_date"],
+                name="article_featured_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True), ("featured", True)),
+                fields=["published_date"],
+                name="article_featured_published_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", False)),
+                fields=["deleted_at"],
+                name="article_deleted_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0005_article_deleted_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShareDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name_plural": "Share daily rollups",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="share",
+            index=models.Index(fields=["shared_date"], name="share_shared_date_idx"),
+        ),
+        migrations.AddField(
+            model_name="sharedailyrollup",
+            name="article",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="share_rollups",
+                to="blog.article",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="sharedailyrollup",
+            unique_together={("article", "date")},
+        ),
+    ]
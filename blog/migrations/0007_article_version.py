@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0006_sharedailyrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0007_article_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleRevision",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField()),
+                ("title", models.CharField(max_length=250)),
+                ("tags", models.CharField(max_length=250)),
+                ("depth", models.PositiveSmallIntegerField(default=0)),
+                ("data", models.BinaryField()),
+                ("body_size", models.PositiveIntegerField()),
+                ("created_date", models.DateTimeField(auto_now_add=True)),
+                (
+                    "article",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="revisions",
+                        to="blog.article",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Article revisions",
+                "ordering": ["-version"],
+                "unique_together": {("article", "version")},
+            },
+        ),
+    ]
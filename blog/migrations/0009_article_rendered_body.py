@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0008_articlerevision"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="body_hash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="body_html",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="excerpt",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=250
+            ),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="reading_time",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,10 +1,102 @@
 import uuid
-from django.db import models
+from django.db import models, router
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .rendering import get_body_hash, render_body
 
 User = get_user_model()
 
 
+def sum_subquery(queryset, field):
+    """
+    Builds a correlated subquery summing `field` over the rows of
+    `queryset` that belong to the outer article, defaulting to 0.
+    """
+    totals = (
+        queryset.filter(article=OuterRef("pk"))
+        .order_by()
+        .values("article")
+        .annotate(total=Sum(field))
+        .values("total")
+    )
+    return Coalesce(Subquery(totals), 0)
+
+
+def count_subquery(queryset):
+    """
+    Builds a correlated subquery counting the rows of `queryset` that belong
+    to the outer article, defaulting to 0.
+    """
+    counts = (
+        queryset.filter(article=OuterRef("pk"))
+        .order_by()
+        .values("article")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+class ArticleQuerySet(models.QuerySet):
+    """
+    QuerySet for the Article model.
+    """
+
+    def with_related(self):
+        """
+        Loads the author and the comments with their authors up front, so
+        serializing a list of articles runs a fixed number of queries.
+        """
+        return self.select_related("user").prefetch_related(
+            models.Prefetch("comments", queryset=Comment.objects.select_related("user"))
+        )
+
+    def with_user_state(self, user):
+        """
+        Annotates each article with whether `user` liked and shared it,
+        using `Exists()` subqueries instead of a lookup per article.
+        """
+        if not user.is_authenticated:
+            return self.annotate(liked_by_me=Value(False), shared_by_me=Value(False))
+
+        return self.annotate(
+            liked_by_me=Exists(Like.objects.filter(article=OuterRef("pk"), user=user)),
+            # compacted shares leave a marker behind
+            shared_by_me=(
+                Exists(Share.objects.filter(article=OuterRef("pk"), user=user))
+                | Exists(ShareMarker.objects.filter(article=OuterRef("pk"), user=user))
+            ),
+        )
+
+    def with_counts(self):
+        """
+        Annotates each article with its comments, likes and shares counts
+        using one correlated subquery each instead of a query per article.
+        """
+        return self.annotate(
+            comments_count=count_subquery(Comment.objects.all()),
+            likes_count=count_subquery(Like.objects.all()),
+            # compacted shares live in the daily rollups
+            shares_count=(
+                count_subquery(Share.objects.all())
+                + sum_subquery(ShareDailyRollup.objects.all(), "count")
+            ),
+        )
+
+
+class ArticleManager(models.Manager.from_queryset(ArticleQuerySet)):
+    """
+    Default manager for the Article model, leaving out soft-deleted articles.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Article(models.Model):
     """
     Article model to representing a blog article.
@@ -18,11 +110,37 @@ class Article(models.Model):
         featured (BooleanField): marks if an article should be viewed by everyone.
         published_date (DateTimeField): timestamp when the article was created.
         updated_date (DateTimeField): timestamp when the article was updated.
+        deleted_at (DateTimeField): timestamp when the article was soft-deleted.
+        version (PositiveIntegerField): incremented on every edit, for optimistic concurrency.
+        body_html (TextField): the body rendered to safe HTML.
+        excerpt (CharField): the start of the body as plain text.
+        reading_time (PositiveIntegerField): estimated reading time in minutes.
+        body_hash (CharField): hash of the body the rendered fields were computed from.
 
+    Soft-deleted articles are hidden by the default `objects` manager and
+    purged later by `blog.purge`; `all_objects` includes them.
     """
     class Meta:
         verbose_name_plural = "Articles"
         ordering = ['-updated_date']
+        indexes = [
+            # featured feed: WHERE featured ORDER BY updated_date DESC
+            models.Index(
+                fields=['-updated_date'], condition=Q(featured=True, deleted_at__isnull=True),
+                name='article_featured_updated_idx'
+            ),
+            # featured feed filtered by publication date range
+            models.Index(
+                fields=['published_date'], condition=Q(featured=True, deleted_at__isnull=True),
+                name='article_featured_published_idx'
+            ),
+            # author's articles: WHERE user_id = ? ORDER BY updated_date DESC
+            models.Index(fields=['user', '-updated_date'], name='article_user_updated_idx'),
+            # soft-deleted articles waiting to be purged
+            models.Index(
+                fields=['deleted_at'], condition=Q(deleted_at__isnull=False), name='article_deleted_idx'
+            ),
+        ]
 
     id = models.UUIDField( primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, related_name="articles", on_delete=models.CASCADE)
@@ -32,9 +150,75 @@ class Article(models.Model):
     featured = models.BooleanField(default=True)
     published_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    body_html = models.TextField(blank=True, default="", editable=False)
+    excerpt = models.CharField(max_length=250, blank=True, default="", editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False)
+    body_hash = models.CharField(max_length=64, blank=True, default="", editable=False)
+
+    objects = ArticleManager()
+    all_objects = ArticleQuerySet.as_manager()
+
+    # fields computed from the body by `render_body()`
+    RENDERED_FIELDS = ["body_html", "excerpt", "reading_time", "body_hash"]
 
     def __str__(self) -> str:
         return self.title
+
+    def render_body(self):
+        """
+        Renders the body into `body_html`, `excerpt` and `reading_time`,
+        unless they were already rendered from this exact body.
+        Returns True if the rendered fields changed.
+        """
+        body_hash = get_body_hash(self.body)
+
+        if body_hash == self.body_hash:
+            return False
+
+        self.body_html, self.excerpt, self.reading_time = render_body(self.body)
+        self.body_hash = body_hash
+        return True
+
+    def save(self, *args, **kwargs):
+        # rendering happens once per body on write, never on read
+        if self.render_body() and kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], *self.RENDERED_FIELDS}
+
+        super().save(*args, **kwargs)
+
+    def conditional_update(self, version, fields):
+        """
+        Writes `fields` of this instance only if the row is still at `version`.
+
+        Runs a single `UPDATE ... WHERE id = ? AND version = ?` that also
+        increments the version, so concurrent editors never overwrite each
+        other and no row lock is held. `post_save` is sent with the written
+        fields, as `save(update_fields=...)` would.
+        Returns True if the row was updated, False if it changed meanwhile.
+        """
+        if self.render_body():
+            fields = [*fields, *self.RENDERED_FIELDS]
+
+        updated_date = timezone.now()
+        values = {name: getattr(self, name) for name in fields}
+
+        updated = Article.objects.filter(pk=self.pk, version=version).update(
+            version=F("version") + 1, updated_date=updated_date, **values
+        )
+
+        if not updated:
+            return False
+
+        self.version = version + 1
+        self.updated_date = updated_date
+
+        post_save.send(
+            sender=Article, instance=self, created=False, raw=False,
+            using=router.db_for_write(Article), update_fields=frozenset([*fields, "version", "updated_date"]),
+        )
+        return True
     
 
 
@@ -53,6 +237,10 @@ class Comment(models.Model):
     class Meta:
         verbose_name_plural = "Comments"
         ordering = ['-created_date']
+        indexes = [
+            # an article's comments: WHERE article_id IN (...) ORDER BY created_date DESC
+            models.Index(fields=['article', '-created_date'], name='comment_article_created_idx'),
+        ]
 
     id = models.UUIDField( primary_key=True, default=uuid.uuid4, editable=False)
     article = models.ForeignKey(Article, related_name='comments', on_delete=models.CASCADE)
@@ -64,6 +252,41 @@ class Comment(models.Model):
         return f"Comment by {self.user} on {self.article}"
 
 
+class CommentFingerprint(models.Model):
+    """
+    CommentFingerprint model indexing the MinHash bands of recent comments.
+
+    Each comment gets one row per band of its MinHash signature (see
+    `blog.fingerprints`). Near-duplicate comments share at least one band
+    with high probability, so checking a new comment is one indexed lookup
+    on (article, user, key). Rows only matter within the duplicate window.
+
+    Attributes:
+        comment (Comment): the comment fingerprinted.
+        article (Article): the article commented on.
+        user (User): the user commenting.
+        key (BigIntegerField): the hash of one band of the signature.
+        created_date (DateTimeField): timestamp when the comment was made.
+    """
+    class Meta:
+        verbose_name_plural = "Comment fingerprints"
+        indexes = [
+            # duplicate check: WHERE article_id = ? AND user_id = ? AND key IN (...)
+            models.Index(fields=['article', 'user', 'key'], name='commentfp_lookup_idx'),
+            # pruning: WHERE created_date < ?
+            models.Index(fields=['created_date'], name='commentfp_created_idx'),
+        ]
+
+    comment = models.ForeignKey(Comment, related_name="fingerprints", on_delete=models.CASCADE)
+    article = models.ForeignKey(Article, related_name="comment_fingerprints", on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.BigIntegerField()
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Fingerprint {self.key} of {self.comment_id}"
+
+
 class Like(models.Model):
     """
     Like model to allow users to like an article.
@@ -96,9 +319,17 @@ class Share(models.Model):
         article(Article): the article being shared.
         user (User): the user sharing an article.
         shared_date (DateTimeField): timestamp when the article was shared.
+
+    Only the recent tail of shares is kept: older rows are folded into
+    `ShareDailyRollup` (counts) and `ShareMarker` (who shared) by the
+    `compact_shares` command.
     """
     class Meta:
         verbose_name_plural = "Shares"
+        indexes = [
+            # compaction: WHERE shared_date < ?
+            models.Index(fields=['shared_date'], name='share_shared_date_idx'),
+        ]
         
     id = models.UUIDField( primary_key=True, default=uuid.uuid4, editable=False)
     article = models.ForeignKey(Article, related_name='shares', on_delete=models.CASCADE)
@@ -108,3 +339,152 @@ class Share(models.Model):
     def __str__(self):
         return f"{self.user} shared {self.article}"
 
+
+class ShareDailyRollup(models.Model):
+    """
+    ShareDailyRollup model holding the number of shares of an article per day.
+
+    Rows are written by the `compact_shares` command when raw `Share` rows
+    fall out of the retention window; share counts are the sum of the
+    rollups plus the remaining raw rows.
+
+    Attributes:
+        article (Article): the article shared.
+        date (DateField): the day the shares were made.
+        count (PositiveIntegerField): number of shares made that day.
+    """
+    class Meta:
+        verbose_name_plural = "Share daily rollups"
+        unique_together = ('article', 'date')
+
+    article = models.ForeignKey(Article, related_name='share_rollups', on_delete=models.CASCADE)
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.count} shares of {self.article} on {self.date}"
+
+
+class ShareMarker(models.Model):
+    """
+    ShareMarker model remembering that a user shared an article, once the
+    user's raw `Share` rows of it were compacted into rollups.
+
+    Written by the `compact_shares` command, one row per (article, user),
+    so `shared_by_me` stays true after compaction.
+
+    Attributes:
+        article (Article): the article shared.
+        user (User): the user who shared it.
+    """
+    class Meta:
+        verbose_name_plural = "Share markers"
+        unique_together = ('article', 'user')
+
+    article = models.ForeignKey(Article, related_name='share_markers', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f"{self.user} shared {self.article}"
+
+
+
+class AuthorStats(models.Model):
+    """
+    AuthorStats model holding precomputed engagement totals for an author.
+
+    Rows are maintained incrementally by the signal handlers in `blog.signals`
+    so the author dashboard is a single indexed read.
+
+    Attributes:
+        user (User): the author the totals belong to.
+        articles_count (PositiveIntegerField): number of articles written.
+        comments_count (PositiveIntegerField): comments received on the author's articles.
+        likes_count (PositiveIntegerField): likes received on the author's articles.
+        shares_count (PositiveIntegerField): shares of the author's articles.
+        updated_date (DateTimeField): timestamp when the totals last changed.
+    """
+    class Meta:
+        verbose_name_plural = "Author stats"
+
+    user = models.OneToOneField(User, related_name="author_stats", on_delete=models.CASCADE)
+    articles_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+    shares_count = models.PositiveIntegerField(default=0)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.user}"
+
+
+class AuthorDailyStats(models.Model):
+    """
+    AuthorDailyStats model holding per-day engagement counts for an author.
+
+    Each row is a time bucket of the events recorded on that day, used to
+    draw dashboard charts without scanning the engagement tables.
+
+    Attributes:
+        user (User): the author the counts belong to.
+        date (DateField): the day the bucket covers.
+        articles_count (PositiveIntegerField): articles published on that day.
+        comments_count (PositiveIntegerField): comments received on that day.
+        likes_count (PositiveIntegerField): likes received on that day.
+        shares_count (PositiveIntegerField): shares made on that day.
+    """
+    class Meta:
+        verbose_name_plural = "Author daily stats"
+        ordering = ['date']
+        unique_together = ('user', 'date')
+
+    user = models.ForeignKey(User, related_name="daily_stats", on_delete=models.CASCADE)
+    date = models.DateField()
+    articles_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+    shares_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats for {self.user} on {self.date}"
+
+
+class ArticleRevision(models.Model):
+    """
+    ArticleRevision model recording an article as it was at one version.
+
+    The body is stored zlib-compressed, either whole (a keyframe) or as a
+    line delta against the previous revision, with a keyframe at least every
+    `BLOG_REVISION_KEYFRAME_INTERVAL` revisions so rebuilding any revision
+    applies a bounded number of deltas. See `blog.revisions`.
+
+    Attributes:
+        article (Article): the article revised.
+        version (PositiveIntegerField): the article version this revision records.
+        title (CharField): the article's title at that version.
+        tags (CharField): the article's tags at that version.
+        depth (PositiveSmallIntegerField): deltas since the last keyframe, 0 for a keyframe.
+        data (BinaryField): the compressed body or delta.
+        body_size (PositiveIntegerField): size of the uncompressed body in bytes.
+        created_date (DateTimeField): timestamp when the revision was made.
+    """
+    class Meta:
+        verbose_name_plural = "Article revisions"
+        ordering = ['-version']
+        unique_together = ('article', 'version')
+
+    article = models.ForeignKey(Article, related_name="revisions", on_delete=models.CASCADE)
+    version = models.PositiveIntegerField()
+    title = models.CharField(max_length=250)
+    tags = models.CharField(max_length=250)
+    depth = models.PositiveSmallIntegerField(default=0)
+    data = models.BinaryField()
+    body_size = models.PositiveIntegerField()
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def is_keyframe(self):
+        return self.depth == 0
+
+    def __str__(self):
+        return f"{self.article} at version {self.version}"
@@ -0,0 +1,155 @@
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections, models, router, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Article, Comment, Like, Share, ShareDailyRollup
+from .stats import remove_event
+
+logger = logging.getLogger(__name__)
+
+def soft_delete_article(article):
+    """
+    Marks an article as deleted and schedules the removal of its rows.
+
+    Only the article row is written, so this returns immediately however
+    much engagement the article has. The author's stats are adjusted here
+    since the purge itself bypasses signals.
+    """
+    article.deleted_at = timezone.now()
+    article.save(update_fields=["deleted_at"])
+
+    remove_event(article.user_id, "articles_count")
+    remove_event(article.user_id, "comments_count", Comment.objects.filter(article=article).count())
+    remove_event(article.user_id, "likes_count", Like.objects.filter(article=article).count())
+    rollups = ShareDailyRollup.objects.filter(article=article).aggregate(total=Sum("count"))["total"] or 0
+    remove_event(article.user_id, "shares_count", Share.objects.filter(article=article).count() + rollups)
+
+    schedule_purge(article.pk)
+
+
+def get_purge_relations():
+    """
+    Util function to list the relations of Article whose rows are deleted
+    with it, from the model metadata so new related models are included.
+    Returns (model, field name) tuples.
+    """
+    return [
+        (relation.related_model, relation.field.name)
+        for relation in Article._meta.related_objects
+        if relation.on_delete is models.CASCADE
+    ]
+
+
+def purge_article(article_id, batch_size=500):
+    """
+    Removes a soft-deleted article and the rows referencing it.
+
+    Child rows are deleted in batches of `batch_size` through the regular
+    deletion collector, so cascades (e.g. comment fingerprints) follow and
+    neither memory nor lock time grows with the size of the article. The
+    signal receivers skip stats updates, as soft-deleted articles are
+    hidden from them and the stats were adjusted on deletion. The article
+    row goes last: until then it stays soft-deleted, so an interrupted
+    purge is resumed by the next one.
+    Returns the number of rows deleted, 0 if the article is not soft-deleted.
+    """
+    article = Article.all_objects.filter(pk=article_id, deleted_at__isnull=False)
+    if not article.exists():
+        return 0
+
+    deleted = 0
+
+    for model, field in get_purge_relations():
+        rows = model._base_manager.filter(**{field: article_id})
+        while True:
+            pks = list(rows.order_by().values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic(using=router.db_for_write(model)):
+                deleted += model._base_manager.filter(pk__in=pks).delete()[0]
+
+    deleted += article.delete()[0]
+
+    return deleted
+
+
+def purge_deleted_articles(batch_size=500, older_than=None):
+    """
+    Purges every soft-deleted article, optionally only those deleted
+    before `older_than`.
+    Returns the number of (articles, rows) deleted.
+    """
+    articles = Article.all_objects.filter(deleted_at__isnull=False)
+    if older_than is not None:
+        articles = articles.filter(deleted_at__lt=older_than)
+
+    purged = deleted = 0
+    for article_id in articles.order_by().values_list("pk", flat=True).iterator():
+        deleted += purge_article(article_id, batch_size=batch_size)
+        purged += 1
+
+    return purged, deleted
+
+
+class Purger:
+    """
+    Purges articles one after the other from a single background thread
+    per process, started on first use (and again after a fork).
+
+    The queue only lives in memory: articles still queued when the process
+    exits stay soft-deleted and are purged by `manage.py
+    purge_deleted_articles`, so the soft-deleted state, not the queue, is
+    the source of truth.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def schedule(self, article_id):
+        with self.lock:
+            if self.pid != os.getpid() or not self.thread.is_alive():
+                # threads do not survive a fork, neither does what was queued
+                self.queue = queue.Queue()
+                self.thread = threading.Thread(target=self.run, args=(self.queue,), name="purge", daemon=True)
+                self.thread.start()
+                self.pid = os.getpid()
+
+            self.queue.put(article_id)
+
+    def run(self, articles):
+        batch_size = getattr(settings, "BLOG_PURGE_BATCH_SIZE", 500)
+
+        while True:
+            article_id = articles.get()
+            try:
+                purge_article(article_id, batch_size=batch_size)
+            except DatabaseError:
+                # left soft-deleted for the purge_deleted_articles command
+                logger.exception("Purging article %s failed.", article_id)
+            finally:
+                # the thread's connections are not closed by the request cycle
+                connections.close_all()
+                articles.task_done()
+
+
+purger = Purger()
+
+
+def schedule_purge(article_id):
+    """
+    Queues an article for the background purger once the current
+    transaction commits, unless BLOG_PURGE_IN_BACKGROUND is disabled.
+    """
+    if not getattr(settings, "BLOG_PURGE_IN_BACKGROUND", True):
+        return
+
+    transaction.on_commit(lambda: purger.schedule(article_id))
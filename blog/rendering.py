@@ -0,0 +1,204 @@
+"""
+Renders article bodies written in a Markdown subset to safe HTML.
+
+Everything the author wrote is HTML-escaped and only the tags produced here
+are emitted, so no sanitizer is needed: raw HTML in a body shows as text.
+Supported: paragraphs, `#` headings, `-`/`*`/`+` and numbered lists,
+`>` quotes, fenced code blocks, horizontal rules, `code`, **bold**,
+*italic* and [links](https://example.com) with http(s), mailto or relative
+URLs.
+"""
+import hashlib
+import math
+import re
+from html import escape, unescape
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# bump when the output changes, so `manage.py render_articles` re-renders every body
+RENDERER_VERSION = 1
+
+EXCERPT_LENGTH = 200
+WORDS_PER_MINUTE = 200
+SAFE_URL_SCHEMES = {"http", "https", "mailto"}
+MAX_QUOTE_DEPTH = 5
+
+FENCE_RE = re.compile(r"^\s*```")
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)(\s+#+)?\s*$")
+RULE_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+UNORDERED_ITEM_RE = re.compile(r"^\s*[-*+]\s+(.*)$")
+ORDERED_ITEM_RE = re.compile(r"^\s*\d{1,9}[.)]\s+(.*)$")
+QUOTE_RE = re.compile(r"^\s*>\s?(.*)$")
+
+CODE_RE = re.compile(r"`([^`\n]+)`")
+LINK_RE = re.compile(r"\[([^\[\]\n]+)\]\(([^()\s]+)\)")
+BOLD_RE = re.compile(r"\*\*([^*\n]+)\*\*|__([^_\n]+)__")
+ITALIC_RE = re.compile(r"(?<![\w*])\*([^*\s](?:[^*\n]*[^*\s])?)\*(?![\w*])|(?<!\w)_([^_\s](?:[^_\n]*[^_\s])?)_(?!\w)")
+PLACEHOLDER_RE = re.compile(r"\x00(\d+)\x00")
+BLOCK_TAG_RE = re.compile(r"</?(?:p|h[1-6]|ul|ol|li|blockquote|pre|hr)\b[^>]*>")
+
+
+def is_safe_url(url):
+    """
+    Util function to check a link target, refusing schemes like javascript:.
+    """
+    scheme, separator, _ = url.partition(":")
+
+    if not separator or any(char in scheme for char in "/?#"):
+        # relative URL, the colon belongs to the path or query
+        return True
+
+    return scheme.lower() in SAFE_URL_SCHEMES
+
+
+def render_emphasis(text):
+    """
+    Util function to render bold and italic markers in escaped text.
+    """
+    text = BOLD_RE.sub(lambda match: f"<strong>{match[1] or match[2]}</strong>", text)
+    return ITALIC_RE.sub(lambda match: f"<em>{match[1] or match[2]}</em>", text)
+
+
+def render_inline(text):
+    """
+    Renders the inline markup of a block of text.
+
+    Code spans and links are rendered first and swapped for placeholders,
+    so emphasis markers inside them (e.g. in URLs) are left alone.
+    Returns HTML.
+    """
+    stash = []
+
+    def keep(html):
+        stash.append(html)
+        return f"\x00{len(stash) - 1}\x00"
+
+    def render_link(match):
+        label, url = render_emphasis(escape(match[1])), unescape(match[2])
+
+        if not is_safe_url(url):
+            return keep(label)
+
+        return keep(f'<a href="{escape(url)}" rel="nofollow noopener">{label}</a>')
+
+    text = text.replace("\x00", "")
+    text = CODE_RE.sub(lambda match: keep(f"<code>{escape(match[1])}</code>"), text)
+    text = LINK_RE.sub(render_link, text)
+    text = render_emphasis(escape(text))
+
+    # links may hold code placeholders, which always point to earlier entries
+    while "\x00" in text:
+        text = PLACEHOLDER_RE.sub(lambda match: stash[int(match[1])], text)
+
+    return text
+
+
+def render_blocks(lines, depth=0):
+    """
+    Renders lines of Markdown into block elements.
+    Returns a list of HTML blocks.
+    """
+    blocks = []
+    paragraph = []
+    index = 0
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(f"<p>{render_inline(chr(10).join(paragraph))}</p>")
+            paragraph.clear()
+
+    while index < len(lines):
+        line = lines[index]
+
+        if FENCE_RE.match(line):
+            flush_paragraph()
+            code = []
+            index += 1
+            while index < len(lines) and not FENCE_RE.match(lines[index]):
+                code.append(lines[index])
+                index += 1
+            blocks.append(f"<pre><code>{escape(chr(10).join(code))}</code></pre>")
+            index += 1
+            continue
+
+        if not line.strip():
+            flush_paragraph()
+            index += 1
+            continue
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            flush_paragraph()
+            level = len(heading[1])
+            blocks.append(f"<h{level}>{render_inline(heading[2])}</h{level}>")
+            index += 1
+            continue
+
+        if RULE_RE.match(line):
+            flush_paragraph()
+            blocks.append("<hr>")
+            index += 1
+            continue
+
+        for item_re, tag in ((UNORDERED_ITEM_RE, "ul"), (ORDERED_ITEM_RE, "ol")):
+            if item_re.match(line):
+                flush_paragraph()
+                items = []
+                while index < len(lines) and item_re.match(lines[index]):
+                    items.append(f"<li>{render_inline(item_re.match(lines[index])[1])}</li>")
+                    index += 1
+                blocks.append(f"<{tag}>{''.join(items)}</{tag}>")
+                break
+        else:
+            if QUOTE_RE.match(line) and depth < MAX_QUOTE_DEPTH:
+                flush_paragraph()
+                quoted = []
+                while index < len(lines) and QUOTE_RE.match(lines[index]):
+                    quoted.append(QUOTE_RE.match(lines[index])[1])
+                    index += 1
+                blocks.append(f"<blockquote>{''.join(render_blocks(quoted, depth + 1))}</blockquote>")
+                continue
+
+            paragraph.append(line.strip())
+            index += 1
+
+    flush_paragraph()
+    return blocks
+
+
+def render_markdown(text):
+    """
+    Renders a Markdown body to safe HTML.
+    Returns HTML.
+    """
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(render_blocks(lines))
+
+
+def get_plain_text(html):
+    """
+    Util function to turn rendered HTML back into whitespace-normalized text.
+    """
+    text = strip_tags(BLOCK_TAG_RE.sub(" ", html))
+    return " ".join(unescape(text).split())
+
+
+def get_body_hash(body):
+    """
+    Util function to hash a body together with the renderer version.
+    Returns the hex digest the rendering of the body is keyed on.
+    """
+    return hashlib.sha256(f"{RENDERER_VERSION}\n{body}".encode()).hexdigest()
+
+
+def render_body(body):
+    """
+    Renders a body into the fields stored alongside the article.
+    Returns a (html, excerpt, reading time in minutes) tuple.
+    """
+    html = render_markdown(body)
+    text = get_plain_text(html)
+    words = len(text.split())
+
+    return html, Truncator(text).chars(EXCERPT_LENGTH), math.ceil(words / WORDS_PER_MINUTE)
@@ -0,0 +1,133 @@
+import difflib
+import json
+import zlib
+
+from django.conf import settings
+
+from .models import ArticleRevision
+
+
+def get_keyframe_interval():
+    """
+    Util function to read how many revisions may separate two keyframes.
+    """
+    return max(getattr(settings, "BLOG_REVISION_KEYFRAME_INTERVAL", 10), 1)
+
+
+def encode_delta(old, new):
+    """
+    Encodes `new` as a line delta against `old`.
+
+    The delta is a list of `[start, end]` line ranges copied from `old` and
+    strings inserted as they are, so unchanged lines cost a few bytes.
+    Returns the compressed delta.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    operations = []
+
+    for tag, old_start, old_end, new_start, new_end in difflib.SequenceMatcher(
+        None, old_lines, new_lines, autojunk=False
+    ).get_opcodes():
+        if tag == "equal":
+            operations.append([old_start, old_end])
+        elif new_start != new_end:
+            operations.append("".join(new_lines[new_start:new_end]))
+
+    return zlib.compress(json.dumps(operations, separators=(",", ":")).encode())
+
+
+def apply_delta(old, data):
+    """
+    Rebuilds a body from the previous one and a delta made by `encode_delta`.
+    Returns the body.
+    """
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+
+    for operation in json.loads(zlib.decompress(data)):
+        if isinstance(operation, list):
+            parts.extend(old_lines[operation[0]:operation[1]])
+        else:
+            parts.append(operation)
+
+    return "".join(parts)
+
+
+def get_chain(article_id, version):
+    """
+    Util function to fetch a revision with the revisions since its keyframe.
+    Returns the revisions ordered by version, or an empty list if `version`
+    has no revision.
+    """
+    depth = (
+        ArticleRevision.objects.filter(article_id=article_id, version=version)
+        .values_list("depth", flat=True)
+        .first()
+    )
+
+    if depth is None:
+        return []
+
+    return list(
+        ArticleRevision.objects.filter(
+            article_id=article_id, version__gte=version - depth, version__lte=version
+        ).order_by("version")
+    )
+
+
+def rebuild_body(chain):
+    """
+    Util function to rebuild the body of the last revision of a chain.
+    Returns the body.
+    """
+    if not chain or not chain[0].is_keyframe or len(chain) != chain[-1].depth + 1:
+        raise ValueError("Revision chain does not start at a keyframe.")
+
+    body = zlib.decompress(chain[0].data).decode()
+
+    for revision in chain[1:]:
+        body = apply_delta(body, revision.data)
+
+    return body
+
+
+def get_revision(article_id, version):
+    """
+    Fetches a revision with its body rebuilt, applying at most the keyframe
+    interval's worth of deltas.
+    Returns the revision, with the body set as `revision.body`, or None.
+    """
+    chain = get_chain(article_id, version)
+
+    if not chain:
+        return None
+
+    revision = chain[-1]
+    revision.body = rebuild_body(chain)
+    return revision
+
+
+def record_revision(article):
+    """
+    Records the current state of an article as the revision of its version.
+
+    The body is stored as a delta against the previous revision, or whole
+    when there is no previous revision or the keyframe interval is reached.
+    Returns the revision.
+    """
+    chain = get_chain(article.pk, article.version - 1)
+    depth = chain[-1].depth + 1 if chain else 0
+
+    if depth >= get_keyframe_interval():
+        depth = 0
+
+    if depth:
+        data = encode_delta(rebuild_body(chain), article.body)
+    else:
+        data = zlib.compress(article.body.encode())
+
+    return ArticleRevision.objects.create(
+        article=article, version=article.version, title=article.title, tags=article.tags,
+        depth=depth, data=data, body_size=len(article.body.encode()),
+    )
@@ -1,5 +1,6 @@
+from django.db.models import QuerySet, Sum
 from rest_framework import serializers
-from .models import Article, Comment, Like, Share
+from .models import Article, ArticleRevision, Comment, Like, Share, AuthorStats, AuthorDailyStats
 
 from account.serializers import UserSerializer
 
@@ -20,6 +21,71 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ['id', 'user', 'comment', 'created_date']
 
+class ValuesListSerializer(serializers.ListSerializer):
+    """
+    List serializer building payloads straight from `.values()` rows.
+
+    Meant for read-only summary listings: instead of instantiating models and
+    calling `to_representation` on every field, the queryset is reduced to
+    the child's `Meta.fields`, with lookups for fields that follow relations
+    given in `Meta.values_lookups`. UUIDs and datetimes are left for the
+    renderer to format, datetimes are only moved to the field's time zone.
+    Anything that is not a queryset takes the regular path.
+    """
+
+    def to_representation(self, data):
+        if not isinstance(data, QuerySet):
+            return super().to_representation(data)
+
+        meta = self.child.Meta
+        names = list(meta.fields)
+        lookups = [meta.values_lookups.get(name, name) for name in names]
+        rows = [dict(zip(names, row)) for row in data.values_list(*lookups)]
+
+        fields = self.child.fields
+        datetimes = [name for name in names if isinstance(fields[name], serializers.DateTimeField)]
+        for row in rows:
+            for name in datetimes:
+                if row[name] is not None:
+                    row[name] = fields[name].enforce_timezone(row[name])
+        return rows
+
+
+class ArticleSummarySerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for article listings without body and comments.
+
+    Listing a queryset annotated with `with_counts()` goes through the
+    `.values()` fast path of `ValuesListSerializer`.
+
+    Fields:
+        id (UUIDField): unique identifier for the article.
+        user (str): the username of the author.
+        title (CharField): the article's title.
+        tags (CharField): the article's tags.
+        featured (BooleanField): marks if an article should be viewed by everyone.
+        published_date (DateTimeField): timestamp when the article was created.
+        updated_date (DateTimeField): timestamp when the article was updated.
+        comments_count, likes_count, shares_count (int): engagement counts.
+        excerpt (str): the start of the body as plain text.
+        reading_time (int): estimated reading time in minutes.
+    """
+    user = serializers.ReadOnlyField(source='user.username')
+    comments_count = serializers.IntegerField(read_only=True)
+    likes_count = serializers.IntegerField(read_only=True)
+    shares_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Article
+        fields = [
+            "id", "user", "title", "tags", "featured", "published_date", "updated_date",
+            "comments_count", "likes_count", "shares_count", "excerpt", "reading_time"
+        ]
+        read_only_fields = fields
+        list_serializer_class = ValuesListSerializer
+        values_lookups = {"user": "user__username"}
+
+
 class ArticleSerializer(serializers.ModelSerializer):
     """
     Serializer for the Article model.
@@ -35,12 +101,20 @@ class ArticleSerializer(serializers.ModelSerializer):
         featured (BooleanField): marks if an article should be viewed by everyone.
         published_date (DateTimeField): timestamp when the article was created.
         updated_date (DateTimeField): timestamp when the article was updated.
+        liked_by_me (bool): whether the requesting user liked the article.
+        shared_by_me (bool): whether the requesting user shared the article.
+        version (int): the article's edit version, sent back in If-Match when updating.
+        body_html (str): the body rendered to safe HTML.
+        excerpt (str): the start of the body as plain text.
+        reading_time (int): estimated reading time in minutes.
 
     """
     comments_count = serializers.SerializerMethodField()
     likes_count = serializers.SerializerMethodField()
     shares_count = serializers.SerializerMethodField()
     comments = serializers.SerializerMethodField(source='comments.comment')
+    liked_by_me = serializers.SerializerMethodField()
+    shared_by_me = serializers.SerializerMethodField()
 
     user = UserSerializer(read_only=True)
     # user = serializers.CharField(read_only=True, source="user.username") to fetch only the username
@@ -48,24 +122,64 @@ class ArticleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Article
         fields = [
-            "id", "user", "title", "tags","body", "featured",'comments_count','likes_count', 'shares_count','comments'
+            "id", "user", "title", "tags","body", "featured",'comments_count','likes_count', 'shares_count','comments',
+            'liked_by_me', 'shared_by_me', 'version', 'body_html', 'excerpt', 'reading_time'
+        ]
+        read_only_fields = [
+            "id", "user", "published_date", "updated_date", "version", "body_html", "excerpt", "reading_time"
         ]
-        read_only_fields = ["id", "user", "published_date", "updated_date"]
+
+    def to_representation(self, instance):
+        # rows not backfilled by `manage.py render_articles` yet are rendered in memory
+        if not instance.body_hash:
+            instance.render_body()
+        return super().to_representation(instance)
+
 
 
+    # the counts come from `with_counts()` annotations when the queryset has them
 
     def get_comments_count(self, obj):
+        if hasattr(obj, 'comments_count'):
+            return obj.comments_count
         return obj.comments.count()
 
     def get_likes_count(self, obj):
+        if hasattr(obj, 'likes_count'):
+            return obj.likes_count
         return obj.likes.count()
 
     def get_shares_count(self, obj):
-        return obj.shares.count()
+        if hasattr(obj, 'shares_count'):
+            return obj.shares_count
+        return obj.shares.count() + (obj.share_rollups.aggregate(total=Sum('count'))['total'] or 0)
     
+    # the flags come from `with_user_state()` annotations when the queryset has them
+
+    def get_liked_by_me(self, obj):
+        if hasattr(obj, 'liked_by_me'):
+            return obj.liked_by_me
+        return self.user_has(obj.likes)
+
+    def get_shared_by_me(self, obj):
+        if hasattr(obj, 'shared_by_me'):
+            return obj.shared_by_me
+        return self.user_has(obj.shares) or self.user_has(obj.share_markers)
+
+    def user_has(self, related):
+        """
+        Checks if the requesting user has a row in `related`, for articles
+        loaded without `with_user_state()`.
+        """
+        request = self.context.get('request')
+
+        if request is None or not request.user.is_authenticated:
+            return False
+        return related.filter(user=request.user).exists()
+
     def get_comments(self, obj):
-        comments_data = Comment.objects.filter(article=obj)
-        comments = CommentSerializer(comments_data, many=True)
+        # uses the comments loaded by `with_related()` when available
+        comments = CommentSerializer(obj.comments.all(), many=True)
         return comments.data
 
 
@@ -114,3 +228,93 @@ class ShareSerializer(serializers.ModelSerializer):
     class Meta:
         model = Share
         fields = ['id', 'article', 'user', 'shared_date']
+
+
+class AuthorDailyStatsSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the AuthorDailyStats model.
+
+    Fields:
+        date (DateField): the day the bucket covers.
+        articles_count (PositiveIntegerField): articles published on that day.
+        comments_count (PositiveIntegerField): comments received on that day.
+        likes_count (PositiveIntegerField): likes received on that day.
+        shares_count (PositiveIntegerField): shares made on that day.
+    """
+    class Meta:
+        model = AuthorDailyStats
+        fields = ['date', 'articles_count', 'comments_count', 'likes_count', 'shares_count']
+
+
+class AuthorStatsSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the AuthorStats model.
+
+    Fields:
+        user (User): the author the totals belong to.
+        articles_count (PositiveIntegerField): number of articles written.
+        comments_count (PositiveIntegerField): comments received on the author's articles.
+        likes_count (PositiveIntegerField): likes received on the author's articles.
+        shares_count (PositiveIntegerField): shares of the author's articles.
+    """
+    user = serializers.ReadOnlyField(source='user.username')
+
+    class Meta:
+        model = AuthorStats
+        fields = ['user', 'articles_count', 'comments_count', 'likes_count', 'shares_count']
+
+
+class ArchiveMonthSerializer(serializers.Serializer):
+    """
+    Serializer for the per-month article counts of the archive.
+
+    Fields:
+        month (str): the month, formatted as YYYY-MM.
+        count (int): number of articles published that month.
+    """
+    month = serializers.DateTimeField(format="%Y-%m")
+    count = serializers.IntegerField()
+
+
+class ArticleBatchSerializer(serializers.Serializer):
+    """
+    Serializer for batch article lookups.
+
+    Fields:
+        ids (list): the UUIDs of the articles to fetch, at most `max_ids`.
+    """
+    max_ids = 100
+
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=max_ids)
+
+
+class ArticleRevisionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the ArticleRevision model, without the body.
+
+    Fields:
+        version (PositiveIntegerField): the article version this revision records.
+        title (CharField): the article's title at that version.
+        tags (CharField): the article's tags at that version.
+        is_keyframe (bool): whether the body is stored whole rather than as a delta.
+        body_size (PositiveIntegerField): size of the body in bytes.
+        created_date (DateTimeField): timestamp when the revision was made.
+    """
+    is_keyframe = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ArticleRevision
+        fields = ['version', 'title', 'tags', 'is_keyframe', 'body_size', 'created_date']
+
+
+class ArticleRevisionDetailSerializer(ArticleRevisionSerializer):
+    """
+    Serializer for a single ArticleRevision, with its rebuilt body.
+
+    Fields:
+        body (str): the article's body at that version.
+    """
+    body = serializers.CharField(read_only=True)
+
+    class Meta(ArticleRevisionSerializer.Meta):
+        fields = ArticleRevisionSerializer.Meta.fields + ['body']
@@ -0,0 +1,146 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_article
+from .models import Article, Comment, Like, Share
+from .revisions import record_revision
+from .stats import record_event, remove_event
+
+
+def get_author_id(article_id):
+    """
+    Util function to fetch the author of an article without loading the row.
+    Returns the author's id or None if the article is gone.
+    """
+    return Article.objects.filter(pk=article_id).values_list("user_id", flat=True).first()
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Counts a newly published article towards its author's stats.
+    """
+    if created and not raw:
+        record_event(instance.user_id, "articles_count", timezone.localdate(instance.published_date))
+
+
+@receiver(post_save, sender=Article)
+def article_revised(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Records a revision when an article is published or edited through
+    `Article.conditional_update`, the only writes that bump its version.
+    """
+    if raw:
+        return
+
+    if created or (update_fields and "version" in update_fields):
+        record_revision(instance)
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    """
+    Removes a deleted article from its author's stats, unless it was
+    soft-deleted first and already removed then.
+    """
+    if instance.deleted_at is None:
+        remove_event(instance.user_id, "articles_count")
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Counts a new comment towards the article author's stats.
+    """
+    if not created or raw:
+        return
+
+    author_id = get_author_id(instance.article_id)
+
+    if author_id:
+        record_event(author_id, "comments_count", timezone.localdate(instance.created_date))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """
+    Removes a deleted comment from the article author's stats.
+    """
+    author_id = get_author_id(instance.article_id)
+
+    if author_id:
+        remove_event(author_id, "comments_count")
+
+
+@receiver(post_save, sender=Like)
+def like_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Counts a new like towards the article author's stats.
+    """
+    if not created or raw:
+        return
+
+    author_id = get_author_id(instance.article_id)
+
+    if author_id:
+        record_event(author_id, "likes_count")
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, **kwargs):
+    """
+    Removes a deleted like from the article author's stats.
+    """
+    author_id = get_author_id(instance.article_id)
+
+    if author_id:
+        remove_event(author_id, "likes_count")
+
+
+@receiver(post_save, sender=Share)
+def share_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Counts a new share towards the article author's stats.
+    """
+    if not created or raw:
+        return
+
+    author_id = get_author_id(instance.article_id)
+
+    if author_id:
+        record_event(author_id, "shares_count", timezone.localdate(instance.shared_date))
+
+
+@receiver(post_delete, sender=Share)
+def share_deleted(sender, instance, **kwargs):
+    """
+    Removes a deleted share from the article author's stats.
+    """
+    author_id = get_author_id(instance.article_id)
+
+    if author_id:
+        remove_event(author_id, "shares_count")
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def article_changed(sender, instance, **kwargs):
+    """
+    Drops the cached payload of a saved or deleted article, soft deletes
+    and `Article.conditional_update` included.
+    """
+    invalidate_article(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+@receiver(post_save, sender=Share)
+@receiver(post_delete, sender=Share)
+def engagement_changed(sender, instance, **kwargs):
+    """
+    Drops the cached payload of an article whose comments or counts changed.
+    """
+    invalidate_article(instance.article_id)
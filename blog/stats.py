@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AuthorStats, AuthorDailyStats
+
+
+def record_event(user_id, field, day=None):
+    """
+    Records a new engagement event for an author.
+
+    Increments the author's running total and the daily bucket for `day`
+    (today when not given) using `F()` expressions, so concurrent writers
+    never overwrite each other.
+    """
+    day = day or timezone.localdate()
+
+    with transaction.atomic():
+        AuthorStats.objects.get_or_create(user_id=user_id)
+        AuthorStats.objects.filter(user_id=user_id).update(
+            updated_date=timezone.now(), **{field: F(field) + 1}
+        )
+
+        AuthorDailyStats.objects.get_or_create(user_id=user_id, date=day)
+        AuthorDailyStats.objects.filter(user_id=user_id, date=day).update(**{field: F(field) + 1})
+
+
+def remove_event(user_id, field, count=1):
+    """
+    Removes `count` engagement events from an author's running total.
+
+    Daily buckets are left untouched since they record activity on the day
+    it happened. Rows are never created here, so removing events for an
+    author that is itself being deleted is a no-op.
+    """
+    if not count:
+        return
+
+    AuthorStats.objects.filter(user_id=user_id, **{f"{field}__gte": count}).update(
+        updated_date=timezone.now(), **{field: F(field) - count}
+    )
@@ -0,0 +1,67 @@
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def stream_json_list(queryset, serializer_class, renderer, context=None, chunk_size=100):
+    """
+    Serializes `queryset` as a JSON array, one chunk of objects at a time.
+
+    Rows are read through a server-side iterator (prefetches run once per
+    chunk), so memory stays bounded by `chunk_size` however long the list is.
+    Yields bytestrings.
+    """
+    yield b"["
+
+    first = True
+    chunk = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) < chunk_size:
+            continue
+
+        yield (b"" if first else b",") + render_chunk(chunk, serializer_class, renderer, context)
+        first = False
+        chunk = []
+
+    if chunk:
+        yield (b"" if first else b",") + render_chunk(chunk, serializer_class, renderer, context)
+
+    yield b"]"
+
+
+def render_chunk(chunk, serializer_class, renderer, context):
+    """
+    Util function to render a chunk of objects without the enclosing brackets.
+    Returns a bytestring.
+    """
+    data = serializer_class(chunk, many=True, context=context).data
+    return renderer.render(data)[1:-1]
+
+
+class StreamingListMixin:
+    """
+    Mixin for APIViews returning potentially long lists of objects.
+
+    JSON responses are streamed in chunks of `stream_chunk_size` objects;
+    other formats (e.g. the browsable API) are rendered as usual.
+    """
+
+    stream_chunk_size = 100
+
+    def list_response(self, request, queryset, serializer_class):
+        """
+        Util function to build the response for a list of objects.
+        Returns a streaming response for JSON, a regular Response otherwise.
+        """
+        context = {"request": request, "view": self}
+        renderer = request.accepted_renderer
+
+        if getattr(renderer, "format", None) != "json":
+            serializer = serializer_class(queryset, many=True, context=context)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        content = stream_json_list(
+            queryset, serializer_class, renderer, context=context, chunk_size=self.stream_chunk_size
+        )
+        return StreamingHttpResponse(content, content_type=renderer.media_type, status=status.HTTP_200_OK)
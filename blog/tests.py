@@ -1,3 +1,1133 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from simplepersonalblogapi import renderers
+from simplepersonalblogapi.renderers import FastJSONRenderer
+
+from .cache import USER_STATE_FIELDS, get_cached_article, get_stamp_key, invalidate_article
+from .compaction import compact_shares
+from .fingerprints import get_fingerprint, prune_fingerprints, record_fingerprint
+from .models import (Article, ArticleRevision, AuthorDailyStats, AuthorStats, Comment, CommentFingerprint, Like,
+                     Share, ShareMarker)
+from .purge import purge_article, purge_deleted_articles, purger, soft_delete_article
+from .rendering import EXCERPT_LENGTH, render_body, render_markdown
+from .revisions import apply_delta, encode_delta, get_chain, get_revision, rebuild_body
+from .serializers import ArticleSerializer, ArticleSummarySerializer
+from .streaming import stream_json_list
+from .views import ArticleListAPIView
+
+User = get_user_model()
+
+
+def get_stats():
+    """
+    Util function to snapshot both author stats tables.
+    """
+    totals = set(AuthorStats.objects.values_list(
+        "user_id", "articles_count", "comments_count", "likes_count", "shares_count"
+    ))
+    daily = set(AuthorDailyStats.objects.values_list(
+        "user_id", "date", "articles_count", "comments_count", "likes_count", "shares_count"
+    ))
+    return totals, daily
+
+
+class RebuildAuthorStatsTests(TestCase):
+    """
+    Tests for the `rebuild_author_stats` command.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+        self.reader = User.objects.create_user(username="reader", password=None)
+
+        for title in ("First", "Second"):
+            article = Article.objects.create(user=self.author, title=title, tags="#test", body="Body.")
+            Comment.objects.create(article=article, user=self.reader, comment="Nice.")
+            Like.objects.create(article=article, user=self.reader)
+            Share.objects.create(article=article, user=self.reader)
+
+    def test_rebuild_is_noop_on_consistent_data(self):
+        before = get_stats()
+
+        call_command("rebuild_author_stats", stdout=StringIO())
+
+        self.assertEqual(get_stats(), before)
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(
+            (stats.articles_count, stats.comments_count, stats.likes_count, stats.shares_count), (2, 2, 2, 2)
+        )
+
+    def test_rebuild_keeps_daily_likes(self):
+        AuthorStats.objects.filter(user=self.author).update(likes_count=7, comments_count=0)
+
+        call_command("rebuild_author_stats", stdout=StringIO())
+
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual((stats.likes_count, stats.comments_count), (2, 2))
+        self.assertEqual(sum(AuthorDailyStats.objects.values_list("likes_count", flat=True)), 2)
+
+    @override_settings(BLOG_PURGE_IN_BACKGROUND=False)
+    def test_rebuild_leaves_out_soft_deleted_articles(self):
+        """
+        Totals only: daily buckets keep the activity of deleted rows on the
+        day it happened, which a rebuild cannot recount.
+        """
+        article = Article.objects.get(title="First")
+
+        def get_totals():
+            return AuthorStats.objects.values_list(
+                "articles_count", "comments_count", "likes_count", "shares_count"
+            ).get(user=self.author)
+
+        soft_delete_article(article)
+        self.assertEqual(get_totals(), (1, 1, 1, 1))
+
+        call_command("rebuild_author_stats", stdout=StringIO())
+        self.assertEqual(get_totals(), (1, 1, 1, 1))
+
+        purge_article(article.pk)
+        call_command("rebuild_author_stats", stdout=StringIO())
+        self.assertEqual(get_totals(), (1, 1, 1, 1))
+
+
+class ArticleDateFilterTests(APITestCase):
+    """
+    Tests for the date query parameters of the featured articles list.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password=None)
+        self.client.force_authenticate(self.user)
+        Article.objects.create(user=self.user, title="Featured", tags="#test", body="Body.", featured=True)
+
+    def get(self, **params):
+        return self.client.get("/api/blog/featured-articles/", params)
+
+    def get_articles(self, **params):
+        response = self.get(**params)
+
+        if not response.streaming:
+            # no featured articles matched
+            return []
+
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_valid_dates(self):
+        today = timezone.localdate()
+
+        self.assertEqual(len(self.get_articles(published_date=today.isoformat())), 1)
+        self.assertEqual(len(self.get_articles(month=today.strftime("%Y-%m"))), 1)
+        self.assertEqual(len(self.get_articles(published_before=today.isoformat())), 0)
+
+    def test_invalid_dates_are_rejected(self):
+        for param, value in [
+            ("published_date", "2024-02-30"),
+            ("month", "2024-13"),
+            ("month", "9999-12"),
+            ("published_date", "9999-12-31"),
+            ("published_before", "9999-12-31"),
+            ("published_after", "9999-12-31"),
+        ]:
+            with self.subTest(param=param, value=value):
+                response = self.get(**{param: value})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(param, response.json())
+
+    def test_last_supported_month(self):
+        response = self.get(month="9998-12", published_before="9998-12-31")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(BLOG_PURGE_IN_BACKGROUND=False)
+class SoftDeleteTests(APITestCase):
+    """
+    Tests for soft-deleting articles and purging them.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+        self.reader = User.objects.create_user(username="reader", password=None)
+        self.article = Article.objects.create(
+            user=self.author, title="Deleted", tags="#test", body="Body.", featured=True
+        )
+        self.kept = Article.objects.create(user=self.author, title="Kept", tags="#test", body="Body.")
+
+        comment = Comment.objects.create(article=self.article, user=self.reader, comment="Nice.")
+        record_fingerprint(comment, get_fingerprint(comment.comment))
+        Like.objects.create(article=self.article, user=self.reader)
+        Share.objects.create(article=self.article, user=self.reader)
+        Comment.objects.create(article=self.kept, user=self.reader, comment="Kept.")
+
+    def delete_article(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.delete(f"/api/blog/article/{self.article.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_soft_deleted_article_is_hidden(self):
+        self.delete_article()
+
+        self.assertEqual(self.client.get(f"/api/blog/article/{self.article.pk}/").status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Article.objects.filter(pk=self.article.pk).exists())
+        self.assertIsNotNone(Article.all_objects.get(pk=self.article.pk).deleted_at)
+        # rows are only removed by the purge
+        self.assertEqual(Comment.objects.filter(article=self.article).count(), 1)
+
+    def test_soft_delete_adjusts_stats(self):
+        self.delete_article()
+
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(
+            (stats.articles_count, stats.comments_count, stats.likes_count, stats.shares_count), (1, 1, 0, 0)
+        )
+
+    def test_purge_removes_rows_without_touching_stats(self):
+        self.delete_article()
+        before = get_stats()
+
+        deleted = purge_article(self.article.pk, batch_size=1)
+
+        # comment and its fingerprint, like, share, revision, article
+        self.assertEqual(deleted, 1 + len(get_fingerprint("Nice.")) + 1 + 1 + 1 + 1)
+        self.assertFalse(Article.all_objects.filter(pk=self.article.pk).exists())
+        for model in (Comment, CommentFingerprint, Like, Share, ArticleRevision):
+            self.assertFalse(model.objects.filter(article_id=self.article.pk).exists(), model.__name__)
+        self.assertEqual(get_stats(), before)
+        self.assertTrue(Comment.objects.filter(article=self.kept).exists())
+
+    def test_purge_skips_live_articles(self):
+        self.assertEqual(purge_deleted_articles(), (0, 0))
+        self.assertEqual(purge_article(self.kept.pk), 0)
+        self.assertTrue(Article.objects.filter(pk=self.kept.pk).exists())
+
+
+class BackgroundPurgeTests(TransactionTestCase):
+    """
+    Tests for the background purger.
+    """
+
+    def test_purges_queued_articles_in_one_thread(self):
+        author = User.objects.create_user(username="author", password=None)
+        articles = [Article.objects.create(user=author, title=f"{i}", tags="#test", body="Body.") for i in range(3)]
+
+        # queued on commit, once the main thread is done writing
+        with transaction.atomic():
+            for article in articles:
+                Comment.objects.create(article=article, user=author, comment="Nice.")
+                soft_delete_article(article)
+
+        purger.queue.join()
+
+        self.assertFalse(Article.all_objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual([thread.name for thread in threading.enumerate()].count("purge"), 1)
+
+
+class ShareCompactionTests(APITestCase):
+    """
+    Tests for compacting shares into daily rollups.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+        self.sharer = User.objects.create_user(username="sharer", password=None)
+        self.reader = User.objects.create_user(username="reader", password=None)
+        self.article = Article.objects.create(
+            user=self.author, title="Shared", tags="#test", body="Body.", featured=True
+        )
+
+        for _ in range(2):
+            Share.objects.create(article=self.article, user=self.sharer)
+        Share.objects.filter(article=self.article).update(shared_date=timezone.now() - timedelta(days=10))
+        # a recent share, kept raw
+        Share.objects.create(article=self.article, user=self.author)
+
+    def get_article(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(f"/api/blog/article/{self.article.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_compaction_keeps_count_and_flag(self):
+        self.assertEqual(compact_shares(retention_days=5), (1, 2))
+        self.assertEqual(Share.objects.count(), 1)
+
+        for user, shared in ((self.sharer, True), (self.author, True), (self.reader, False)):
+            with self.subTest(user=user.username):
+                article = self.get_article(user)
+                self.assertEqual(article["shares_count"], 3)
+                self.assertEqual(article["shared_by_me"], shared)
+
+    def test_compaction_is_repeatable(self):
+        compact_shares(retention_days=5)
+        Share.objects.create(article=self.article, user=self.sharer)
+        Share.objects.filter(user=self.sharer).update(shared_date=timezone.now() - timedelta(days=9))
+
+        compact_shares(retention_days=5)
+
+        self.assertEqual(self.get_article(self.sharer)["shares_count"], 4)
+        self.assertEqual(ShareMarker.objects.filter(article=self.article).count(), 1)
+
+    def test_compaction_keeps_author_stats(self):
+        before = get_stats()
+
+        compact_shares(retention_days=5)
+
+        self.assertEqual(get_stats(), before)
+        self.assertEqual(AuthorStats.objects.get(user=self.author).shares_count, 3)
+
+
+class ArticleConcurrencyTests(APITestCase):
+    """
+    Tests for the ETag and If-Match handling of the article detail endpoint.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+        self.reader = User.objects.create_user(username="reader", password=None)
+        self.article = Article.objects.create(user=self.author, title="Title", tags="#test", body="Body.")
+        self.url = f"/api/blog/article/{self.article.pk}/"
+        self.client.force_authenticate(self.author)
+
+    def get_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response["ETag"]
+
+    def test_etag_is_stable(self):
+        # the second GET is served from the article cache
+        self.assertEqual(self.get_etag(), self.get_etag())
+
+    def test_etag_changes_with_engagement(self):
+        etag = self.get_etag()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(article=self.article, user=self.reader)
+
+        self.assertNotEqual(self.get_etag(), etag)
+        # the version did not change, so updates based on the old tag still apply
+        response = self.client.patch(self.url, {"title": "Liked"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_differs_per_user_flags(self):
+        etag = self.get_etag()
+        Like.objects.create(article=self.article, user=self.author)
+        self.client.force_authenticate(self.reader)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(article=self.article, user=self.reader)
+            Like.objects.filter(user=self.author).delete()
+
+        self.assertNotEqual(self.get_etag(), etag)
+
+    def test_stale_if_match_fails(self):
+        etag = self.get_etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {"title": "Edited"})
+
+        for method in ("put", "patch"):
+            with self.subTest(method=method):
+                response = getattr(self.client, method)(
+                    self.url, {"title": "Stale", "tags": "#test", "body": "Body."}, HTTP_IF_MATCH=etag
+                )
+                self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+                self.assertEqual(response["ETag"], self.get_etag())
+
+        self.assertEqual(Article.objects.get(pk=self.article.pk).title, "Edited")
+
+    def test_weak_and_wildcard_if_match(self):
+        etag = self.get_etag()
+
+        response = self.client.patch(self.url, {"title": "Weak"}, HTTP_IF_MATCH=f"W/{etag}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["version"], 2)
+
+        response = self.client.patch(self.url, {"title": "Any"}, HTTP_IF_MATCH="*")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_concurrent_updates(self):
+        """
+        Two clients read version 1, the second write loses instead of
+        overwriting the first.
+        """
+        etag = self.get_etag()
+
+        first = self.client.patch(self.url, {"title": "First"}, HTTP_IF_MATCH=etag)
+        second = self.client.put(
+            self.url, {"title": "Second", "tags": "#test", "body": "Other."}, HTTP_IF_MATCH=etag
+        )
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual((article.title, article.body, article.version), ("First", "Body.", 2))
+
+    def test_conditional_update_race(self):
+        """
+        A write landing between an update's read and its UPDATE makes the
+        conditional update fail, without the If-Match header too.
+        """
+        reader = Article.objects.get(pk=self.article.pk)
+        writer = Article.objects.get(pk=self.article.pk)
+
+        writer.title = "Writer"
+        self.assertTrue(writer.conditional_update(writer.version, ["title"]))
+
+        reader.title = "Reader"
+        self.assertFalse(reader.conditional_update(reader.version, ["title"]))
+        self.assertEqual(Article.objects.get(pk=self.article.pk).title, "Writer")
+
+
+class DuplicateCommentTests(APITestCase):
+    """
+    Tests for the rejection of near-duplicate comments.
+    """
+
+    text = (
+        "I tried this approach on our own blog last month and the page load times dropped noticeably, "
+        "although the first deploy took a while because the cache had to be rebuilt from scratch."
+    )
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+        self.reader = User.objects.create_user(username="reader", password=None)
+        self.article = Article.objects.create(user=self.author, title="Title", tags="#test", body="Body.")
+        self.other_article = Article.objects.create(user=self.author, title="Other", tags="#test", body="Body.")
+        self.client.force_authenticate(self.reader)
+
+    def post(self, comment, article=None):
+        return self.client.post(
+            f"/api/blog/articles/{(article or self.article).pk}/comment/", {"comment": comment}, format="json"
+        )
+
+    def test_fingerprint_thresholds(self):
+        keys = set(get_fingerprint(self.text))
+
+        # case, punctuation and one changed word: most shingles are shared.
+        # Partial overlaps only match some of the time, so are not tested.
+        self.assertTrue(keys & set(get_fingerprint(self.text.upper().replace(",", "").replace("noticeably", "a lot"))))
+        self.assertFalse(keys & set(get_fingerprint("A completely different remark about the layout of the post.")))
+
+    def test_near_duplicate_rejected(self):
+        self.assertEqual(self.post(self.text).status_code, status.HTTP_201_CREATED)
+
+        response = self.post(self.text.replace("month", "week").upper())
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_short_comments(self):
+        self.assertEqual(self.post("Nice.").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.post("nice!").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post("Great post.").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.post("Nice post.").status_code, status.HTTP_201_CREATED)
+
+    def test_other_user_and_article(self):
+        self.assertEqual(self.post(self.text).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.post(self.text, self.other_article).status_code, status.HTTP_201_CREATED)
+
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.post(self.text).status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(Comment.objects.count(), 3)
+
+    @override_settings(BLOG_COMMENT_DUPLICATE_WINDOW=60)
+    def test_window(self):
+        self.assertEqual(self.post(self.text).status_code, status.HTTP_201_CREATED)
+        CommentFingerprint.objects.update(created_date=timezone.now() - timedelta(seconds=61))
+
+        self.assertEqual(self.post(self.text).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(prune_fingerprints(), len(set(get_fingerprint(self.text))))
+        self.assertEqual(CommentFingerprint.objects.count(), len(set(get_fingerprint(self.text))))
+
+    def test_missing_article(self):
+        self.article.delete()
+
+        self.assertEqual(self.post(self.text).status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(BLOG_REVISION_KEYFRAME_INTERVAL=3)
+class RevisionTests(TestCase):
+    """
+    Tests for the delta-encoded article revisions.
+    """
+
+    bodies = [
+        "",
+        "First line\nSecond line\n",
+        "First line\nSecond line\nThird line",
+        "",
+        "Third line\nFirst line\r\nSecond line\n\n",
+        "Unicode \u2028 separator\x0band a form feed\x0c\u00e9t\u00e9\n",
+        "First line\nSecond line\n",
+        "First line\nSecond line\n",
+    ]
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+
+    def test_delta_roundtrip(self):
+        for old in self.bodies:
+            for new in self.bodies:
+                with self.subTest(old=old, new=new):
+                    self.assertEqual(apply_delta(old, encode_delta(old, new)), new)
+
+    def test_keyframes(self):
+        article = Article.objects.create(user=self.author, title="Title", tags="#test", body=self.bodies[0])
+
+        for body in self.bodies[1:]:
+            article.body = body
+            self.assertTrue(article.conditional_update(article.version, ["body"]))
+
+        revisions = list(ArticleRevision.objects.filter(article=article).order_by("version"))
+        self.assertEqual([revision.depth for revision in revisions], [0, 1, 2, 0, 1, 2, 0, 1])
+        self.assertEqual([revision.body_size for revision in revisions], [len(body.encode()) for body in self.bodies])
+
+        for version, body in enumerate(self.bodies, start=1):
+            with self.subTest(version=version):
+                chain = get_chain(article.pk, version)
+                self.assertLessEqual(len(chain), 3)
+                self.assertTrue(chain[0].is_keyframe)
+                self.assertEqual(get_revision(article.pk, version).body, body)
+
+        self.assertIsNone(get_revision(article.pk, len(self.bodies) + 1))
+
+    def test_broken_chain(self):
+        article = Article.objects.create(user=self.author, title="Title", tags="#test", body="One\n")
+        article.body = "Two\n"
+        article.conditional_update(article.version, ["body"])
+
+        chain = get_chain(article.pk, 2)
+        self.assertEqual(rebuild_body(chain), "Two\n")
+
+        for broken in ([], chain[1:], chain[:1] + chain):
+            with self.assertRaises(ValueError):
+                rebuild_body(broken)
+
+
+class RevisionAPITests(APITestCase):
+    """
+    Tests for the revision endpoints.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+        self.reader = User.objects.create_user(username="reader", password=None)
+        self.article = Article.objects.create(user=self.author, title="Title", tags="#test", body="Body.")
+        self.article.body = "Edited."
+        self.article.conditional_update(self.article.version, ["body"])
+        self.url = f"/api/blog/article/{self.article.pk}/revisions/"
+
+    def test_owner(self):
+        self.client.force_authenticate(self.author)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([revision["version"] for revision in response.json()], [2, 1])
+        self.assertNotIn("body", response.json()[0])
+
+        response = self.client.get(f"{self.url}1/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["body"], "Body.")
+
+        self.assertEqual(self.client.get(f"{self.url}3/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_users(self):
+        for user, code in ((self.reader, status.HTTP_403_FORBIDDEN), (None, status.HTTP_401_UNAUTHORIZED)):
+            self.client.force_authenticate(user)
+            for url in (self.url, f"{self.url}1/", f"{self.url}3/"):
+                with self.subTest(user=user, url=url):
+                    self.assertEqual(self.client.get(url).status_code, code)
+
+
+class ArticleCacheTests(APITestCase):
+    """
+    Tests for the shared cache of article detail payloads.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        settings = override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "articles": {
+                "BACKEND": "simplepersonalblogapi.cache.MmapCache",
+                "LOCATION": f"{directory.name}/articles.mmap",
+                "OPTIONS": {"SLOTS": 64, "SLOT_SIZE": 16384},
+            },
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.author = User.objects.create_user(username="author", password=None)
+        self.reader = User.objects.create_user(username="reader", password=None)
+        self.article = Article.objects.create(user=self.author, title="Title", tags="#test", body="Body.")
+        self.url = f"/api/blog/article/{self.article.pk}/"
+
+    def get(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_served_from_cache(self):
+        self.get(self.author)
+        # bypasses the model's invalidation
+        Article.objects.filter(pk=self.article.pk).update(title="Changed")
+
+        self.assertEqual(self.get(self.author)["title"], "Title")
+
+    def test_invalidated_on_commit(self):
+        self.get(self.author)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            invalidate_article(self.article.pk)
+        self.assertIsNotNone(caches["articles"].get(get_stamp_key(self.article.pk)))
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(caches["articles"].get(get_stamp_key(self.article.pk)))
+        self.assertIsNone(get_cached_article(self.article.pk)[1])
+
+    def test_writes_invalidate(self):
+        self.get(self.author)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(article=self.article, user=self.reader, comment="Nice.")
+        self.assertEqual(self.get(self.author)["comments_count"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {"title": "Edited"})
+        self.assertEqual(self.get(self.author)["title"], "Edited")
+
+    def test_user_flags_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(article=self.article, user=self.reader)
+            Share.objects.create(article=self.article, user=self.reader)
+
+        self.assertEqual([self.get(self.reader)[name] for name in USER_STATE_FIELDS], [True, True])
+
+        payload = get_cached_article(self.article.pk)[1]
+        self.assertIsNotNone(payload)
+        self.assertFalse(set(USER_STATE_FIELDS) & set(payload))
+
+        self.assertEqual([self.get(self.author)[name] for name in USER_STATE_FIELDS], [False, False])
+        self.assertEqual([self.get(self.reader)[name] for name in USER_STATE_FIELDS], [True, True])
+        self.assertEqual(self.get(self.author)["likes_count"], 1)
+
+
+class RenderingTests(TestCase):
+    """
+    Tests for the rendering of article bodies to safe HTML.
+    """
+
+    def test_raw_html_is_escaped(self):
+        self.assertEqual(
+            render_markdown('<script>alert("x")</script> & <b onclick=y>'),
+            "<p>&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; &lt;b onclick=y&gt;</p>",
+        )
+        self.assertEqual(render_markdown("```\n<img src=x>\n```"), "<pre><code>&lt;img src=x&gt;</code></pre>")
+
+    def test_unsafe_link_schemes(self):
+        for url in (
+            "javascript:void", "JavaScript:void", "data:text/html,hi", "vbscript:x",
+            "&#106;avascript:void", "jav&#x09;ascript:void", "javascript&#58;void", "&#x6A;avascript&colon;void",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(render_markdown(f"[label]({url})"), "<p>label</p>")
+
+    def test_safe_links(self):
+        for url, href in (
+            ("https://example.com/a_b_c", "https://example.com/a_b_c"),
+            ("mailto:me@example.com", "mailto:me@example.com"),
+            ("/articles/?page=2", "/articles/?page=2"),
+            ("/path:with/colon", "/path:with/colon"),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    render_markdown(f"[*label*]({url})"),
+                    f'<p><a href="{href}" rel="nofollow noopener"><em>label</em></a></p>',
+                )
+
+    def test_href_quoting(self):
+        self.assertEqual(
+            render_markdown('[x](/a"onmouseover="alert&#40;1&#41;&b=<c>)'),
+            '<p><a href="/a&quot;onmouseover=&quot;alert(1)&amp;b=&lt;c&gt;" rel="nofollow noopener">x</a></p>',
+        )
+
+    def test_code_spans(self):
+        self.assertEqual(render_markdown("`**not bold** <b>`"), "<p><code>**not bold** &lt;b&gt;</code></p>")
+        self.assertEqual(
+            render_markdown("[`a_b_`](/x_y_z_) and `[no](/link)`"),
+            '<p><a href="/x_y_z_" rel="nofollow noopener"><code>a_b_</code></a> and <code>[no](/link)</code></p>',
+        )
+        # placeholder markers typed by the author are dropped, not expanded
+        self.assertEqual(render_markdown("`a` \x000\x00"), "<p><code>a</code> 0</p>")
+
+    def test_blocks(self):
+        self.assertEqual(
+            render_markdown("# Title #\n\n- one\n- two\n\n1. first\n\n> quote\n\n---\ntext"),
+            "<h1>Title</h1>\n<ul><li>one</li><li>two</li></ul>\n<ol><li>first</li></ol>\n"
+            "<blockquote><p>quote</p></blockquote>\n<hr>\n<p>text</p>",
+        )
+
+    def test_excerpt_and_reading_time(self):
+        html, excerpt, reading_time = render_body("# Title\n\n" + "word " * 450 + "&amp; <b>")
+
+        self.assertTrue(excerpt.startswith("Title word word"))
+        self.assertLessEqual(len(excerpt), EXCERPT_LENGTH)
+        self.assertTrue(excerpt.endswith("…"))
+        self.assertEqual(reading_time, 3)
+        self.assertTrue(html.endswith("word &amp;amp; &lt;b&gt;</p>"))
+
+        self.assertEqual(render_body(""), ("", "", 0))
+        self.assertEqual(render_body("Short & sweet.")[1:], ("Short & sweet.", 1))
+
+
+class ArticleRenderingTests(TestCase):
+    """
+    Tests for the rendered fields stored with articles.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+        self.article = Article.objects.create(user=self.author, title="Title", tags="#test", body="**Body**")
+
+    def test_rendered_on_create(self):
+        article = Article.objects.get(pk=self.article.pk)
+
+        self.assertEqual(
+            (article.body_html, article.excerpt, article.reading_time), ("<p><strong>Body</strong></p>", "Body", 1)
+        )
+
+    def test_unchanged_body_is_not_rendered_again(self):
+        article = Article.objects.get(pk=self.article.pk)
+
+        with mock.patch("blog.models.render_body") as render:
+            article.title = "New title"
+            article.save(update_fields=["title"])
+            self.assertTrue(article.conditional_update(article.version, ["title"]))
+
+        render.assert_not_called()
+
+    def test_update_fields_include_rendered_fields(self):
+        saved = []
+
+        def receiver(sender, update_fields=None, **kwargs):
+            saved.append(set(update_fields or ()))
+
+        post_save.connect(receiver, sender=Article)
+        self.addCleanup(post_save.disconnect, receiver, sender=Article)
+
+        self.article.body = "*Saved*"
+        self.article.save(update_fields=["body"])
+        self.article.body = "*Updated*"
+        self.assertTrue(self.article.conditional_update(self.article.version, ["body"]))
+
+        self.assertTrue(set(Article.RENDERED_FIELDS) <= saved[0])
+        self.assertTrue({"body", "version", *Article.RENDERED_FIELDS} <= saved[1])
+        self.assertEqual(Article.objects.get(pk=self.article.pk).body_html, "<p><em>Updated</em></p>")
+
+    def test_backfill_renders_stale_rows_only(self):
+        other = Article.objects.create(user=self.author, title="Other", tags="#test", body="Other.")
+        deleted = Article.objects.create(user=self.author, title="Deleted", tags="#test", body="Gone.")
+        Article.all_objects.filter(pk=deleted.pk).update(deleted_at=timezone.now())
+        Article.all_objects.filter(pk__in=[self.article.pk, deleted.pk]).update(body_html="", excerpt="", body_hash="")
+        before = Article.all_objects.get(pk=other.pk)
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("render_articles", "--batch-size", "2", stdout=out)
+
+        self.assertIn("Rendered 2 of 3 articles.", out.getvalue())
+        self.assertEqual(Article.objects.get(pk=self.article.pk).body_html, "<p><strong>Body</strong></p>")
+        self.assertEqual(Article.all_objects.get(pk=deleted.pk).excerpt, "Gone.")
+
+        after = Article.all_objects.get(pk=other.pk)
+        self.assertEqual((after.updated_date, after.version), (before.updated_date, before.version))
+
+        out = StringIO()
+        call_command("render_articles", stdout=out)
+        self.assertIn("Rendered 0 of 3 articles.", out.getvalue())
+
+
+class StreamingListTests(APITestCase):
+    """
+    Tests for the chunked streaming of article lists.
+    """
+
+    url = "/api/blog/featured-articles/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password=None)
+        for index in range(5):
+            article = Article.objects.create(
+                user=self.user, title=f"Title {index}", tags="#test", body=f"Body {index}.", featured=True
+            )
+            Comment.objects.create(article=article, user=self.user, comment="Nice.")
+        self.client.force_authenticate(self.user)
+
+    def test_chunk_boundaries(self):
+        articles = Article.objects.with_related().with_counts().with_user_state(self.user).order_by("pk")
+        expected = json.loads(JSONRenderer().render(ArticleSerializer(articles, many=True).data))
+
+        for chunk_size in (1, 4, 5, 6):
+            with self.subTest(chunk_size=chunk_size):
+                chunks = list(stream_json_list(articles, ArticleSerializer, JSONRenderer(), chunk_size=chunk_size))
+                # brackets around one chunk per `chunk_size` objects
+                self.assertEqual(len(chunks), 2 + -(-5 // chunk_size))
+                self.assertEqual(json.loads(b"".join(chunks)), expected)
+
+        self.assertEqual(b"".join(stream_json_list(Article.objects.none(), ArticleSerializer, JSONRenderer())), b"[]")
+
+    def test_streamed_json(self):
+        with mock.patch.object(ArticleListAPIView, "stream_chunk_size", 2):
+            response = self.client.get(self.url)
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/json")
+        body = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(body), 5)
+        self.assertEqual({article["title"] for article in body}, {f"Title {index}" for index in range(5)})
+
+    def test_other_renderers(self):
+        response = self.client.get(self.url, HTTP_ACCEPT="text/html")
+
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+        self.assertContains(response, "Title 4")
+
+
+class ArticleBatchTests(APITestCase):
+    """
+    Tests for fetching many articles by ID.
+    """
+
+    url = "/api/blog/articles/batch/"
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+        self.reader = User.objects.create_user(username="reader", password=None)
+        self.featured = [
+            Article.objects.create(user=self.author, title=f"Featured {index}", tags="#test", body="Body.")
+            for index in range(3)
+        ]
+        self.draft = Article.objects.create(
+            user=self.author, title="Draft", tags="#test", body="Body.", featured=False
+        )
+        self.own = Article.objects.create(user=self.reader, title="Own", tags="#test", body="Body.", featured=False)
+        self.client.force_authenticate(self.reader)
+
+    def post(self, ids):
+        return self.client.post(self.url, {"ids": [str(pk) for pk in ids]}, format="json")
+
+    def test_request_order_and_duplicates(self):
+        first, second, third = self.featured
+        response = self.post([third.pk, self.own.pk, first.pk, third.pk, second.pk])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [article["title"] for article in response.json()["articles"]],
+            ["Featured 2", "Own", "Featured 0", "Featured 1"],
+        )
+        self.assertEqual(response.json()["missing"], [])
+
+    def test_missing(self):
+        unknown = uuid.uuid4()
+        deleted = Article.objects.create(user=self.reader, title="Deleted", tags="#test", body="Body.")
+        Article.all_objects.filter(pk=deleted.pk).update(deleted_at=timezone.now())
+
+        response = self.post([unknown, self.featured[0].pk, self.draft.pk, deleted.pk, unknown])
+
+        self.assertEqual([article["title"] for article in response.json()["articles"]], ["Featured 0"])
+        # other users' drafts look like IDs that do not exist
+        self.assertEqual(response.json()["missing"], [str(unknown), str(self.draft.pk), str(deleted.pk)])
+
+        self.client.force_authenticate(self.author)
+        response = self.post([self.draft.pk, self.own.pk])
+        self.assertEqual([article["title"] for article in response.json()["articles"]], ["Draft"])
+        self.assertEqual(response.json()["missing"], [str(self.own.pk)])
+
+    def test_limits(self):
+        self.assertEqual(self.post([]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post([uuid.uuid4() for _ in range(101)]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post([uuid.uuid4() for _ in range(100)]).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.client.post(self.url, {"ids": ["not-a-uuid"]}, format="json").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.post([self.own.pk]).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_constant_query_count(self):
+        def count_queries(articles):
+            ids = [article.pk for article in articles]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(ids)
+            self.assertEqual(len(response.json()["articles"]), len(articles))
+            return len(queries)
+
+        few = count_queries(self.featured[:1])
+
+        for index in range(20):
+            article = Article.objects.create(user=self.author, title=f"More {index}", tags="#test", body="Body.")
+            Comment.objects.create(article=article, user=self.reader, comment=f"Comment {index}.")
+            Like.objects.create(article=article, user=self.reader)
+
+        self.assertEqual(count_queries(Article.objects.filter(featured=True)), few)
+
+
+class UserStateTests(APITestCase):
+    """
+    Tests for the requesting user's like and share flags on articles.
+    """
+
+    url = "/api/blog/featured-articles/"
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password=None)
+        self.bob = User.objects.create_user(username="bob", password=None)
+        self.liked, self.shared, self.compacted = [
+            Article.objects.create(user=self.alice, title=title, tags="#test", body="Body.")
+            for title in ("Liked", "Shared", "Compacted")
+        ]
+        Like.objects.create(article=self.liked, user=self.alice)
+        Share.objects.create(article=self.shared, user=self.alice)
+        # compacted shares only leave a marker behind
+        ShareMarker.objects.create(article=self.compacted, user=self.alice)
+        Like.objects.create(article=self.shared, user=self.bob)
+
+    def get_flags(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(self.url)
+        articles = json.loads(b"".join(response.streaming_content))
+        response.close()
+        return {article["title"]: (article["liked_by_me"], article["shared_by_me"]) for article in articles}
+
+    def test_list_flags(self):
+        self.assertEqual(self.get_flags(self.alice), {
+            "Liked": (True, False), "Shared": (False, True), "Compacted": (False, True),
+        })
+        self.assertEqual(self.get_flags(self.bob), {
+            "Liked": (False, False), "Shared": (True, False), "Compacted": (False, False),
+        })
+
+    def test_detail_flags(self):
+        url = f"/api/blog/article/{self.shared.pk}/"
+
+        # the second round is served from the shared article cache
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                for user, flags in ((self.alice, (False, True)), (self.bob, (True, False))):
+                    self.client.force_authenticate(user)
+                    data = self.client.get(url).json()
+                    self.assertEqual((data["liked_by_me"], data["shared_by_me"]), flags)
+
+    def test_anonymous_flags(self):
+        articles = Article.objects.with_user_state(AnonymousUser())
+        self.assertEqual(set(articles.values_list("liked_by_me", "shared_by_me")), {(False, False)})
+
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        data = ArticleSerializer(self.shared, context={"request": request}).data
+        self.assertEqual((data["liked_by_me"], data["shared_by_me"]), (False, False))
+
+    def test_flags_without_annotations(self):
+        request = RequestFactory().get("/")
+        request.user = self.alice
+
+        for article, flags in ((self.liked, (True, False)), (self.compacted, (False, True))):
+            data = ArticleSerializer(Article.objects.get(pk=article.pk), context={"request": request}).data
+            self.assertEqual((data["liked_by_me"], data["shared_by_me"]), flags)
+
+    def test_no_query_per_article(self):
+        self.client.force_authenticate(self.alice)
+
+        def fetch():
+            response = self.client.get(self.url)
+            articles = json.loads(b"".join(response.streaming_content))
+            response.close()
+            return articles
+
+        # emptiness check, articles with their flags, their comments
+        with self.assertNumQueries(3):
+            self.assertEqual(len(fetch()), 3)
+
+        for index in range(10):
+            article = Article.objects.create(user=self.bob, title=f"More {index}", tags="#test", body="Body.")
+            Like.objects.create(article=article, user=self.alice)
+            Share.objects.create(article=article, user=self.alice)
+
+        with self.assertNumQueries(3):
+            articles = fetch()
+        self.assertEqual(len(articles), 13)
+        self.assertTrue(all(article["liked_by_me"] for article in articles if article["title"].startswith("More")))
+
+
+class ArticleSummarySerializerTests(TestCase):
+    """
+    Tests for the `.values()` path of the summary listing.
+    """
+
+    def setUp(self):
+        user = User.objects.create_user(username="author", password=None)
+        first = Article.objects.create(user=user, title="First \u2028", tags="#test", body="Some *body*.")
+        Article.objects.create(user=user, title="Second", tags="#test", body="Body.", featured=False)
+        Comment.objects.create(article=first, user=user, comment="Nice.")
+        Like.objects.create(article=first, user=user)
+        # whole seconds render differently from fractional ones
+        Article.objects.filter(pk=first.pk).update(published_date=timezone.now().replace(microsecond=0))
+
+    def test_values_path_matches_model_path(self):
+        articles = Article.objects.with_counts().order_by("title")
+
+        for orjson in (renderers.orjson, None):
+            for zone in ("UTC", "Europe/Paris"):
+                with (self.subTest(orjson=orjson is not None, zone=zone),
+                      mock.patch.object(renderers, "orjson", orjson), timezone.override(zone)):
+                    values = FastJSONRenderer().render(ArticleSummarySerializer(articles, many=True).data)
+                    models = FastJSONRenderer().render(ArticleSummarySerializer(list(articles), many=True).data)
+                    self.assertEqual(values, models)
+
+        self.assertEqual(
+            [(article["title"], article["comments_count"]) for article in json.loads(values)],
+            [("First \u2028", 1), ("Second", 0)],
+        )
+
+
+class AuthorStatsSignalTests(TestCase):
+    """
+    Tests for the incremental author stats kept by the signal handlers.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+        self.reader = User.objects.create_user(username="reader", password=None)
+
+    def get_totals(self):
+        return AuthorStats.objects.filter(user=self.author).values_list(
+            "articles_count", "comments_count", "likes_count", "shares_count"
+        ).get()
+
+    def get_daily(self):
+        return list(AuthorDailyStats.objects.filter(user=self.author).order_by("date").values_list(
+            "date", "articles_count", "comments_count", "likes_count", "shares_count"
+        ))
+
+    def test_create_and_delete(self):
+        article = Article.objects.create(user=self.author, title="Title", tags="#test", body="Body.")
+        self.assertEqual(self.get_totals(), (1, 0, 0, 0))
+
+        comment = Comment.objects.create(article=article, user=self.reader, comment="Nice.")
+        self.assertEqual(self.get_totals(), (1, 1, 0, 0))
+        like = Like.objects.create(article=article, user=self.reader)
+        self.assertEqual(self.get_totals(), (1, 1, 1, 0))
+        share = Share.objects.create(article=article, user=self.reader)
+        self.assertEqual(self.get_totals(), (1, 1, 1, 1))
+
+        comment.delete()
+        self.assertEqual(self.get_totals(), (1, 0, 1, 1))
+        like.delete()
+        self.assertEqual(self.get_totals(), (1, 0, 0, 1))
+        share.delete()
+        self.assertEqual(self.get_totals(), (1, 0, 0, 0))
+        article.delete()
+        self.assertEqual(self.get_totals(), (0, 0, 0, 0))
+
+        # daily buckets keep the activity of the day
+        self.assertEqual(self.get_daily(), [(timezone.localdate(), 1, 1, 1, 1)])
+        # the reader's own activity is not counted for them
+        self.assertFalse(AuthorStats.objects.filter(user=self.reader).exists())
+
+    def test_cascading_delete(self):
+        article = Article.objects.create(user=self.author, title="Title", tags="#test", body="Body.")
+        Comment.objects.create(article=article, user=self.reader, comment="Nice.")
+        Like.objects.create(article=article, user=self.reader)
+        Share.objects.create(article=article, user=self.reader)
+
+        article.delete()
+
+        self.assertEqual(self.get_totals(), (0, 0, 0, 0))
+
+    def test_daily_buckets(self):
+        today = timezone.now()
+        yesterday = today - timedelta(days=1)
+
+        with mock.patch("django.utils.timezone.now", return_value=yesterday):
+            article = Article.objects.create(user=self.author, title="Title", tags="#test", body="Body.")
+            Comment.objects.create(article=article, user=self.reader, comment="Nice.")
+        Comment.objects.create(article=article, user=self.reader, comment="Still nice.")
+        Share.objects.create(article=article, user=self.reader)
+        Like.objects.create(article=article, user=self.reader)
+
+        self.assertEqual(self.get_daily(), [
+            (timezone.localdate(yesterday), 1, 1, 0, 0),
+            (timezone.localdate(today), 0, 1, 1, 1),
+        ])
+        self.assertEqual(self.get_totals(), (1, 2, 1, 1))
+
+
+class AuthorStatsAPITests(APITestCase):
+    """
+    Tests for the author stats endpoint.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password=None)
+        self.client.force_authenticate(self.author)
+
+    def get(self, username="author", **params):
+        return self.client.get(f"/api/blog/authors/{username}/stats/", params)
+
+    def test_days(self):
+        today = timezone.localdate()
+        for age in (0, 1, 29, 30, 364, 365):
+            AuthorDailyStats.objects.create(user=self.author, date=today - timedelta(days=age), likes_count=age)
+        AuthorStats.objects.create(user=self.author, likes_count=5)
+
+        # `days` counts today, so 30 days reach back 29 days
+        for days, count in ((None, 3), (1, 1), (2, 2), (0, 1), (-3, 1), (365, 5), (1000, 5), ("many", 3)):
+            with self.subTest(days=days):
+                response = self.get(**({} if days is None else {"days": days}))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(response.json()["daily"]), count)
+
+        self.assertEqual(response.json()["likes_count"], 5)
+        self.assertEqual(response.json()["daily"][-1], {
+            "date": today.isoformat(), "articles_count": 0, "comments_count": 0, "likes_count": 0, "shares_count": 0,
+        })
+
+    def test_author_without_stats(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            "user": "author", "articles_count": 0, "comments_count": 0, "likes_count": 0, "shares_count": 0,
+            "daily": [],
+        })
+        self.assertFalse(AuthorStats.objects.exists())
+
+    def test_unknown_author(self):
+        self.assertEqual(self.get("nobody").status_code, status.HTTP_404_NOT_FOUND)
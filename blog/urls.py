@@ -1,13 +1,23 @@
 from django.urls import path
-from .views import (ArticleListCreateAPIView, ArticleDetailAPIView, ArticleListAPIView,
-                    CommentCreateView, LikeArticleView, ShareArticleView)
+from .views import (ArticleListCreateAPIView, ArticleDetailAPIView, ArticleListAPIView, ArticleSummaryListAPIView,
+                    ArticleArchiveAPIView, ArticleBatchAPIView, ArticleRevisionListAPIView, ArticleRevisionDetailAPIView,
+                    CommentCreateView, LikeArticleView, ShareArticleView, AuthorStatsAPIView)
 
 urlpatterns = [
     path("featured-articles/", ArticleListAPIView.as_view(), name="featured-articles"),
+    path("featured-articles/summary/", ArticleSummaryListAPIView.as_view(), name="featured-articles-summary"),
+    path("featured-articles/archive/", ArticleArchiveAPIView.as_view(), name="featured-articles-archive"),
     path("articles/", ArticleListCreateAPIView.as_view(), name="list-create-articles"),
+    path("articles/batch/", ArticleBatchAPIView.as_view(), name="articles-batch"),
     path("article/<uuid:pk>/", ArticleDetailAPIView.as_view(), name="article-detail"),
+    path("article/<uuid:pk>/revisions/", ArticleRevisionListAPIView.as_view(), name="article-revisions"),
+    path(
+        "article/<uuid:pk>/revisions/<int:version>/", ArticleRevisionDetailAPIView.as_view(),
+        name="article-revision-detail"
+    ),
     path('articles/<uuid:pk>/comment/', CommentCreateView.as_view(), name='article-comment'),
     path('articles/<uuid:pk>/like/', LikeArticleView.as_view(), name='article-like'),
     path('articles/<uuid:pk>/share/', ShareArticleView.as_view(), name='article-share'),
+    path('authors/<str:username>/stats/', AuthorStatsAPIView.as_view(), name='author-stats'),
 ]
 
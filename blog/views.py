@@ -1,19 +1,43 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.utils import timezone
+from django.utils.http import parse_etags
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema
 
-from .models import Article, Comment, Like, Share
-from .serializers import ArticleSerializer, CommentSerializer, LikeSerializer, ShareSerializer
+from .models import Article, Comment, Like, Share, AuthorStats, AuthorDailyStats
+from .serializers import (ArticleSerializer, CommentSerializer, LikeSerializer, ShareSerializer,
+                          AuthorStatsSerializer, AuthorDailyStatsSerializer, ArticleSummarySerializer,
+                          ArchiveMonthSerializer, ArticleBatchSerializer, ArticleRevisionSerializer,
+                          ArticleRevisionDetailSerializer)
+from .cache import USER_STATE_FIELDS, cache_article, get_cached_article
+from .filters import article_filters
+from .fingerprints import get_fingerprint, is_duplicate_comment, record_fingerprint
 from .permissions import IsOwner
+from .purge import soft_delete_article
+from .revisions import get_revision
+from .streaming import StreamingListMixin
 
-class ArticleListAPIView(APIView):
+User = get_user_model()
+
+
+class ArticleListAPIView(StreamingListMixin, APIView):
     """
     Handles retrieving a list of all articles that are featured.
-    Supports query parameters 'tags' and published_date.
+    Supports query parameters 'tags', 'published_date', 'published_after',
+    'published_before' and 'month'.
+    JSON responses are streamed in chunks.
 
     Users must be authenticated.
 
@@ -23,6 +47,19 @@ class ArticleListAPIView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        """
+        Builds the queryset of featured articles matching the query parameters.
+        """
+        conditions = article_filters(self.request.query_params)
+
+        return (
+            Article.objects.filter(*conditions, featured=True)
+            .with_related()
+            .with_counts()
+            .with_user_state(self.request.user)
+        )
+
     @extend_schema(
             description="Retrieves a list of all featured articles."
     )
@@ -30,22 +67,7 @@ class ArticleListAPIView(APIView):
         """
         Retrieves all the articles that are featured.
         """
-        tags = request.query_params.get('tags', None)
-        published_date = request.query_params.get('published_date', None)
-
-        # Start with all featured articles
-        articles = Article.objects.filter(featured=True)
-
-        # Filter by tags if provided
-        if tags:
-            articles = articles.filter(tags__icontains=tags)
-
-        # Filter by published_date if provided
-        if published_date:
-            articles = articles.filter(published_date__date=published_date)
-
-        if tags and published_date:
-            articles = articles.filter(Q(published_date__date=published_date)|Q(tags__icontains=tags))
+        articles = self.get_queryset()
 
         if not articles.exists():
             response = {
@@ -53,14 +75,86 @@ class ArticleListAPIView(APIView):
             }
 
             return Response(response, status=status.HTTP_200_OK)
-        
-        serializer = ArticleSerializer(articles, many=True)
+
+        return self.list_response(request, articles, ArticleSerializer)
+
+class ArticleSummaryListAPIView(APIView):
+    """
+    Handles retrieving a lightweight listing of all featured articles.
+    The listing leaves out the body and comments and is built from
+    `.values()` rows instead of model instances.
+
+    Users must be authenticated.
+
+    Methods:
+        get: fetches a summary of all featured articles.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Builds the queryset of featured article summaries.
+        """
+        return Article.objects.filter(featured=True).with_counts()
+
+    @extend_schema(
+            description="Retrieves a summary of all featured articles.",
+            responses=ArticleSummarySerializer(many=True)
+    )
+    def get(self, request):
+        """
+        Retrieves the summaries of all featured articles.
+        """
+        articles = self.get_queryset()
+
+        serializer = ArticleSummarySerializer(articles, many=True)
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class ArticleArchiveAPIView(APIView):
+    """
+    Handles retrieving the number of featured articles published per month.
+    Supports the same query parameters as the featured articles listing.
+
+    Users must be authenticated.
+
+    Methods:
+        get: fetches the monthly article counts.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Builds the grouped queryset counting featured articles per month.
+        """
+        conditions = article_filters(self.request.query_params)
+
+        return (
+            Article.objects.filter(*conditions, featured=True)
+            .annotate(month=TruncMonth('published_date'))
+            .order_by('-month')
+            .values('month')
+            .annotate(count=Count('pk'))
+        )
+
+    @extend_schema(
+            description="Retrieves the number of featured articles published per month.",
+            responses=ArchiveMonthSerializer(many=True)
+    )
+    def get(self, request):
+        """
+        Retrieves the featured article counts per month, newest first.
+        """
+        serializer = ArchiveMonthSerializer(self.get_queryset(), many=True)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class ArticleListCreateAPIView(APIView):
+class ArticleListCreateAPIView(StreamingListMixin, APIView):
     """
     Handles retrieving a list of articles and creating new articles.
+    JSON listings are streamed in chunks.
 
     Users must be authenticated.
 
@@ -71,12 +165,22 @@ class ArticleListCreateAPIView(APIView):
 
     permission_classes = [IsAuthenticated, IsOwner]
 
+    def get_queryset(self):
+        """
+        Builds the queryset of the authenticated user's articles.
+        """
+        return (
+            Article.objects.filter(user=self.request.user)
+            .with_related()
+            .with_counts()
+            .with_user_state(self.request.user)
+        )
 
     def get(self, request):
         """
         Retrieves all the articles for the authenticated user.
         """
-        articles = Article.objects.filter(user=request.user)
+        articles = self.get_queryset()
 
         if not articles.exists():
             response = {
@@ -84,10 +188,8 @@ class ArticleListCreateAPIView(APIView):
             }
 
             return Response(response, status=status.HTTP_200_OK)
-        
-        serializer = ArticleSerializer(articles, many=True)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.list_response(request, articles, ArticleSerializer)
 
     def post(self, request):
         """
@@ -102,67 +204,205 @@ class ArticleListCreateAPIView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class ArticleBatchAPIView(APIView):
+    """
+    Handles fetching many articles by their IDs in a single request.
+
+    Only featured articles and the user's own articles are returned, the
+    rest are reported as missing like IDs that do not exist.
+
+    Users must be authenticated.
+
+    Methods:
+        post: fetches the articles with the given IDs.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+            description="Retrieves up to 100 articles by ID, in request order.",
+            request=ArticleBatchSerializer
+    )
+    def post(self, request):
+        """
+        Retrieves the requested articles in one query, preserving the order
+        of the IDs and listing those that were not found.
+        """
+        serializer = ArticleBatchSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # drops duplicates, keeping the first occurrence
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+
+        articles = (
+            Article.objects.filter(Q(featured=True) | Q(user=request.user), id__in=ids)
+            .with_related()
+            .with_counts()
+            .with_user_state(request.user)
+        )
+        found = {article.pk: article for article in articles}
+
+        serializer = ArticleSerializer(
+            [found[pk] for pk in ids if pk in found], many=True, context={"request": request}
+        )
+        response = {
+            "articles": serializer.data,
+            "missing": [pk for pk in ids if pk not in found],
+        }
+
+        return Response(response, status=status.HTTP_200_OK)
+
 class ArticleDetailAPIView(APIView):
     """
     Handles retrieving, updating and deleting of a single article.
 
+    Detail payloads are kept in the shared article cache, invalidated on
+    any write to the article or its comments, likes and shares.
+
+    Updates use optimistic concurrency: GET returns an ETag made of the
+    article's version and a hash of the payload, and PUT/PATCH only write
+    if the article is still at the version sent in If-Match (or the one
+    just read, without the header), answering 412 otherwise.
+
     Users must be authenticated.
 
     Methods:
         get: fetches an article by its iD.
         put: updates an existing article.
+        patch: updates some fields of an existing article.
         delete: deletes an article.
     """
 
     permission_classes = [IsAuthenticated, IsOwner]
 
-    def get_object(self, pk):
+    def get_detail(self, request, pk):
         """
-        Util function to fetch an article.
+        Util function to fetch an article with its counts and the user's state.
         Returns an article
         """
-        try:
-            article = Article.objects.get(pk=pk)
-        except Article.DoesNotExist:
-            response = {
-                "message": "Article not found."
-            }
-            return Response(response, status=status.HTTP_404_NOT_FOUND)
-        
-        return article
+        articles = Article.objects.with_related().with_counts().with_user_state(request.user)
+        return get_object_or_404(articles, pk=pk)
 
-    def get(self, request, pk):
+    def get_etag(self, data):
         """
-        Retrieves an article by its ID.
+        Util function to build the ETag of an article payload: its version,
+        which If-Match is checked against, and a hash of the whole payload,
+        as counts, comments and the user's flags change without a new version.
         """
-        article = self.get_object(pk=pk)
+        digest = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+        return f'"{data["version"]}-{digest[:16]}"'
+
+    def get_expected_version(self, request, article):
+        """
+        Util function to read the version an update applies to from If-Match.
+        Only the version part of the tags is compared, so engagement since
+        the client's GET does not fail its update; ETags weakened by the
+        compression middleware are accepted.
+        Returns the version, the current one without the header, or None if
+        no tag matches.
+        """
+        header = request.META.get("HTTP_IF_MATCH")
 
-        serializer = ArticleSerializer(article)
+        if header is None:
+            return article.version
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        versions = {tag.removeprefix("W/").strip('"').partition("-")[0] for tag in parse_etags(header)}
+
+        if "*" in versions or str(article.version) in versions:
+            return article.version
+
+        return None
+
+    def precondition_failed(self, request, pk):
+        article = self.get_detail(request, pk)
+        data = ArticleSerializer(article, context={"request": request}).data
+        response = {
+            "message": "Article was modified since you fetched it. Fetch it again and retry."
+        }
+        return Response(
+            response, status=status.HTTP_412_PRECONDITION_FAILED, headers={"ETag": self.get_etag(data)}
+        )
+
+    def get(self, request, pk):
+        """
+        Retrieves an article by its ID.
+        The payload is served from the shared article cache when possible,
+        only the requesting user's flags are queried then.
+        """
+        stamp, payload = get_cached_article(pk)
+
+        if payload is None:
+            article = self.get_detail(request, pk)
+            data = ArticleSerializer(article, context={"request": request}).data
+            cache_article(pk, stamp, data)
+        else:
+            state = (
+                Article.objects.filter(pk=pk).with_user_state(request.user)
+                .values_list(*USER_STATE_FIELDS).first()
+            )
+            if state is None:
+                raise Http404
+            data = {**payload, **dict(zip(USER_STATE_FIELDS, state))}
+
+        return Response(data, status=status.HTTP_200_OK, headers={"ETag": self.get_etag(data)})
     
     def put(self, request, pk):
         """
         Updates an existing article.
         Returns an updated article or error.
         """
-        article = self.get_object(pk=pk)
+        return self.update(request, pk, partial=False)
 
-        serializer = ArticleSerializer(data=request.data, instance=article)
+    def patch(self, request, pk):
+        """
+        Updates the given fields of an existing article.
+        Returns an updated article or error.
+        """
+        return self.update(request, pk, partial=True)
 
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    def update(self, request, pk, partial):
+        """
+        Util function to validate an update and write the changed fields with
+        a single conditional UPDATE.
+        Returns an updated article or error.
+        """
+        article = get_object_or_404(Article, pk=pk)
+        self.check_object_permissions(request, article)
+
+        version = self.get_expected_version(request, article)
+
+        if version is None:
+            return self.precondition_failed(request, pk)
+
+        serializer = ArticleSerializer(data=request.data, instance=article, partial=partial)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        changed = [name for name, value in serializer.validated_data.items() if getattr(article, name) != value]
+
+        for name in changed:
+            setattr(article, name, serializer.validated_data[name])
+
+        if changed and not article.conditional_update(version, changed):
+            return self.precondition_failed(request, pk)
+
+        article = self.get_detail(request, pk)
+        data = ArticleSerializer(article, context={"request": request}).data
+
+        return Response(data, status=status.HTTP_200_OK, headers={"ETag": self.get_etag(data)})
     
     def delete(self, request, pk):
         """
         Deletes an existing article.
+        The article is soft-deleted and its rows are purged in the background.
         """
-        article = self.get_object(pk=pk)
+        article = get_object_or_404(Article, pk=pk)
+        self.check_object_permissions(request, article)
 
-        article.delete()
+        soft_delete_article(article)
 
         response = {
                 "message": "Article deleted successfully."
@@ -171,20 +411,82 @@ class ArticleDetailAPIView(APIView):
     
 
 
+class ArticleRevisionListAPIView(APIView):
+    """
+    Handles listing the revisions of an article, newest first.
+
+    Users must be authenticated and own the article.
+
+    Methods:
+        get: fetches the revisions of an article, without their bodies.
+    """
+
+    permission_classes = [IsAuthenticated, IsOwner]
+
+    def get(self, request, pk):
+        """
+        Retrieves the revisions of an article.
+        """
+        article = get_object_or_404(Article, pk=pk)
+        self.check_object_permissions(request, article)
+
+        revisions = article.revisions.defer("data")
+        serializer = ArticleRevisionSerializer(revisions, many=True)
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class ArticleRevisionDetailAPIView(APIView):
+    """
+    Handles retrieving a single revision of an article.
+    The body is rebuilt from the closest keyframe, applying at most
+    `BLOG_REVISION_KEYFRAME_INTERVAL` deltas.
+
+    Users must be authenticated and own the article.
+
+    Methods:
+        get: fetches an article as it was at a version.
+    """
+
+    permission_classes = [IsAuthenticated, IsOwner]
+
+    def get(self, request, pk, version):
+        """
+        Retrieves a revision of an article by its version.
+        """
+        article = get_object_or_404(Article, pk=pk)
+        self.check_object_permissions(request, article)
+
+        revision = get_revision(article.pk, version)
+
+        if revision is None:
+            response = {
+                "message": "Revision not found."
+            }
+            return Response(response, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = ArticleRevisionDetailSerializer(revision)
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 class CommentCreateView(APIView):
     """
     Handles adding a comment to an article.
+    Near-duplicates of the user's recent comments on the article are
+    rejected, see `blog.fingerprints`.
     - POST: Creates a new comment.
     """
 
     permission_classes = [IsAuthenticated]
 
-    def get_object(self, pk):
+    def get_object(self, pk, lock=False):
         """
-        Util function to fetch an article.
+        Util function to fetch an article, locking its row if `lock`.
         Returns an article
         """
-        article = get_object_or_404(Article, id=pk)
+        articles = Article.objects.select_for_update() if lock else Article.objects
+        article = get_object_or_404(articles, id=pk)
         
         return article
 
@@ -192,14 +494,30 @@ class CommentCreateView(APIView):
         """
         Creates a new comment for an article.
         """
-        article = self.get_object(pk=pk)
-
         serializer = CommentSerializer(data=request.data)
 
-        if serializer.is_valid():
-            serializer.save(user=request.user, article=article)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # the duplicate check and the insert share a transaction, and the
+        # article's row is locked, so identical comments posted in parallel
+        # are checked one after the other
+        with transaction.atomic():
+            article = self.get_object(pk=pk, lock=True)
+
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            # rejects floods before they reach the comments table
+            keys = get_fingerprint(serializer.validated_data["comment"])
+
+            if is_duplicate_comment(article, request.user, keys):
+                response = {
+                    "message": "You already posted a similar comment on this article."
+                }
+                return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+            comment = serializer.save(user=request.user, article=article)
+            record_fingerprint(comment, keys)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 class LikeArticleView(APIView):
@@ -269,3 +587,51 @@ class ShareArticleView(APIView):
                 "message": "Article shared successfully."
             }
         return Response(response, status=status.HTTP_201_CREATED)
+
+
+class AuthorStatsAPIView(APIView):
+    """
+    Handles retrieving the dashboard statistics of an author.
+    Supports the query parameter 'days' for the length of the daily series.
+
+    Users must be authenticated.
+
+    Methods:
+        get: fetches the author's totals and daily buckets.
+    """
+    permission_classes = [IsAuthenticated]
+
+    default_days = 30
+    max_days = 365
+
+    def get_days(self, request):
+        """
+        Util function to read the number of days of daily buckets requested.
+        Returns the number of days, clamped to `max_days`.
+        """
+        try:
+            days = int(request.query_params.get('days', self.default_days))
+        except ValueError:
+            days = self.default_days
+
+        return max(1, min(days, self.max_days))
+
+    def get(self, request, username):
+        """
+        Retrieves the precomputed statistics of an author.
+        """
+        author = get_object_or_404(User.objects.select_related('author_stats'), username=username)
+
+        try:
+            stats = author.author_stats
+        except AuthorStats.DoesNotExist:
+            # authors without any activity yet have no stats row
+            stats = AuthorStats(user=author)
+
+        since = timezone.localdate() - timedelta(days=self.get_days(request) - 1)
+        daily = AuthorDailyStats.objects.filter(user=author, date__gte=since)
+
+        response = AuthorStatsSerializer(stats).data
+        response['daily'] = AuthorDailyStatsSerializer(daily, many=True).data
+
+        return Response(response, status=status.HTTP_200_OK)
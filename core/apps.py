@@ -0,0 +1,16 @@
+import os
+
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core"
+
+    def ready(self):
+        # warms worker processes up front; wsgi.py/asgi.py opt in, management
+        # commands (migrate, shell, ...) start without the extra work
+        if os.environ.get("DJANGO_WARMUP") == "1":
+            from .warmup import warm_up
+
+            warm_up()
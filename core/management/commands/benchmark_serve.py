@@ -0,0 +1,237 @@
+import http.client
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+
+def parse_config(value):
+    """
+    Util function to parse a `WORKERSxTHREADS[:nopreload]` configuration.
+    Returns (workers, threads, preload).
+    """
+    sizes, _, flag = value.partition(":")
+    workers, _, threads = sizes.partition("x")
+
+    if flag not in ("", "nopreload"):
+        raise ValueError(value)
+
+    return int(workers), int(threads or 1), flag != "nopreload"
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_children(pid):
+    """
+    Util function to list the child processes of `pid`, from /proc.
+    """
+    children = []
+
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # the command name may contain spaces, ppid follows its closing parenthesis
+            fields = stat.read_text().rpartition(")")[2].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+
+    return children
+
+
+def get_memory(pids):
+    """
+    Util function to sum the resident (RSS) and proportional (PSS) memory of
+    processes, in MiB. Pages shared copy-on-write count fully in every RSS
+    but are split between the processes sharing them in PSS.
+    Returns (rss, pss), or (None, None) without /proc.
+    """
+    totals = {"Rss:": 0, "Pss:": 0}
+
+    for pid in pids:
+        try:
+            lines = Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()
+        except OSError:
+            return None, None
+        for line in lines:
+            name, *values = line.split()
+            if name in totals:
+                totals[name] += int(values[0])
+
+    return totals["Rss:"] / 1024, totals["Pss:"] / 1024
+
+
+class Command(BaseCommand):
+    """
+    Compares `manage.py serve` configurations under the same load.
+
+    Each configuration is started on a free port and requested by
+    `--concurrency` client threads until `--requests` responses are in,
+    after a warm-up round. Reports throughput, latency percentiles, the
+    time until the server answered, and the memory of all its processes.
+    Client and server share the machine, so results are relative.
+    """
+
+    help = "Benchmarks serve with several workers x threads configurations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--config", action="append", dest="configs",
+            help="WORKERSxTHREADS, with :nopreload to load in each worker (repeatable).",
+        )
+        parser.add_argument("--requests", type=int, default=2000, help="Measured requests per configuration.")
+        parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client connections.")
+        parser.add_argument("--path", action="append", dest="paths", help="Path to request (repeatable).")
+        parser.add_argument("--user", help="Authenticate requests with an access token of this user.")
+
+    def get_configs(self, options):
+        cores = os.cpu_count() or 1
+        values = options["configs"] or [
+            f"{cores}x1", f"{cores}x4", f"{cores * 2}x2", f"1x{cores * 4}", f"{cores}x4:nopreload",
+        ]
+
+        try:
+            return list(dict.fromkeys(parse_config(value) for value in values))
+        except ValueError:
+            raise CommandError("Configurations look like 2x4 or 2x4:nopreload.")
+
+    def start_server(self, port, workers, threads, preload):
+        """
+        Util function to start the server and wait until it answers.
+        Returns (process, seconds it took).
+        """
+        command = [
+            sys.executable, str(Path(settings.BASE_DIR) / "manage.py"), "serve",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+            "--max-requests", "0",
+        ]
+        if not preload:
+            command.append("--no-preload")
+
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL)
+
+        while time.perf_counter() - start < 120:
+            if process.poll() is not None:
+                raise CommandError(f"serve exited with {process.returncode}.")
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                connection.request("GET", "/api/schema/")
+                connection.getresponse().read()
+                connection.close()
+                return process, time.perf_counter() - start
+            except OSError:
+                time.sleep(0.05)
+
+        process.kill()
+        raise CommandError("serve did not answer within 120s.")
+
+    def run_load(self, port, paths, headers, total, concurrency):
+        """
+        Util function to request the paths round-robin from `concurrency`
+        threads until `total` requests are done.
+        Returns (seconds, latencies, errors).
+        """
+        latencies, errors = [], []
+        lock = threading.Lock()
+        counter = iter(range(total))
+
+        def client():
+            while True:
+                with lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+
+                start = time.perf_counter()
+                try:
+                    # a connection per request, serve does not keep connections alive
+                    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                    connection.request("GET", paths[index % len(paths)], headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    connection.close()
+                    ok = response.status < 500
+                except OSError:
+                    ok = False
+                elapsed = time.perf_counter() - start
+
+                with lock:
+                    (latencies if ok else errors).append(elapsed)
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return time.perf_counter() - start, latencies, errors
+
+    def handle(self, *args, **options):
+        if not hasattr(os, "fork"):
+            raise CommandError("serve requires os.fork(), which is not available on this platform.")
+
+        paths = options["paths"] or ["/api/schema/"]
+        headers = {"Accept-Encoding": "gzip"}
+
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']}.")
+            headers["Authorization"] = f"Bearer {AccessToken.for_user(user)}"
+            if not options["paths"]:
+                paths.append("/api/blog/featured-articles/")
+
+        self.stdout.write(
+            f"{options['requests']} requests per configuration, {options['concurrency']} clients, "
+            f"paths: {', '.join(paths)}"
+        )
+        self.stdout.write(
+            f"{'config':<16} {'ready s':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}"
+            f" {'RSS MiB':>8} {'PSS MiB':>8}"
+        )
+
+        for workers, threads, preload in self.get_configs(options):
+            port = get_free_port()
+            process, ready = self.start_server(port, workers, threads, preload)
+
+            try:
+                self.run_load(port, paths, headers, min(200, options["requests"]), options["concurrency"])
+                seconds, latencies, errors = self.run_load(
+                    port, paths, headers, options["requests"], options["concurrency"]
+                )
+                rss, pss = get_memory([process.pid, *get_children(process.pid)])
+            finally:
+                process.send_signal(signal.SIGTERM)
+                try:
+                    process.wait(30)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+            latencies.sort()
+            label = f"{workers}x{threads}{'' if preload else ' nopreload'}"
+            p50 = statistics.median(latencies) * 1000 if latencies else 0
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0
+            memory = f"{rss:>8.1f} {pss:>8.1f}" if rss is not None else f"{'-':>8} {'-':>8}"
+
+            self.stdout.write(
+                f"{label:<16} {ready:>8.2f} {len(latencies) / seconds:>8.1f} {p50:>8.1f} {p99:>8.1f}"
+                f" {len(errors):>7} {memory}"
+            )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.schema import build_schema, get_artifact_path, get_code_version, prune_artifacts
+
+
+class Command(BaseCommand):
+    """
+    Builds the OpenAPI schema artifact of the current code version.
+
+    Meant to run at build/deploy time, so workers load the schema from disk
+    instead of generating it. Artifacts of other code versions are removed
+    unless `--keep-old` is given.
+    """
+
+    help = "Writes the OpenAPI schema of the current code version to SCHEMA_CACHE_DIR."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-old", action="store_true", help="Keep artifacts of other code versions.")
+
+    def handle(self, *args, **options):
+        version = get_code_version()
+        path = get_artifact_path(version)
+
+        if not path:
+            raise CommandError("SCHEMA_CACHE_DIR is not set.")
+
+        build_schema(version)
+        removed = 0 if options["keep_old"] else prune_artifacts(version)
+
+        self.stdout.write(self.style.SUCCESS(f"Built schema {version} at {path}, removed {removed} old artifacts."))
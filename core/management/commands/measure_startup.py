@@ -0,0 +1,88 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# runs in a fresh interpreter, so every lazily initialized piece is cold
+WORKER_SCRIPT = """
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+
+start = time.perf_counter()
+from simplepersonalblogapi.wsgi import application
+result = {"import": time.perf_counter() - start, "requests": []}
+
+for path in sys.argv[1:]:
+    timings, statuses = [], []
+
+    for attempt in range(2):
+        environ = {"PATH_INFO": path}
+        setup_testing_defaults(environ)
+
+        start = time.perf_counter()
+        response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        b"".join(response)
+        response.close()
+        timings.append(time.perf_counter() - start)
+
+    result["requests"].append({"path": path, "status": statuses[0], "first": timings[0], "second": timings[1]})
+
+print(json.dumps(result))
+"""
+
+
+class Command(BaseCommand):
+    """
+    Measures the cold-start cost of a WSGI worker with and without warm-up.
+
+    Each run starts a fresh interpreter that imports the WSGI application,
+    then requests every path twice: the first request pays for whatever was
+    left to initialize lazily, the second shows the steady state.
+    """
+
+    help = "Reports WSGI import time and first-request latency, with and without warm-up."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=3, help="Fresh processes started per mode.")
+        parser.add_argument(
+            "--path", action="append", dest="paths",
+            help="Path to request (repeatable). Defaults to the schema and the featured articles.",
+        )
+
+    def run_worker(self, warmup, paths):
+        """
+        Util function to start a fresh worker process and time it.
+        Returns the timings it reported.
+        """
+        env = {**os.environ, "DJANGO_WARMUP": "1" if warmup else "0"}
+        process = subprocess.run(
+            [sys.executable, "-c", WORKER_SCRIPT, *paths],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+
+        if process.returncode:
+            raise CommandError(f"Worker process failed:\n{process.stderr}")
+
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or ["/api/schema/", "/api/blog/featured-articles/"]
+
+        for warmup in (False, True):
+            runs = [self.run_worker(warmup, paths) for _ in range(options["runs"])]
+
+            self.stdout.write(self.style.MIGRATE_HEADING("with warm-up" if warmup else "without warm-up"))
+            self.stdout.write(f"  import: {statistics.median(run['import'] for run in runs) * 1000:.1f}ms")
+
+            for index, path in enumerate(paths):
+                requests = [run["requests"][index] for run in runs]
+                first = statistics.median(request["first"] for request in requests) * 1000
+                second = statistics.median(request["second"] for request in requests) * 1000
+
+                self.stdout.write(
+                    f"  {path} [{requests[0]['status']}]: first request {first:.1f}ms, second {second:.1f}ms"
+                )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.queries import SORT_KEYS, get_dump_dir, get_report, read_dumps, remove_dumps
+
+
+class Command(BaseCommand):
+    """
+    Prints the top query shapes across every worker on the host.
+
+    Reads the stats workers dump to QUERY_STATS_DIR (every
+    QUERY_STATS_DUMP_INTERVAL seconds), so the report may lag live traffic
+    by up to that interval, and the stats exited workers folded together.
+    """
+
+    help = "Reports the query shapes taking the most database time, by view."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20, help="Number of shapes to print.")
+        parser.add_argument("--sort", choices=list(SORT_KEYS), default="total", help="Rank shapes by this.")
+        parser.add_argument("--view", help="Only report shapes of this view class.")
+        parser.add_argument("--reset", action="store_true", help="Delete the dumped stats instead.")
+
+    def handle(self, *args, **options):
+        if get_dump_dir() is None:
+            raise CommandError("QUERY_STATS_DIR is not set.")
+
+        if options["reset"]:
+            self.stdout.write(self.style.SUCCESS(f"Removed {remove_dumps()} dump files."))
+            return
+
+        dumps, retired = read_dumps()
+        workers = len(dumps)
+        retired_workers = 0
+        if retired:
+            dumps.append(retired)
+            retired_workers = retired["workers"]
+
+        shapes = get_report((dump["shapes"] for dump in dumps), options["top"], options["sort"], options["view"])
+
+        if not shapes:
+            self.stdout.write("No queries recorded.")
+            return
+
+        self.stdout.write(
+            f"{workers} workers running, {retired_workers} exited, "
+            f"{sum(dump.get('evicted', 0) for dump in dumps)} shapes evicted\n"
+        )
+        self.stdout.write(f"{'count':>8} {'total ms':>11} {'mean ms':>9} {'max ms':>9}  view / sql")
+
+        for shape in shapes:
+            self.stdout.write(
+                f"{shape['count']:>8} {shape['total_ms']:>11.1f} {shape['mean_ms']:>9.2f} {shape['max_ms']:>9.2f}"
+                f"  {shape['view']}\n{'':>42}{shape['sql']}"
+            )
@@ -0,0 +1,69 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.server import Arbiter, parse_bind
+
+
+class Command(BaseCommand):
+    """
+    Serves the project with the pre-fork WSGI server of core/server.py.
+
+    One worker process per core by default, each with a pool of threads.
+    The application is loaded and warmed up once in the master before the
+    workers are forked, unless `--no-preload` is given (then each worker
+    loads it itself). Send SIGHUP to the master to reload the code without
+    dropping connections (a reload whose code does not load is abandoned),
+    SIGTERM or Ctrl-C to stop.
+    """
+
+    help = "Runs a pre-fork multi-process WSGI server (workers x threads)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bind", default="127.0.0.1:8000", help="host:port to listen on.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+        parser.add_argument("--threads", type=int, default=4, help="Threads per worker.")
+        parser.add_argument(
+            "--max-requests", type=int, default=1000,
+            help="Restart a worker after this many requests, 0 to never restart workers.",
+        )
+        parser.add_argument(
+            "--max-requests-jitter", type=int, default=50,
+            help="Add up to this many requests to --max-requests, per worker.",
+        )
+        parser.add_argument(
+            "--graceful-timeout", type=float, default=30,
+            help="Seconds workers get to finish their requests when stopping.",
+        )
+        parser.add_argument("--backlog", type=int, default=2048, help="Listen queue size.")
+        parser.add_argument("--no-preload", action="store_false", dest="preload",
+                            help="Load the application in each worker instead of before forking.")
+        parser.add_argument("--access-log", action="store_true", help="Log every request to stderr.")
+
+    def handle(self, *args, **options):
+        if not hasattr(os, "fork"):
+            raise CommandError("serve requires os.fork(), which is not available on this platform.")
+
+        if options["workers"] < 1 or options["threads"] < 1:
+            raise CommandError("--workers and --threads must be at least 1.")
+
+        try:
+            parse_bind(options["bind"])
+        except ValueError:
+            raise CommandError(f"Invalid --bind address: {options['bind']}")
+
+        arbiter = Arbiter(
+            bind=options["bind"],
+            workers=options["workers"],
+            threads=options["threads"],
+            max_requests=options["max_requests"],
+            max_requests_jitter=options["max_requests_jitter"],
+            graceful_timeout=options["graceful_timeout"],
+            preload=options["preload"],
+            backlog=options["backlog"],
+            access_log=options["access_log"],
+        )
+
+        status = arbiter.run()
+        if status:
+            raise CommandError("A worker could not load the application.", returncode=status)
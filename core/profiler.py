@@ -0,0 +1,256 @@
+"""
+Sampling profiler for live workers.
+
+The thread running a session (the one serving the staff request that
+started it) reads the Python stack of every thread serving a profiled
+request with `sys._current_frames()` at a fixed rate, and counts
+identical stacks. The result is in the collapsed-stack format read by
+flamegraph.pl, speedscope and most flame graph tools: one
+`frame;frame;frame count` line per distinct stack, root first.
+
+Sampling holds the GIL, so it is time taken from the profiled requests.
+The sampler measures how long each sample takes and lowers its rate to
+keep that under `max_overhead` of the elapsed time.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# the session running in this worker, if any; read on every request
+active_session = None
+_session_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def is_enabled():
+    return getattr(settings, "PROFILER_ENABLED", False)
+
+
+class ProfileSession:
+    """
+    Profiles the requests of this worker for a time window, or the next
+    `max_requests` requests whose path starts with `path`.
+
+    Attributes:
+        rate (int): target samples per second.
+        path (str): path prefix of the requests profiled, None for all.
+        max_requests (int): number of requests to profile, None to stop after
+            `seconds` only.
+        seconds (float): how long to profile; in request mode, the timeout.
+        max_overhead (float): fraction of the elapsed time sampling may take.
+    """
+
+    def __init__(self, rate=100, seconds=10, path=None, max_requests=None, max_overhead=0.05):
+        self.rate = rate
+        self.seconds = seconds
+        self.path = path
+        self.max_requests = max_requests
+        self.max_overhead = max_overhead
+
+        self.stacks = Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0
+        self.requests_started = 0
+        self.requests_done = 0
+
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._labels = {}
+        self._done = threading.Event()
+
+    def matches(self, request):
+        """
+        Checks if a request should be profiled, counting it if so.
+        """
+        if self._done.is_set() or (self.path and not request.path.startswith(self.path)):
+            return False
+
+        with self._lock:
+            if self.max_requests is not None and self.requests_started >= self.max_requests:
+                return False
+            self.requests_started += 1
+            return True
+
+    def enter(self):
+        with self._lock:
+            ident = threading.get_ident()
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+
+    def exit(self):
+        with self._lock:
+            ident = threading.get_ident()
+            self._threads[ident] -= 1
+            if not self._threads[ident]:
+                del self._threads[ident]
+
+            self.requests_done += 1
+            if self.max_requests is not None and self.requests_done >= self.max_requests:
+                self._done.set()
+
+    def get_label(self, frame):
+        """
+        Util function to name a frame `module:function`, cached per code object.
+        """
+        code = frame.f_code
+        label = self._labels.get(code)
+
+        if label is None:
+            module = frame.f_globals.get("__name__", "?")
+            label = self._labels[code] = f"{module}:{code.co_qualname}"
+
+        return label
+
+    def sample(self):
+        """
+        Records the current stack of every profiled thread.
+        """
+        with self._lock:
+            threads = list(self._threads)
+
+        if not threads:
+            return
+
+        frames = sys._current_frames()
+
+        for ident in threads:
+            frame = frames.get(ident)
+            stack = []
+            while frame is not None:
+                stack.append(self.get_label(frame))
+                frame = frame.f_back
+
+            if stack:
+                stack.reverse()
+                self.stacks[";".join(stack)] += 1
+                self.samples += 1
+
+    def run(self):
+        """
+        Samples until the window ends or the requests are profiled.
+        Returns the report.
+        """
+        interval = 1 / self.rate
+        start = time.perf_counter()
+        deadline = start + self.seconds
+
+        while not self._done.wait(min(interval, max(0.0, deadline - time.perf_counter()))):
+            if time.perf_counter() >= deadline:
+                break
+
+            sample_start = time.perf_counter()
+            self.sample()
+            cost = time.perf_counter() - sample_start
+            self.sampling_seconds += cost
+
+            # waits long enough between samples to stay under max_overhead
+            interval = max(1 / self.rate, cost / self.max_overhead - cost)
+
+        self._done.set()
+        return self.get_report(time.perf_counter() - start)
+
+    def get_collapsed(self):
+        """
+        Returns the stacks in collapsed-stack format, most sampled first.
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def get_report(self, elapsed):
+        return {
+            "seconds": round(elapsed, 3),
+            "samples": self.samples,
+            "requests": self.requests_done,
+            "rate": self.rate,
+            "effective_rate": round(self.samples / elapsed, 1) if elapsed else None,
+            "sampling_seconds": round(self.sampling_seconds, 4),
+            "overhead": round(self.sampling_seconds / elapsed, 4) if elapsed else None,
+            "collapsed": self.get_collapsed(),
+        }
+
+
+def profile(**options):
+    """
+    Runs a profile session in this worker, blocking the calling thread
+    until it ends.
+    Returns the report. Raises ProfilerBusy if a session is already running.
+    """
+    global active_session
+
+    session = ProfileSession(**options)
+
+    with _session_lock:
+        if active_session is not None:
+            raise ProfilerBusy
+        active_session = session
+
+    try:
+        return session.run()
+    finally:
+        active_session = None
+
+
+class ProfiledStream:
+    """
+    Streamed body of a profiled request, keeping the thread producing it
+    marked until it is exhausted or closed.
+    """
+
+    def __init__(self, session, content):
+        self.session = session
+        self.content = content
+        self.closed = False
+
+    def __iter__(self):
+        try:
+            yield from self.content
+        finally:
+            self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.session.exit()
+
+
+class ProfilerMiddleware:
+    """
+    Marks the threads serving requests picked by the running profile
+    session, if any, so it samples them. Only installed when
+    PROFILER_ENABLED is True.
+
+    Streaming responses produce their body after the view returns, e.g.
+    the featured articles feed serializes it there, so their thread stays
+    marked until the body is consumed.
+    """
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        session = active_session
+
+        if session is None or not session.matches(request):
+            return self.get_response(request)
+
+        session.enter()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            session.exit()
+            raise
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = ProfiledStream(session, response.streaming_content)
+        else:
+            session.exit()
+
+        return response
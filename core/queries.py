@@ -0,0 +1,483 @@
+"""
+Per-view aggregation of SQL query shapes, and a slow-query log.
+
+Every statement a request runs goes through a database execute wrapper
+that strips its literals, leaving the statement's shape, and times it.
+Shapes are aggregated per view (count, total and max time) in a bounded,
+least-recently-seen store held by each worker process, which dumps it to
+`QUERY_STATS_DIR/queries-<pid>.json` so reports can merge every worker on
+the host. Exiting workers fold their stats into `retired.json` and remove
+their file, as do reports for the files of workers that died without
+doing so. Statements slower than `SLOW_QUERY_THRESHOLD_MS` are logged with
+the line of project code that ran them.
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+RETIRED_FILE = "retired.json"
+
+SORT_KEYS = {
+    "total": lambda shape: shape["total_ms"],
+    "count": lambda shape: shape["count"],
+    "max": lambda shape: shape["max_ms"],
+    "mean": lambda shape: shape["mean_ms"],
+}
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[-+]?\d+)?\b", re.IGNORECASE)
+PLACEHOLDER_RE = re.compile(r"%s|\?")
+IN_LIST_RE = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+VALUES_ROWS_RE = re.compile(r"(\(\?(?:, \?)*\))(?:, \(\?(?:, \?)*\))+")
+SPACE_RE = re.compile(r"\s+")
+
+THIS_FILE = os.path.abspath(__file__)
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """
+    Reduces a statement to its shape: literals and placeholders become `?`,
+    IN lists and multi-row VALUES collapse, and whitespace is normalized,
+    so e.g. lookups of different ids or batch sizes share one shape.
+    """
+    sql = STRING_RE.sub("?", sql)
+    sql = PLACEHOLDER_RE.sub("?", sql)
+    sql = NUMBER_RE.sub("?", sql)
+    sql = SPACE_RE.sub(" ", sql).strip()
+    sql = IN_LIST_RE.sub("IN (...)", sql)
+    return VALUES_ROWS_RE.sub(r"\1, ...", sql)
+
+
+def get_origin():
+    """
+    Util function to find the innermost project code line on the stack,
+    skipping Django, third-party packages and this module.
+    Returns "path:line in function", or None.
+    """
+    base_dir = str(settings.BASE_DIR)
+
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(base_dir) and filename != THIS_FILE and "site-packages" not in filename:
+            return f"{os.path.relpath(filename, base_dir)}:{frame.lineno} in {frame.name}"
+
+    return None
+
+
+def get_view_label(request):
+    """
+    Util function to name the view serving a request, by its class for
+    class-based views.
+    """
+    match = getattr(request, "resolver_match", None)
+
+    if match is None:
+        return "<unresolved>"
+
+    view_class = getattr(match.func, "view_class", None)
+    return view_class.__name__ if view_class else match.view_name or match._func_path
+
+
+def get_dump_dir():
+    path = getattr(settings, "QUERY_STATS_DIR", None)
+    return Path(path) if path else None
+
+
+@contextmanager
+def locked_dir(directory):
+    """
+    Util function to serialize the processes updating the retired stats
+    and removing dump files, with a lock file in `directory`.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_json(path, data):
+    """
+    Util function to replace a JSON file atomically.
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(data))
+    os.replace(tmp_path, path)
+
+
+def read_json(path):
+    """
+    Util function to load a JSON file.
+    Returns None if it is missing or unreadable.
+    """
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def get_process_start(pid):
+    """
+    Util function to read when process `pid` started, from /proc.
+    Returns a timestamp, or None where unknown.
+    """
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+        boot = next(line for line in Path("/proc/stat").read_text().splitlines() if line.startswith("btime "))
+    except (OSError, StopIteration):
+        return None
+
+    # the command name may contain spaces, start time is the 20th field after it
+    ticks = int(stat.rpartition(")")[2].split()[19])
+    return int(boot.split()[1]) + ticks / os.sysconf("SC_CLK_TCK")
+
+
+def is_live_dump(data):
+    """
+    Util function to check if the process that wrote a dump still runs.
+    A process started after the dump was written reuses a dead one's pid.
+    """
+    pid = data.get("pid")
+
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # runs, as another user
+        pass
+
+    started = get_process_start(pid)
+    # /proc/stat has the boot time in whole seconds
+    return started is None or started <= data.get("updated", 0) + 1
+
+
+def retire_dumps(directory, dumps, max_shapes):
+    """
+    Util function to fold dumps into the retired workers' stats, keeping
+    the `max_shapes` shapes with the most total time, and remove their
+    files. Must hold the directory's lock.
+    """
+    path = directory / RETIRED_FILE
+    retired = read_json(path) or {"workers": 0, "evicted": 0, "shapes": []}
+
+    shapes = merge_shapes([retired["shapes"], *(dump["shapes"] for dump in dumps)])
+    shapes.sort(key=SORT_KEYS["total"], reverse=True)
+
+    write_json(path, {
+        "workers": retired["workers"] + len(dumps),
+        "evicted": retired["evicted"] + sum(dump.get("evicted", 0) for dump in dumps) + max(
+            0, len(shapes) - max_shapes
+        ),
+        "updated": time.time(),
+        "shapes": shapes[:max_shapes],
+    })
+
+    for dump in dumps:
+        (directory / f"queries-{dump['pid']}.json").unlink(missing_ok=True)
+
+
+class QueryStats:
+    """
+    Bounded store of query shape statistics, keyed by (view, shape).
+
+    Holds at most `max_shapes` entries; when full, the least recently seen
+    one is dropped and counted in `evicted`. Thread safe.
+    """
+
+    def __init__(self, max_shapes=1000):
+        self.max_shapes = max_shapes
+        self.evicted = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, view, queries):
+        """
+        Adds the (shape, milliseconds) of the queries a request ran.
+        """
+        with self._lock:
+            for shape, duration in queries:
+                key = (view, shape)
+                entry = self._entries.get(key)
+
+                if entry is None:
+                    if len(self._entries) >= self.max_shapes:
+                        self._entries.popitem(last=False)
+                        self.evicted += 1
+                    self._entries[key] = [1, duration, duration]
+                    continue
+
+                self._entries.move_to_end(key)
+                entry[0] += 1
+                entry[1] += duration
+                entry[2] = max(entry[2], duration)
+
+    def snapshot(self):
+        """
+        Returns the entries as a list of dicts.
+        """
+        with self._lock:
+            return [
+                {"view": view, "sql": shape, "count": count, "total_ms": total, "max_ms": longest}
+                for (view, shape), (count, total, longest) in self._entries.items()
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self.evicted = 0
+
+    def dump(self):
+        """
+        Writes the entries to this process's file in QUERY_STATS_DIR,
+        atomically. Returns the path, or None when no directory is set.
+        """
+        directory = get_dump_dir()
+
+        if directory is None:
+            return None
+
+        directory.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        path = directory / f"queries-{pid}.json"
+
+        write_json(path, {"pid": pid, "updated": time.time(), "evicted": self.evicted, "shapes": self.snapshot()})
+
+        return path
+
+    def retire(self):
+        """
+        Folds the entries into the stats of the retired workers in
+        QUERY_STATS_DIR and removes this process's file, when it exits.
+        """
+        directory = get_dump_dir()
+
+        if directory is None:
+            return
+
+        data = {"pid": os.getpid(), "evicted": self.evicted, "shapes": self.snapshot()}
+
+        with locked_dir(directory):
+            retire_dumps(directory, [data], self.max_shapes)
+
+
+query_stats = QueryStats(getattr(settings, "QUERY_STATS_MAX_SHAPES", 1000))
+
+
+def read_dumps(exclude_pid=None):
+    """
+    Util function to load the files dumped by the running workers, after
+    retiring those of workers that exited without doing so.
+    Returns (list of dicts skipping `exclude_pid`, retired workers' stats or None).
+    """
+    directory = get_dump_dir()
+
+    if directory is None or not directory.is_dir():
+        return [], None
+
+    dumps, dead = [], []
+    for path in sorted(directory.glob("queries-*.json")):
+        data = read_json(path)
+        if data is None:
+            continue
+        if not is_live_dump(data):
+            dead.append(data)
+        elif data.get("pid") != exclude_pid:
+            dumps.append(data)
+
+    if dead:
+        with locked_dir(directory):
+            # another report may have retired them meanwhile
+            dead = [data for data in dead if (directory / f"queries-{data['pid']}.json").exists()]
+            retire_dumps(directory, dead, query_stats.max_shapes)
+
+    return dumps, read_json(directory / RETIRED_FILE)
+
+
+def remove_dumps():
+    """
+    Util function to delete every worker's dump file and the retired
+    workers' stats.
+    Returns the number removed.
+    """
+    directory = get_dump_dir()
+
+    if directory is None or not directory.is_dir():
+        return 0
+
+    removed = 0
+    with locked_dir(directory):
+        for path in [*directory.glob("queries-*.json"), directory / RETIRED_FILE]:
+            if path.exists():
+                path.unlink(missing_ok=True)
+                removed += 1
+
+    return removed
+
+
+def merge_shapes(shape_lists, view=None):
+    """
+    Util function to merge lists of shape entries, summing the entries of
+    the same view and shape.
+    Returns a list of entries, optionally for one view only.
+    """
+    merged = {}
+
+    for shapes in shape_lists:
+        for shape in shapes:
+            if view and shape["view"] != view:
+                continue
+
+            key = (shape["view"], shape["sql"])
+            entry = merged.get(key)
+
+            if entry is None:
+                merged[key] = {name: shape[name] for name in ("view", "sql", "count", "total_ms", "max_ms")}
+            else:
+                entry["count"] += shape["count"]
+                entry["total_ms"] += shape["total_ms"]
+                entry["max_ms"] = max(entry["max_ms"], shape["max_ms"])
+
+    return list(merged.values())
+
+
+def get_report(shape_lists, top=20, sort="total", view=None):
+    """
+    Merges lists of shape entries, e.g. from several workers, and ranks them.
+    Returns the `top` entries by `sort`, optionally for one view only.
+    """
+    merged = merge_shapes(shape_lists, view)
+
+    for entry in merged:
+        entry["mean_ms"] = entry["total_ms"] / entry["count"]
+        for name in ("total_ms", "max_ms", "mean_ms"):
+            entry[name] = round(entry[name], 3)
+
+    return sorted(merged, key=SORT_KEYS[sort], reverse=True)[:top]
+
+
+class QueryStatsMiddleware:
+    """
+    Times and aggregates the queries of every request by view and shape.
+
+    Disabled when QUERY_STATS_ENABLED is False. The queries of streaming
+    responses, which run while their body is consumed, are recorded once
+    the body is exhausted or closed.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_STATS_ENABLED", True):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.threshold = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", 100)
+        self.dump_interval = getattr(settings, "QUERY_STATS_DUMP_INTERVAL", 30)
+        self.last_dump = time.monotonic()
+        self.dump_lock = threading.Lock()
+        self.registered_exit = False
+
+    def __call__(self, request):
+        queries = []
+        wrapper = functools.partial(self.record, request, queries)
+
+        with self.wrap_queries(wrapper):
+            response = self.get_response(request)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.stream(request, response.streaming_content, queries, wrapper)
+        else:
+            self.add(request, queries)
+
+        return response
+
+    def wrap_queries(self, wrapper):
+        """
+        Util function to install the execute wrapper on every connection of
+        the current thread, until the returned context exits.
+        """
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        return stack
+
+    def stream(self, request, content, queries, wrapper):
+        """
+        Util generator yielding a streamed body with the execute wrapper
+        installed, as its queries run while it is produced, then recording
+        them.
+        """
+        try:
+            with self.wrap_queries(wrapper):
+                yield from content
+        finally:
+            self.add(request, queries)
+
+    def add(self, request, queries):
+        if queries:
+            query_stats.add(get_view_label(request), queries)
+            self.maybe_dump()
+
+    def record(self, request, queries, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            queries.append((normalize_sql(sql), duration))
+
+            if self.threshold is not None and duration >= self.threshold:
+                logger.warning(
+                    "Slow query (%.1f ms) in %s from %s: %s",
+                    duration, get_view_label(request), get_origin(), sql,
+                )
+
+    def maybe_dump(self):
+        """
+        Util function to dump the stats of this worker every
+        QUERY_STATS_DUMP_INTERVAL seconds, and when it exits.
+        """
+        if get_dump_dir() is None or not self.dump_lock.acquire(blocking=False):
+            return
+
+        try:
+            if not self.registered_exit:
+                atexit.register(query_stats.retire)
+                self.registered_exit = True
+
+            if time.monotonic() - self.last_dump >= self.dump_interval:
+                self.last_dump = time.monotonic()
+                query_stats.dump()
+        except OSError:
+            logger.exception("Could not dump query stats")
+        finally:
+            self.dump_lock.release()
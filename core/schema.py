@@ -0,0 +1,199 @@
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import drf_spectacular
+from django.apps import apps
+from django.conf import ENVIRONMENT_VARIABLE, settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+ARTIFACT_PREFIX = "openapi-"
+
+# schema per code version (only ever the running one) and its rendered bytes per media type
+_cache = {}
+
+
+@functools.cache
+def get_code_version():
+    """
+    Util function to identify the deployed code.
+
+    Uses the APP_VERSION environment variable when the deployment sets one,
+    otherwise hashes the project's Python sources (settings included) and
+    the drf_spectacular version, all of which shape the schema. Code does
+    not change under a running process, so this is computed once.
+    Returns the version string.
+    """
+    if os.environ.get("APP_VERSION"):
+        return os.environ["APP_VERSION"]
+
+    base_dir = Path(settings.BASE_DIR)
+    directories = {Path(apps.get_app_config(label).path) for label in get_project_app_labels()}
+    # not `settings.SETTINGS_MODULE`, which is None under `override_settings()`
+    directories.add(base_dir / os.environ[ENVIRONMENT_VARIABLE].split(".")[0])
+
+    digest = hashlib.sha256(drf_spectacular.__version__.encode())
+
+    for path in sorted(path for directory in directories for path in directory.rglob("*.py")):
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()[:12]
+
+
+def get_project_app_labels():
+    """
+    Util function to list the apps that live in this project.
+    Returns their labels.
+    """
+    return [
+        app_config.label for app_config in apps.get_app_configs()
+        if app_config.path.startswith(str(settings.BASE_DIR))
+    ]
+
+
+def get_artifact_path(version):
+    """
+    Util function to fetch where the schema of a code version is stored.
+    Returns the path or None when artifacts are disabled.
+    """
+    directory = getattr(settings, "SCHEMA_CACHE_DIR", None)
+    return Path(directory) / f"{ARTIFACT_PREFIX}{version}.json" if directory else None
+
+
+def build_schema(version=None):
+    """
+    Generates the OpenAPI schema and writes it as the artifact of `version`
+    (the running code version by default).
+
+    The file is written to a temporary name and moved into place, so
+    workers reading it concurrently never see a partial schema.
+    Returns the schema.
+    """
+    generator_class = spectacular_settings.DEFAULT_GENERATOR_CLASS
+    schema = generator_class().get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+
+    path = get_artifact_path(version or get_code_version())
+
+    if path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps(schema))
+        os.replace(temp_path, path)
+
+    return schema
+
+
+def prune_artifacts(version=None):
+    """
+    Removes the artifacts of every code version but `version` (the running
+    one by default).
+    Returns the number of files removed.
+    """
+    path = get_artifact_path(version or get_code_version())
+
+    if not path or not path.parent.exists():
+        return 0
+
+    removed = 0
+    for stale_path in path.parent.glob(f"{ARTIFACT_PREFIX}*.json"):
+        if stale_path != path:
+            stale_path.unlink(missing_ok=True)
+            removed += 1
+
+    return removed
+
+
+def read_schema(version):
+    """
+    Util function to load the artifact of a code version.
+    Returns the schema or None when it was never built or is unreadable.
+    """
+    path = get_artifact_path(version)
+
+    if not path:
+        return None
+
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def load_schema():
+    """
+    Fetches the schema of the running code version.
+
+    Served from memory once loaded. The artifact is read from disk when
+    `manage.py build_schema` or another worker already wrote it, and only
+    generated when the code version changed since.
+    Returns the cache entry holding the schema and its renderings.
+    """
+    version = get_code_version()
+
+    if version not in _cache:
+        schema = read_schema(version)
+
+        if schema is None:
+            schema = build_schema(version)
+
+        _cache[version] = {"schema": schema, "rendered": {}}
+
+    return _cache[version]
+
+
+def render_schema(renderer):
+    """
+    Util function to render the schema for a media type, once.
+    Returns the rendered bytes.
+    """
+    entry = load_schema()
+    rendered = entry["rendered"]
+
+    if renderer.media_type not in rendered:
+        rendered[renderer.media_type] = renderer.render(entry["schema"], renderer.media_type, {})
+
+    return rendered[renderer.media_type]
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    Serves the OpenAPI schema pre-built for the running code version instead
+    of introspecting every view and serializer on each request.
+
+    The schema is rendered once per media type and kept in memory. Responses
+    carry a weak ETag derived from the code version, so clients revalidating
+    with If-None-Match get a 304 until the code changes. Requests for a
+    specific version or language still generate the schema.
+    """
+
+    def _get_schema_response(self, request):
+        version = self.api_version or request.version or self._get_version_parameter(request)
+
+        if version or request.GET.get("lang"):
+            return super()._get_schema_response(request)
+
+        renderer = request.accepted_renderer
+        # weak, so it stays the same whether or not the body gets compressed,
+        # and a 304 repeats the exact tag the client holds
+        etag = f'W/"{get_code_version()}-{renderer.format}"'
+
+        # weak comparison, as required for If-None-Match
+        if_none_match = {tag.removeprefix("W/") for tag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))}
+        if etag.removeprefix("W/") in if_none_match or "*" in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f"{content_type}; charset={renderer.charset}"
+
+            response = HttpResponse(render_schema(renderer), content_type=content_type)
+            response["Content-Disposition"] = f'inline; filename="{self._get_filename(request, version)}"'
+
+        response["ETag"] = etag
+        return response
@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+
+class ProfileRequestSerializer(serializers.Serializer):
+    """
+    Serializer for the options of a profile session.
+
+    Without `requests`, every request the worker serves during `seconds`
+    is profiled; with it, the next `requests` requests whose path starts
+    with `path`, waiting at most `seconds` for them.
+    """
+
+    seconds = serializers.FloatField(min_value=0.1, max_value=300, default=10)
+    rate = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+    path = serializers.CharField(required=False, allow_blank=False)
+    requests = serializers.IntegerField(min_value=1, max_value=10000, required=False)
+    max_overhead = serializers.FloatField(min_value=0.001, max_value=0.5, default=0.05)
+    output = serializers.ChoiceField(choices=["json", "collapsed"], default="json")
+
+    def validate_path(self, value):
+        if not value.startswith("/"):
+            raise serializers.ValidationError("Must start with /.")
+        return value
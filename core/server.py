@@ -0,0 +1,472 @@
+"""
+Pre-fork WSGI server, run by `manage.py serve`.
+
+A master process binds the listening socket, optionally loads and warms
+the Django application up (preload), then forks the workers, which
+inherit both: with preload, the app's memory is shared copy-on-write and
+initialized once instead of once per worker. Each worker accepts
+connections on the shared socket and serves them from a fixed pool of
+threads, one request per connection (wsgiref, HTTP/1.0 style).
+
+The master restarts workers that exit, e.g. after `max_requests`
+requests (plus a random jitter, so they do not all restart at once),
+which bounds the memory a worker can accumulate.
+
+Signals (to the master):
+    SIGHUP: graceful reload. The new code is first loaded in a separate
+        process; if that fails, the reload is abandoned and the current
+        master and workers keep serving. Otherwise the master re-executes
+        itself with the same arguments, keeping the socket; the new code is
+        loaded, new workers are started and the old ones then finish their
+        requests and exit.
+    SIGTERM, SIGINT: graceful shutdown. Workers stop accepting, finish
+        their requests within `graceful_timeout` and exit.
+
+POSIX only.
+"""
+import gc
+import os
+import random
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.core.servers.basehttp import get_internal_wsgi_application
+from django.db import connections
+
+LISTEN_FD_ENV = "SERVE_LISTEN_FD"
+OLD_WORKERS_ENV = "SERVE_OLD_WORKERS"
+# set: only load the application and exit, to check a reload
+CHECK_ENV = "SERVE_CHECK"
+RELOAD_CHECK_TIMEOUT = 120
+
+# exit code of a worker that could not load the application
+WORKER_BOOT_ERROR = 3
+
+
+def load_application():
+    """
+    Util function to load the WSGI application and warm it up, unless
+    DJANGO_WARMUP is set. Django is already set up by manage.py, so the
+    warm-up wsgi.py asks for would not run by itself.
+    """
+    # set: the core app already warmed up in django.setup(), or must not
+    warmed = os.environ.get("DJANGO_WARMUP") is not None
+    application = get_internal_wsgi_application()
+
+    if not warmed:
+        from .warmup import warm_up
+
+        warm_up()
+
+    return application
+
+
+def parse_bind(bind):
+    """
+    Util function to split a `host:port` address.
+    Returns (host, port).
+    """
+    host, _, port = bind.rpartition(":")
+    return host.strip("[]") or "127.0.0.1", int(port)
+
+
+class RequestHandler(WSGIRequestHandler):
+    access_log = False
+
+    def log_message(self, format, *args):
+        if self.access_log:
+            super().log_message(format, *args)
+
+
+class WorkerServer(WSGIServer):
+    """
+    WSGI server of a worker, accepting on a socket inherited from the
+    master and serving connections from a pool of `threads` threads.
+    """
+
+    def __init__(self, sock, application, threads, max_requests):
+        super().__init__(sock.getsockname()[:2], RequestHandler, bind_and_activate=False)
+
+        # replaces the socket BaseServer created, the master already bound one
+        self.socket.close()
+        self.socket = sock
+        self.server_name, self.server_port = sock.getsockname()[:2]
+        self.setup_environ()
+        self.set_app(application)
+
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="serve")
+        self.slots = threading.BoundedSemaphore(threads)
+        self.max_requests = max_requests
+        self.accepted = 0
+        self.handled = 0
+        self.handled_lock = threading.Lock()
+        self.stopping = False
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+            with self.handled_lock:
+                self.handled += 1
+
+    def serve(self, graceful_timeout):
+        """
+        Accepts connections until stopped, then waits up to
+        `graceful_timeout` seconds for the requests in progress.
+        """
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.socket, selectors.EVENT_READ)
+
+            while not self.stopping:
+                # only accepts when a thread is free, leaving the connection
+                # to another worker otherwise
+                if not self.slots.acquire(timeout=0.5):
+                    continue
+
+                if self.stopping or not selector.select(0.5):
+                    self.slots.release()
+                    continue
+
+                try:
+                    request, client_address = self.get_request()
+                except OSError:
+                    # another worker accepted it first
+                    self.slots.release()
+                    continue
+
+                request.setblocking(True)
+                if self.verify_request(request, client_address):
+                    # counted when accepted, requests in progress would
+                    # otherwise let more in
+                    self.accepted += 1
+                    if self.max_requests and self.accepted >= self.max_requests:
+                        self.stopping = True
+                    self.process_request(request, client_address)
+                else:
+                    self.shutdown_request(request)
+                    self.slots.release()
+
+        self.socket.close()
+        waiter = threading.Thread(target=self.executor.shutdown, daemon=True)
+        waiter.start()
+        waiter.join(graceful_timeout)
+
+
+class Arbiter:
+    """
+    Master process of the pre-fork server.
+
+    Attributes:
+        bind (str): `host:port` to listen on.
+        workers (int): number of worker processes.
+        threads (int): threads per worker.
+        max_requests (int): requests after which a worker is restarted, 0
+            to never restart workers.
+        max_requests_jitter (int): up to this many requests are added to
+            `max_requests`, per worker.
+        graceful_timeout (float): seconds workers get to finish their
+            requests when stopping.
+        preload (bool): load the application in the master, before forking.
+    """
+
+    def __init__(self, bind="127.0.0.1:8000", workers=None, threads=4, max_requests=1000,
+                 max_requests_jitter=50, graceful_timeout=30, preload=True, backlog=2048,
+                 access_log=False, stream=None):
+        self.bind = bind
+        self.num_workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.preload = preload
+        self.backlog = backlog
+        self.access_log = access_log
+        self.stream = stream or sys.stderr
+
+        self.application = None
+        self.socket = None
+        self.workers = {}
+        self.old_workers = set()
+        self.stopping = False
+        self.reloading = False
+
+    def log(self, message):
+        self.stream.write(f"[{os.getpid()}] {message}\n")
+        self.stream.flush()
+
+    def create_socket(self):
+        """
+        Util function to bind the listening socket, or take over the one
+        passed by the master this process was re-executed from.
+        """
+        fd = os.environ.pop(LISTEN_FD_ENV, None)
+
+        if fd is not None:
+            sock = socket.socket(fileno=int(fd))
+            sock.set_inheritable(False)
+        else:
+            host, port = parse_bind(self.bind)
+            family = socket.AF_INET6 if ":" in host else socket.AF_INET
+            sock = socket.create_server((host, port), family=family, backlog=self.backlog)
+
+        # workers race for connections, the losers must not block in accept()
+        sock.setblocking(False)
+        return sock
+
+    def handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def handle_reload(self, signum, frame):
+        self.reloading = True
+
+    def spawn_worker(self):
+        """
+        Forks a worker. The child serves until stopped and never returns.
+        """
+        pid = os.fork()
+
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return pid
+
+        status = 0
+        try:
+            status = self.run_worker()
+        except BaseException:
+            import traceback
+
+            traceback.print_exc()
+            status = 1
+        finally:
+            os._exit(status)
+
+    def run_worker(self):
+        """
+        Util function running in a forked worker.
+        Returns the exit status.
+        """
+        server = None
+
+        def stop(signum, frame):
+            if server is None:
+                # still loading the application, nothing to finish
+                os._exit(0)
+            server.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        # the master handles these, Ctrl-C reaches the whole process group
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        application = self.application
+        if application is None:
+            try:
+                application = load_application()
+            except Exception:
+                import traceback
+
+                traceback.print_exc()
+                return WORKER_BOOT_ERROR
+
+        max_requests = self.max_requests
+        if max_requests:
+            max_requests += random.randint(0, self.max_requests_jitter)
+
+        RequestHandler.access_log = self.access_log
+        server = WorkerServer(self.socket, application, self.threads, max_requests)
+        server.serve(self.graceful_timeout)
+
+        if server.max_requests and server.accepted >= server.max_requests:
+            self.log(f"Worker recycled after {server.handled} requests")
+
+        if getattr(settings, "QUERY_STATS_ENABLED", True):
+            # os._exit() skips atexit, which would retire them otherwise
+            from .queries import query_stats
+
+            query_stats.retire()
+
+        return 0
+
+    def spawn_workers(self):
+        while len(self.workers) < self.num_workers and not self.stopping:
+            self.spawn_worker()
+
+    def reap_workers(self):
+        """
+        Util function to collect exited workers.
+        Returns False if one could not load the application.
+        """
+        booted = True
+
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return booted
+
+            if not pid:
+                return booted
+
+            self.old_workers.discard(pid)
+            if self.workers.pop(pid, None) is None:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            if code == WORKER_BOOT_ERROR:
+                booted = False
+            elif code:
+                self.log(f"Worker {pid} exited with {code}")
+
+    def signal_workers(self, pids, signum):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def check_reload(self):
+        """
+        Util function to load the new code in a separate process, the way
+        the re-executed master would.
+        Returns True if it loaded.
+        """
+        env = {**os.environ, CHECK_ENV: "1"}
+
+        try:
+            result = subprocess.run([sys.executable, *sys.argv], env=env, timeout=RELOAD_CHECK_TIMEOUT)
+        except (OSError, subprocess.SubprocessError):
+            return False
+
+        return result.returncode == 0
+
+    def reload(self):
+        """
+        Re-executes the master with the same arguments, handing over the
+        socket and the workers, which the new master stops once its own are
+        running. Returns only if the new code does not load, leaving this
+        master running.
+        """
+        self.reloading = False
+        self.log("Reloading")
+
+        if not self.check_reload():
+            self.log("Reload failed, the new code does not load; still serving the current code")
+            return
+
+        self.socket.set_inheritable(True)
+
+        env = {
+            **os.environ,
+            LISTEN_FD_ENV: str(self.socket.fileno()),
+            OLD_WORKERS_ENV: ",".join(str(pid) for pid in [*self.workers, *self.old_workers]),
+        }
+        sys.stdout.flush()
+        self.stream.flush()
+
+        try:
+            os.execve(sys.executable, [sys.executable, *sys.argv], env)
+        except OSError as error:
+            self.socket.set_inheritable(False)
+            self.log(f"Reload failed: {error}")
+
+    def stop(self):
+        """
+        Stops every worker, gracefully then forcefully after graceful_timeout.
+        """
+        pids = [*self.workers, *self.old_workers]
+        self.signal_workers(pids, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+
+        while (self.workers or self.old_workers) and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+
+        pids = [*self.workers, *self.old_workers]
+        self.signal_workers(pids, signal.SIGKILL)
+        for pid in pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.workers.clear()
+        self.old_workers.clear()
+
+    def run(self):
+        """
+        Runs the server until SIGTERM or SIGINT.
+        Returns the exit status.
+        """
+        if os.environ.pop(CHECK_ENV, None):
+            # checking a reload: raises if the code does not load
+            load_application()
+            return 0
+
+        self.old_workers = {int(pid) for pid in os.environ.pop(OLD_WORKERS_ENV, "").split(",") if pid}
+        self.socket = self.create_socket()
+
+        if self.preload:
+            try:
+                self.application = load_application()
+            except BaseException:
+                # the previous master's workers are this process's children,
+                # they must not outlive it
+                self.stop()
+                raise
+
+        # forked workers must open their own connections
+        connections.close_all()
+
+        if self.application is not None:
+            # moves the preloaded objects out of the collector's reach, so
+            # collections in workers do not write to (and un-share) their pages
+            gc.collect()
+            gc.freeze()
+
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+
+        host, port = self.socket.getsockname()[:2]
+        self.log(
+            f"Listening on {host}:{port} with {self.num_workers} workers x {self.threads} threads"
+            f"{' (preloaded)' if self.preload else ''}"
+        )
+
+        self.spawn_workers()
+
+        if self.old_workers:
+            # the workers of the previous code finish their requests and exit
+            self.signal_workers(self.old_workers, signal.SIGTERM)
+
+        while not self.stopping:
+            if self.reloading:
+                self.reload()
+
+            if not self.reap_workers():
+                self.log("A worker could not load the application, shutting down")
+                self.stop()
+                return WORKER_BOOT_ERROR
+
+            self.spawn_workers()
+            time.sleep(0.2)
+
+        self.log("Shutting down")
+        self.stop()
+        self.socket.close()
+        return 0
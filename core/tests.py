@@ -0,0 +1,625 @@
+import gzip
+import http.client
+import io
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from blog import streaming
+from blog.models import Article, Comment
+from simplepersonalblogapi import middleware, renderers
+from simplepersonalblogapi.cache import MmapCache
+from simplepersonalblogapi.middleware import CompressionMiddleware
+from simplepersonalblogapi.parsers import FastJSONParser
+from simplepersonalblogapi.renderers import FastJSONRenderer
+
+from . import profiler
+from .profiler import ProfileSession
+from .queries import QueryStats, query_stats, read_dumps, remove_dumps
+from .server import Arbiter, WorkerServer
+
+User = get_user_model()
+
+
+class SchemaETagTests(TestCase):
+    """
+    Tests for the validators of the cached OpenAPI schema.
+    """
+
+    url = "/api/schema/"
+
+    def test_same_weak_etag_on_200_and_304(self):
+        for encoding in ("gzip", "identity"):
+            with self.subTest(encoding=encoding):
+                response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=encoding)
+                self.assertEqual(response.status_code, 200)
+                etag = response["ETag"]
+                self.assertTrue(etag.startswith('W/"'))
+
+                response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=encoding, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+
+    def test_compressed_and_plain_share_the_etag(self):
+        compressed = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        plain = self.client.get(self.url, HTTP_ACCEPT_ENCODING="identity")
+
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(compressed["ETag"], plain["ETag"])
+
+    def test_stale_etag_gets_the_schema(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='W/"stale-openapi"')
+        self.assertEqual(response.status_code, 200)
+
+
+def get_dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", ""])
+    process.wait()
+    return process.pid
+
+
+def get_shape(count=1, total_ms=1.0, view="ArticleListAPIView", sql="SELECT ?"):
+    return {"view": view, "sql": sql, "count": count, "total_ms": total_ms, "max_ms": total_ms}
+
+
+class QueryDumpTests(APITestCase):
+    """
+    Tests for the query stats dumped by the workers of a host.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+        settings = override_settings(QUERY_STATS_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write_dump(self, pid, shapes, updated=None):
+        path = self.directory / f"queries-{pid}.json"
+        path.write_text(json.dumps({"pid": pid, "updated": updated or time.time(), "evicted": 1, "shapes": shapes}))
+        return path
+
+    def test_dead_workers_are_retired(self):
+        live = self.write_dump(os.getppid(), [get_shape(2, 4.0)])
+        dead = [self.write_dump(get_dead_pid(), [get_shape(1, 1.0)]) for _ in range(2)]
+
+        dumps, retired = read_dumps()
+
+        self.assertEqual([dump["pid"] for dump in dumps], [os.getppid()])
+        self.assertEqual((retired["workers"], retired["evicted"]), (2, 2))
+        self.assertEqual([(shape["count"], shape["total_ms"]) for shape in retired["shapes"]], [(2, 2.0)])
+        self.assertTrue(live.exists())
+        self.assertFalse(any(path.exists() for path in dead))
+
+        # read again, nothing is retired twice
+        self.assertEqual(read_dumps()[1]["workers"], 2)
+
+    def test_reused_pid(self):
+        path = self.write_dump(os.getpid(), [get_shape()], updated=time.time() - 10 ** 6)
+
+        dumps, retired = read_dumps()
+
+        self.assertEqual((dumps, retired["workers"]), ([], 1))
+        self.assertFalse(path.exists())
+
+    def test_exiting_worker_retires(self):
+        stats = QueryStats(max_shapes=2)
+        stats.add("ArticleListAPIView", [("SELECT ?", 1.0), ("SELECT ? FROM a", 2.0)])
+        path = stats.dump()
+
+        stats.retire()
+        # the next worker
+        stats = QueryStats(max_shapes=2)
+        stats.add("ArticleListAPIView", [("SELECT ? FROM a", 2.0), ("SELECT ? FROM b", 3.0)])
+        stats.retire()
+
+        dumps, retired = read_dumps()
+        self.assertFalse(path.exists())
+        self.assertEqual((dumps, retired["workers"]), ([], 2))
+        # the least total time is dropped beyond max_shapes
+        self.assertEqual([shape["total_ms"] for shape in retired["shapes"]], [4.0, 3.0])
+        self.assertEqual(retired["evicted"], 1)
+
+        self.assertEqual(remove_dumps(), 1)
+        self.assertEqual(read_dumps(), ([], None))
+
+    def test_report_counts_running_workers(self):
+        self.write_dump(os.getppid(), [get_shape()])
+        self.write_dump(get_dead_pid(), [get_shape()])
+        self.client.force_authenticate(User.objects.create_user(username="staff", is_staff=True))
+
+        response = self.client.get("/api/queries/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["workers"], response.json()["retired_workers"]), (2, 1))
+        self.assertEqual(
+            sum(shape["count"] for shape in response.json()["shapes"] if shape["sql"] == "SELECT ?"), 2
+        )
+
+
+class QueryStatsMiddlewareTests(APITestCase):
+    """
+    Tests for the recording of the queries requests run.
+    """
+
+    def setUp(self):
+        query_stats.reset()
+        self.addCleanup(query_stats.reset)
+
+        user = User.objects.create_user(username="reader", password=None)
+        article = Article.objects.create(user=user, title="Title", tags="#test", body="Body.", featured=True)
+        Comment.objects.create(article=article, user=user, comment="Nice.")
+        self.client.force_authenticate(user)
+
+    def get_shapes(self, view):
+        return [shape["sql"] for shape in query_stats.snapshot() if shape["view"] == view]
+
+    def test_streamed_queries_are_recorded(self):
+        response = self.client.get("/api/blog/featured-articles/")
+        self.assertTrue(response.streaming)
+        # nothing but the exists() check ran before the body is consumed
+        self.assertEqual(self.get_shapes("ArticleListAPIView"), [])
+
+        body = json.loads(b"".join(response.streaming_content))
+        response.close()
+
+        self.assertEqual(len(body), 1)
+        shapes = self.get_shapes("ArticleListAPIView")
+        self.assertTrue(any(sql.startswith('SELECT ? AS "a" FROM "blog_article"') for sql in shapes), shapes)
+        self.assertTrue(any('FROM "blog_article" INNER JOIN "auth_user"' in sql for sql in shapes), shapes)
+        self.assertTrue(any('FROM "blog_comment"' in sql and "IN (...)" in sql for sql in shapes), shapes)
+
+    def test_regular_responses(self):
+        self.client.get("/api/blog/featured-articles/summary/")
+
+        self.assertTrue(self.get_shapes("ArticleSummaryListAPIView"))
+
+
+class ProfileSessionTests(TestCase):
+    """
+    Tests for the sampling of profiled threads.
+    """
+
+    def test_sample(self):
+        session = ProfileSession()
+        session.sample()
+        self.assertEqual(session.samples, 0)
+
+        session.enter()
+        session.sample()
+        session.exit()
+        session.sample()
+
+        self.assertEqual(session.samples, 1)
+        stack, = session.stacks
+        self.assertTrue(stack.endswith(
+            "core.tests:ProfileSessionTests.test_sample;core.profiler:ProfileSession.sample"
+        ))
+        self.assertTrue(session.get_collapsed().endswith(" 1"))
+
+    def test_run(self):
+        session = ProfileSession(rate=200, seconds=0.3)
+        stop = threading.Event()
+
+        def busy():
+            session.enter()
+            while not stop.is_set():
+                sum(range(1000))
+            session.exit()
+
+        thread = threading.Thread(target=busy)
+        thread.start()
+        try:
+            report = session.run()
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertGreater(report["samples"], 5)
+        self.assertIn("core.tests:ProfileSessionTests.test_run.<locals>.busy", report["collapsed"])
+        self.assertLessEqual(report["effective_rate"], 200 * 1.2)
+
+    def test_requests_with_path(self):
+        session = ProfileSession(seconds=5, path="/api/blog/", max_requests=2)
+        factory = RequestFactory()
+
+        self.assertFalse(session.matches(factory.get("/api/account/login/")))
+        self.assertTrue(session.matches(factory.get("/api/blog/featured-articles/")))
+        self.assertTrue(session.matches(factory.get("/api/blog/article/1/")))
+        self.assertFalse(session.matches(factory.get("/api/blog/article/2/")))
+
+        for _ in range(2):
+            session.enter()
+            session.exit()
+
+        # ends as soon as the requests are done
+        start = time.perf_counter()
+        report = session.run()
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(report["requests"], 2)
+        self.assertFalse(session.matches(factory.get("/api/blog/article/3/")))
+
+    def test_max_overhead(self):
+        session = ProfileSession(rate=1000, seconds=0.5, max_overhead=0.01)
+
+        def slow_sample():
+            time.sleep(0.002)
+
+        with mock.patch.object(session, "sample", side_effect=slow_sample) as sample:
+            report = session.run()
+
+        # 500 samples at the target rate, each 2 ms apart needs ~200 ms
+        self.assertLessEqual(sample.call_count, 5)
+        self.assertLess(report["overhead"], 0.03)
+
+
+@override_settings(PROFILER_ENABLED=True)
+class ProfileAPITests(APITestCase):
+    """
+    Tests for the profiling endpoint and middleware.
+    """
+
+    url = "/api/profile/"
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_authenticate(self.staff)
+
+    def test_profile(self):
+        response = self.client.post(self.url, {"seconds": 0.1, "rate": 50}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["requests"], 0)
+
+        response = self.client.post(self.url, {"seconds": 0.1, "output": "collapsed"}, format="json")
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+
+    def test_busy(self):
+        with mock.patch.object(profiler, "active_session", ProfileSession()):
+            response = self.client.post(self.url, {"seconds": 0.1}, format="json")
+
+        self.assertEqual(response.status_code, 409)
+
+    @override_settings(PROFILER_ENABLED=False)
+    def test_disabled(self):
+        response = self.client.post(self.url, {"seconds": 0.1}, format="json")
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {"message": "Profiling is disabled."})
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user(username="member"))
+
+        self.assertEqual(self.client.post(self.url, {"seconds": 0.1}, format="json").status_code, 403)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post(self.url, {"seconds": 0.1}, format="json").status_code, 401)
+
+    def test_streamed_body_is_profiled(self):
+        article = Article.objects.create(user=self.staff, title="Title", tags="#test", body="Body.", featured=True)
+        Comment.objects.create(article=article, user=self.staff, comment="Nice.")
+        session = ProfileSession(path="/api/blog/featured-articles/", max_requests=1)
+
+        render_chunk = streaming.render_chunk
+
+        def sampled_render_chunk(*args):
+            # samples while the body is produced, as the sampler thread would
+            session.sample()
+            return render_chunk(*args)
+
+        with mock.patch.object(profiler, "active_session", session), \
+                mock.patch.object(streaming, "render_chunk", sampled_render_chunk):
+            response = self.client.get("/api/blog/featured-articles/")
+            self.assertTrue(response.streaming)
+            # the body is not produced yet, the thread must still be marked
+            self.assertEqual(list(session._threads), [threading.get_ident()])
+
+            body = b"".join(response.streaming_content)
+            response.close()
+
+        self.assertEqual(len(json.loads(body)), 1)
+        self.assertIn("core.profiler:ProfiledStream.__iter__;blog.streaming:stream_json_list", session.get_collapsed())
+        self.assertEqual((session._threads, session.requests_done), ({}, 1))
+
+
+class ServerTests(TestCase):
+    """
+    Tests for the pre-fork server.
+    """
+
+    def test_max_requests_not_exceeded(self):
+        sock = socket.create_server(("127.0.0.1", 0))
+        sock.setblocking(False)
+        port = sock.getsockname()[1]
+        release = threading.Event()
+
+        def application(environ, start_response):
+            # holds the requests in progress while others arrive
+            release.wait(5)
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            return [b"ok"]
+
+        server = WorkerServer(sock, application, threads=4, max_requests=3)
+        serving = threading.Thread(target=server.serve, args=(5,))
+        serving.start()
+
+        statuses = []
+
+        def request():
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                connection.request("GET", "/")
+                statuses.append(connection.getresponse().status)
+            except OSError:
+                statuses.append(None)
+
+        clients = [threading.Thread(target=request) for _ in range(5)]
+        for client in clients:
+            client.start()
+        time.sleep(1)
+        release.set()
+        for client in clients:
+            client.join()
+        serving.join(5)
+
+        self.assertFalse(serving.is_alive())
+        self.assertEqual((server.accepted, server.handled), (3, 3))
+        self.assertEqual(statuses.count(200), 3)
+
+    def test_reload_keeps_serving_if_the_code_does_not_load(self):
+        arbiter = Arbiter(stream=io.StringIO())
+        arbiter.socket = socket.create_server(("127.0.0.1", 0))
+        self.addCleanup(arbiter.socket.close)
+        arbiter.reloading = True
+
+        with mock.patch.object(sys, "argv", ["-c", "raise SystemExit(1)"]), \
+                mock.patch("os.execve") as execve:
+            arbiter.reload()
+
+        execve.assert_not_called()
+        self.assertFalse(arbiter.reloading)
+        self.assertFalse(arbiter.socket.get_inheritable())
+        self.assertIn("Reload failed", arbiter.stream.getvalue())
+
+    def test_reload_checks_the_new_code(self):
+        arbiter = Arbiter(stream=io.StringIO())
+        arbiter.socket = socket.create_server(("127.0.0.1", 0))
+        self.addCleanup(arbiter.socket.close)
+        script = "import os, sys; sys.exit(os.environ.get('SERVE_CHECK') != '1')"
+
+        with mock.patch.object(sys, "argv", ["-c", script]), mock.patch("os.execve") as execve:
+            arbiter.reload()
+
+        execve.assert_called_once()
+        self.assertEqual(execve.call_args.args[1], [sys.executable, "-c", script])
+        self.assertNotIn("SERVE_CHECK", execve.call_args.args[2])
+
+
+class MmapCacheTests(TestCase):
+    """
+    Tests for the memory-mapped cache backend shared by the workers.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "test.mmap"
+
+    def get_cache(self, **options):
+        return MmapCache(self.path, {"OPTIONS": {"SLOTS": 4, "SLOT_SIZE": 1024, "PROBES": 4, **options}})
+
+    def test_set_get_delete(self):
+        cache = self.get_cache()
+
+        cache.set("key", {"value": 1})
+        self.assertEqual(cache.get("key"), {"value": 1})
+        self.assertFalse(cache.add("key", "other"))
+        self.assertTrue(cache.delete("key"))
+        self.assertIsNone(cache.get("key"))
+        self.assertTrue(cache.add("key", "other"))
+
+        cache.set("expired", 1, timeout=-1)
+        self.assertIsNone(cache.get("expired"))
+
+    def test_overwrite_keeps_one_copy(self):
+        cache = self.get_cache()
+
+        def get_run(key):
+            return cache._offsets(cache._digest(cache.make_and_validate_key(key)))
+
+        # two keys probing the same slots in the same order
+        other = next(f"key-{index}" for index in itertools.count() if get_run(f"key-{index}") == get_run("key"))
+
+        cache.set("key", "first")
+        cache.set(other, "old")
+        cache.delete("key")
+        cache.set(other, "new")
+
+        self.assertEqual(cache.get(other), "new")
+        cache.delete(other)
+        self.assertIsNone(cache.get(other))
+
+    def test_values_larger_than_a_slot(self):
+        cache = self.get_cache()
+        cache.set("key", "small")
+
+        # compressed below the slot size
+        cache.set("key", "x" * 10000)
+        self.assertEqual(cache.get("key"), "x" * 10000)
+
+        # does not fit, the older value is dropped
+        cache.set("key", os.urandom(2000))
+        self.assertIsNone(cache.get("key"))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = self.get_cache()
+        clock = itertools.count(time.time())
+
+        with mock.patch("simplepersonalblogapi.cache.time.time", side_effect=lambda: next(clock)):
+            for index in range(4):
+                cache.set(f"key-{index}", index)
+            cache.get("key-0")
+            cache.set("key-4", 4)
+
+        self.assertEqual(
+            [cache.get(f"key-{index}") for index in range(5)], [0, None, 2, 3, 4]
+        )
+
+    def test_shared_between_processes(self):
+        cache = self.get_cache()
+        cache.set("parent", 1)
+
+        pid = os.fork()
+        if not pid:
+            # the child must map the file itself, not use the parent's descriptor
+            status = 1
+            try:
+                cache.set("child", cache.get("parent") + 1)
+                status = 0 if cache._pid == os.getpid() else 2
+            finally:
+                os._exit(status)
+
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(cache.get("child"), 2)
+        self.assertEqual(self.get_cache().get("child"), 2)
+
+    def test_layout_change_resets_the_file(self):
+        self.get_cache().set("key", 1)
+
+        cache = self.get_cache(SLOTS=8)
+
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(self.path.stat().st_size, 64 + 8 * 1024)
+
+
+class CompressionMiddlewareTests(TestCase):
+    """
+    Tests for the gzip/brotli response compression.
+    """
+
+    body = b"compressible body " * 100
+
+    def get_response(self, response, accept_encoding="gzip"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiation(self):
+        get_encoding = CompressionMiddleware(lambda request: None).get_encoding
+
+        for header, encoding in (
+            ("gzip", "gzip"), ("GZIP, deflate", "gzip"), ("gzip;q=0", None), ("*", "gzip"), ("*;q=0", None),
+            ("gzip;q=0, *", None), ("*;q=0, gzip;q=0.5", "gzip"), ("identity", None), ("", None),
+            ("gzip;q=oops", None), ("br", None), ("br, gzip;q=0.1", "gzip"),
+        ):
+            with self.subTest(header=header):
+                self.assertEqual(get_encoding(RequestFactory().get("/", HTTP_ACCEPT_ENCODING=header)), encoding)
+
+        with mock.patch.object(middleware, "brotli", object()):
+            for header, encoding in (("br, gzip", "br"), ("br;q=0.5, gzip", "gzip"), ("*", "br"), ("br;q=0", None)):
+                with self.subTest(header=header, brotli=True):
+                    self.assertEqual(get_encoding(RequestFactory().get("/", HTTP_ACCEPT_ENCODING=header)), encoding)
+
+    def test_gzip(self):
+        response = self.get_response(HttpResponse(self.body, headers={"ETag": '"tag"'}))
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["ETag"], 'W/"tag"')
+
+    def test_not_compressed(self):
+        response = self.get_response(HttpResponse(self.body, headers={"ETag": '"tag"'}), "identity")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(
+            (response.content, response["ETag"], response["Vary"]), (self.body, '"tag"', "Accept-Encoding")
+        )
+
+        # too short
+        response = self.get_response(HttpResponse(b"short"))
+        self.assertFalse(response.has_header("Content-Encoding") or response.has_header("Vary"))
+
+        # already encoded
+        response = self.get_response(HttpResponse(self.body, headers={"Content-Encoding": "br"}))
+        self.assertEqual((response["Content-Encoding"], response.content), ("br", self.body))
+
+        # weak tags stay as they are
+        response = self.get_response(HttpResponse(self.body, headers={"ETag": 'W/"tag"'}))
+        self.assertEqual(response["ETag"], 'W/"tag"')
+
+    def test_streamed_gzip(self):
+        items = [b'[{"id": %d}' % index if not index else b',{"id": %d}' % index for index in range(20)] + [b"]"]
+        response = self.get_response(StreamingHttpResponse(iter(items), headers={"ETag": '"tag"'}))
+
+        self.assertEqual((response["Content-Encoding"], response["ETag"]), ("gzip", 'W/"tag"'))
+        self.assertFalse(response.has_header("Content-Length"))
+
+        # every chunk is flushed: what arrived so far decodes to the items so far
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        header, *chunks = response.streaming_content
+        decoded = decoder.decompress(header)
+        for index, item in enumerate(items):
+            decoded += decoder.decompress(chunks[index])
+            self.assertEqual(decoded, b"".join(items[:index + 1]))
+
+        for chunk in chunks[len(items):]:
+            decoded += decoder.decompress(chunk)
+        self.assertEqual(decoded + decoder.flush(), b"".join(items))
+        self.assertTrue(decoder.eof)
+
+
+class FastJSONTests(TestCase):
+    """
+    Tests for the orjson based renderer and parser.
+    """
+
+    data = {"title": "Line\u2028Paragraph\u2029End", "count": 3, "tags": ["#a", None]}
+
+    def test_stdlib_fallback(self):
+        expected = JSONRenderer().render(self.data)
+
+        with mock.patch("simplepersonalblogapi.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.data), expected)
+        self.assertEqual(json.loads(FastJSONRenderer().render(self.data)), self.data)
+
+        with mock.patch("simplepersonalblogapi.parsers.orjson", None):
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(expected)), self.data)
+
+    def test_line_separators_escaped(self):
+        for orjson in (renderers.orjson, None):
+            with self.subTest(orjson=orjson is not None), mock.patch.object(renderers, "orjson", orjson):
+                rendered = FastJSONRenderer().render(self.data)
+                self.assertNotIn("\u2028".encode(), rendered)
+                self.assertNotIn("\u2029".encode(), rendered)
+                self.assertIn(b"Line\\u2028Paragraph\\u2029End", rendered)
+                self.assertEqual(json.loads(rendered), self.data)
+
+    def test_non_utf8_body(self):
+        body = json.dumps({"title": "Café"}, ensure_ascii=False).encode("latin-1")
+
+        data = FastJSONParser().parse(io.BytesIO(body), parser_context={"encoding": "latin-1"})
+
+        self.assertEqual(data, {"title": "Café"})
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(body))
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b"{"))
@@ -0,0 +1,131 @@
+import os
+
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .profiler import ProfilerBusy, is_enabled, profile
+from .queries import SORT_KEYS, get_report, query_stats, read_dumps
+from .serializers import ProfileRequestSerializer
+
+
+class QueryStatsAPIView(APIView):
+    """
+    Endpoint for the query shape report, for staff only.
+
+    Methods:
+        GET: Returns the top query shapes by view.
+        DELETE: Resets the stats of the worker handling the request.
+
+    """
+
+    permission_classes = [IsAdminUser]
+    default_top = 20
+    max_top = 200
+
+    def get(self, request):
+        """
+        Handles GET request for the top query shapes.
+
+        Query parameters: `top` (number of shapes), `sort` (total, count,
+        max or mean time), `view` (view class name) and `scope`: `host`
+        (default) merges the last dump of every other running worker and the
+        stats of the exited ones with this worker's live stats, `worker`
+        reports this worker only.
+        """
+
+        sort = request.query_params.get('sort', 'total')
+        scope = request.query_params.get('scope', 'host')
+
+        if sort not in SORT_KEYS:
+            return Response({"message": f"sort must be one of {', '.join(SORT_KEYS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if scope not in ("host", "worker"):
+            return Response({"message": "scope must be host or worker."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            top = max(1, min(int(request.query_params.get('top', self.default_top)), self.max_top))
+        except ValueError:
+            top = self.default_top
+
+        shape_lists = [query_stats.snapshot()]
+        evicted = query_stats.evicted
+        workers = 1
+        retired_workers = 0
+
+        if scope == "host":
+            dumps, retired = read_dumps(exclude_pid=os.getpid())
+            if retired:
+                dumps.append(retired)
+                retired_workers = retired["workers"]
+            shape_lists.extend(dump["shapes"] for dump in dumps)
+            evicted += sum(dump.get("evicted", 0) for dump in dumps)
+            workers += len(dumps) - bool(retired)
+
+        return Response({
+            "workers": workers,
+            "retired_workers": retired_workers,
+            "evicted": evicted,
+            "shapes": get_report(shape_lists, top, sort, request.query_params.get('view')),
+        })
+
+    def delete(self, request):
+        """
+        Handles DELETE request for resetting this worker's stats.
+        """
+
+        query_stats.reset()
+        query_stats.dump()
+
+        return Response({"message": "Query stats reset."}, status=status.HTTP_200_OK)
+
+
+class ProfileAPIView(APIView):
+    """
+    Endpoint for profiling the worker handling the request, for staff only.
+    Requires PROFILER_ENABLED.
+
+    Methods:
+        POST: Samples the stacks of the requests this worker serves and
+            returns them in collapsed-stack format.
+
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        """
+        Handles POST request for a profile session.
+        Blocks until the window ends or the requests are profiled, so the
+        worker needs another thread free to serve them.
+        """
+
+        if not is_enabled():
+            return Response({"message": "Profiling is disabled."}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = ProfileRequestSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        options = serializer.validated_data
+
+        try:
+            report = profile(
+                rate=options["rate"],
+                seconds=options["seconds"],
+                path=options.get("path"),
+                max_requests=options.get("requests"),
+                max_overhead=options["max_overhead"],
+            )
+        except ProfilerBusy:
+            return Response({"message": "A profile is already running in this worker."},
+                            status=status.HTTP_409_CONFLICT)
+
+        if options["output"] == "collapsed":
+            return HttpResponse(report["collapsed"] + "\n", content_type="text/plain; charset=utf-8")
+
+        return Response(report)
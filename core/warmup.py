@@ -0,0 +1,135 @@
+import inspect
+import logging
+import time
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.urls import URLResolver, get_resolver
+from django.utils.module_loading import module_has_submodule
+from drf_spectacular.drainage import GENERATOR_STATS
+from rest_framework import serializers
+from rest_framework.settings import IMPORT_STRINGS, api_settings
+
+from .schema import CachedSpectacularAPIView, render_schema
+
+logger = logging.getLogger(__name__)
+
+
+def compile_patterns(patterns):
+    """
+    Util function to compile the regexes of URL patterns, which Django
+    otherwise compiles on the first request matching against them.
+    """
+    for pattern in patterns:
+        pattern.pattern.regex
+
+        if isinstance(pattern, URLResolver):
+            compile_patterns(pattern.url_patterns)
+
+
+def warm_urls():
+    """
+    Imports the URLconf with every view and compiles the resolvers.
+    """
+    resolver = get_resolver()
+    compile_patterns(resolver.url_patterns)
+
+    # builds the reverse lookup tables used by reverse()
+    resolver.reverse_dict
+
+
+def warm_serializers():
+    """
+    Imports the project apps' serializers and builds their fields, which
+    runs the model introspection ModelSerializer does on first use.
+    """
+    for app_config in apps.get_app_configs():
+        if (
+            not app_config.path.startswith(str(settings.BASE_DIR))
+            or not module_has_submodule(app_config.module, "serializers")
+        ):
+            continue
+
+        module = import_module(f"{app_config.name}.serializers")
+
+        for serializer_class in vars(module).values():
+            if (
+                not inspect.isclass(serializer_class)
+                or not issubclass(serializer_class, serializers.Serializer)
+                or serializer_class.__module__ != module.__name__
+            ):
+                continue
+
+            serializer_class().fields
+
+
+def warm_drf_settings():
+    """
+    Imports the classes DRF settings point to, which happens on first access.
+    """
+    for name in IMPORT_STRINGS:
+        getattr(api_settings, name)
+
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        renderer_class()
+
+    for parser_class in api_settings.DEFAULT_PARSER_CLASSES:
+        parser_class()
+
+
+def warm_jwt():
+    """
+    Issues and validates an access token, loading the JWT backend and its
+    signing algorithm. Access tokens are not blacklisted, so this never
+    touches the database.
+    """
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    JWTAuthentication().get_validated_token(str(AccessToken()).encode())
+
+
+def warm_schema():
+    """
+    Loads the OpenAPI schema artifact of the running code version, building
+    it if needed, and renders it for every media type the schema view serves.
+    """
+    with GENERATOR_STATS.silence():
+        for renderer_class in CachedSpectacularAPIView.renderer_classes:
+            render_schema(renderer_class())
+
+
+WARMUP_STEPS = [
+    ("urls", warm_urls),
+    ("serializers", warm_serializers),
+    ("drf settings", warm_drf_settings),
+    ("jwt", warm_jwt),
+    ("schema", warm_schema),
+]
+
+
+def warm_up():
+    """
+    Initializes what Django, DRF and drf_spectacular otherwise initialize
+    lazily on a worker's first requests.
+
+    A failing step is logged and skipped: warm-up only moves work earlier,
+    it must never stop a worker from starting.
+    Returns the seconds each step took.
+    """
+    timings = {}
+
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %r failed.", name)
+
+        timings[name] = time.perf_counter() - start
+
+    logger.info("Warm-up done in %.3fs.", sum(timings.values()))
+
+    return timings
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "simplepersonalblogapi.settings")
+# initializes URL resolvers, serializers, JWT and the schema before the first request
+os.environ.setdefault("DJANGO_WARMUP", "1")
 
 application = get_asgi_application()
@@ -0,0 +1,269 @@
+"""
+Django cache backend shared by every worker process on a host.
+
+Entries live in a memory-mapped file split into fixed-size slots, so each
+worker maps the same pages instead of holding its own copy, and a value
+cached by one worker is a hit for all of them. No external server needed.
+
+Requires `fcntl` (POSIX). Every process using the file must be configured
+with the same OPTIONS.
+"""
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+MAGIC = b"DJMMAP01"
+# magic, slots, slot size, probes
+HEADER = struct.Struct("<8sIII")
+HEADER_SIZE = 64
+# key digest, expiry timestamp (0: never), last access timestamp, value size, flags
+ENTRY = struct.Struct("<16sddIB3x")
+EMPTY_DIGEST = bytes(16)
+
+FLAG_COMPRESSED = 1
+COMPRESS_MIN_SIZE = 1024
+
+
+class MmapCache(BaseCache):
+    """
+    Cross-process cache backend on a memory-mapped file.
+
+    A key hashes to a run of `PROBES` consecutive slots. Lookups scan the
+    run; writes reuse the key's slot, an empty or expired one, or evict the
+    least recently used slot of the run (sampled LRU). The file never grows:
+    its size is `SLOTS * SLOT_SIZE`, and values that do not fit a slot once
+    pickled and compressed are not cached.
+
+    Processes are serialized with `flock` and threads with a lock, held only
+    while copying bytes in or out. The file is reopened after a fork, since
+    an inherited descriptor shares its lock with the parent.
+
+    OPTIONS:
+        SLOTS: number of slots (default 4096).
+        SLOT_SIZE: bytes per slot, entry header included (default 16384).
+        PROBES: slots scanned per key (default 8).
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+
+        if fcntl is None:
+            raise ImproperlyConfigured("MmapCache requires fcntl, which is not available on this platform.")
+
+        options = params.get("OPTIONS", {})
+        self._path = str(location)
+        self._slots = int(options.get("SLOTS", 4096))
+        self._slot_size = int(options.get("SLOT_SIZE", 16384))
+        self._probes = max(1, min(int(options.get("PROBES", 8)), self._slots))
+        self._capacity = self._slot_size - ENTRY.size
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        """
+        Util function to map the file in this process, creating or resetting
+        it when its layout does not match the configuration.
+        """
+        if self._pid == os.getpid():
+            return
+
+        if self._fd is not None:
+            # inherited from the parent process, only this copy is closed
+            self._map.close()
+            os.close(self._fd)
+
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = HEADER_SIZE + self._slots * self._slot_size
+        header = HEADER.pack(MAGIC, self._slots, self._slot_size, self._probes)
+
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size != size or os.pread(fd, HEADER.size, 0) != header:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, header, 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+        self._map = mmap.mmap(fd, size)
+        self._fd = fd
+        self._pid = os.getpid()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _digest(self, key):
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def _offsets(self, digest):
+        """
+        Util function to list the offsets of the slots a key may live in.
+        """
+        start = int.from_bytes(digest[:8], "little") % self._slots
+        return [HEADER_SIZE + (start + i) % self._slots * self._slot_size for i in range(self._probes)]
+
+    def _find(self, digest, now):
+        """
+        Util function to find the live entry of a key. Must hold the lock.
+        Returns (offset, entry) or (None, None).
+        """
+        for offset in self._offsets(digest):
+            entry = ENTRY.unpack_from(self._map, offset)
+            if entry[0] == digest:
+                if entry[1] and entry[1] <= now:
+                    return None, None
+                return offset, entry
+        return None, None
+
+    def _choose(self, digest, now):
+        """
+        Util function to pick the slot a key is written to. Must hold the lock.
+        Returns the offset.
+        """
+        victim, victim_access = None, None
+
+        for offset in self._offsets(digest):
+            key_digest, expires, last_access, _, _ = ENTRY.unpack_from(self._map, offset)
+
+            if key_digest == digest or key_digest == EMPTY_DIGEST or (expires and expires <= now):
+                return offset
+
+            if victim is None or last_access < victim_access:
+                victim, victim_access = offset, last_access
+
+        return victim
+
+    def _serialize(self, value):
+        data = pickle.dumps(value, self.pickle_protocol)
+
+        if len(data) >= COMPRESS_MIN_SIZE:
+            compressed = zlib.compress(data)
+            if len(compressed) < len(data):
+                return compressed, FLAG_COMPRESSED
+
+        return data, 0
+
+    def _deserialize(self, data, flags):
+        if flags & FLAG_COMPRESSED:
+            data = zlib.decompress(data)
+        return pickle.loads(data)
+
+    def _write(self, key, value, timeout, only_new):
+        """
+        Util function backing set() and add().
+        Returns True if the value was stored.
+        """
+        digest = self._digest(key)
+        expires = self.get_backend_timeout(timeout)
+        data, flags = self._serialize(value)
+
+        with self._locked():
+            now = time.time()
+            offset, _ = self._find(digest, now)
+
+            if only_new and offset is not None:
+                return False
+
+            if len(data) > self._capacity or (expires is not None and expires <= now):
+                # too big or already expired: make sure no older value is served
+                if offset is not None:
+                    ENTRY.pack_into(self._map, offset, EMPTY_DIGEST, 0, 0, 0, 0)
+                return False
+
+            # overwrites the key's own slot: an empty slot earlier in the run
+            # would leave the old value behind, served again once deleted
+            if offset is None:
+                offset = self._choose(digest, now)
+            self._map[offset + ENTRY.size:offset + ENTRY.size + len(data)] = data
+            ENTRY.pack_into(self._map, offset, digest, expires or 0, now, len(data), flags)
+
+        return True
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._write(key, value, timeout, only_new=True)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write(key, value, timeout, only_new=False)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        digest = self._digest(key)
+
+        with self._locked():
+            now = time.time()
+            offset, entry = self._find(digest, now)
+
+            if offset is None:
+                return default
+
+            _, expires, _, size, flags = entry
+            data = self._map[offset + ENTRY.size:offset + ENTRY.size + size]
+            # marks the entry as recently used for eviction
+            ENTRY.pack_into(self._map, offset, digest, expires, now, size, flags)
+
+        return self._deserialize(data, flags)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        digest = self._digest(key)
+
+        with self._locked():
+            now = time.time()
+            offset, entry = self._find(digest, now)
+
+            if offset is None:
+                return False
+
+            _, _, last_access, size, flags = entry
+            expires = self.get_backend_timeout(timeout)
+            ENTRY.pack_into(self._map, offset, digest, expires or 0, last_access, size, flags)
+
+        return True
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        digest = self._digest(key)
+
+        with self._locked():
+            offset, _ = self._find(digest, time.time())
+
+            if offset is None:
+                return False
+
+            ENTRY.pack_into(self._map, offset, EMPTY_DIGEST, 0, 0, 0, 0)
+
+        return True
+
+    def clear(self):
+        with self._locked():
+            for slot in range(self._slots):
+                ENTRY.pack_into(self._map, HEADER_SIZE + slot * self._slot_size, EMPTY_DIGEST, 0, 0, 0, 0)
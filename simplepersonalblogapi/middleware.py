@@ -0,0 +1,152 @@
+"""
+Response compression middleware.
+
+Negotiates brotli (when the optional `brotli` package is installed) or
+gzip with the client and compresses both regular and streamed bodies.
+Streamed bodies are flushed after every chunk so clients can start
+parsing them before the whole response has been produced.
+"""
+
+import secrets
+import zlib
+from gzip import GzipFile
+
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import get_random_string
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import StreamingBuffer, compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """
+    Parses an Accept-Encoding header.
+    Returns a dict mapping each coding to its quality value.
+    """
+    codings = {}
+
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[coding.strip().lower()] = quality
+
+    return codings
+
+
+def gzip_sequence(sequence, max_random_bytes=None):
+    """
+    Gzips an iterable of bytestrings, yielding compressed output after
+    every item instead of whenever the compressor's buffer fills up.
+    """
+    buf = StreamingBuffer()
+    filename = get_random_string(secrets.randbelow(max_random_bytes) + 1) if max_random_bytes else None
+
+    with GzipFile(filename=filename, mode="wb", compresslevel=6, fileobj=buf, mtime=0) as zfile:
+        yield buf.read()
+        for item in sequence:
+            zfile.write(item)
+            zfile.flush(zlib.Z_SYNC_FLUSH)
+            yield buf.read()
+    yield buf.read()
+
+
+def brotli_sequence(sequence):
+    """
+    Brotli-compresses an iterable of bytestrings, flushing after every item.
+    """
+    compressor = brotli.Compressor()
+
+    for item in sequence:
+        yield compressor.process(item) + compressor.flush()
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress content with brotli or gzip if the client allows it.
+    Set the Vary header accordingly, so that caches will base their storage
+    on the Accept-Encoding header.
+
+    Mirrors Django's GZipMiddleware, including its BREACH mitigation for
+    gzip, and adds brotli and per-chunk flushing of streamed bodies.
+    """
+
+    max_random_bytes = 100
+    min_length = 200
+
+    def get_encoding(self, request):
+        """
+        Picks the best content coding accepted by the client.
+        Returns 'br', 'gzip' or None.
+        """
+        codings = parse_accept_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        wildcard = codings.get("*", 0)
+
+        candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+        ranked = [(codings.get(coding, wildcard), coding) for coding in candidates]
+        quality, coding = max(ranked, key=lambda item: item[0])
+
+        return coding if quality > 0 else None
+
+    def process_response(self, request, response):
+        # It's not worth attempting to compress really short responses.
+        if not response.streaming and len(response.content) < self.min_length:
+            return response
+
+        # Avoid compressing if we've already got a content-encoding.
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        encoding = self.get_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                # async bodies are left to ASGI servers
+                return response
+
+            if encoding == "br":
+                response.streaming_content = brotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = gzip_sequence(
+                    response.streaming_content, max_random_bytes=self.max_random_bytes
+                )
+            # We won't know the compressed size until we stream it.
+            del response.headers["Content-Length"]
+        else:
+            if encoding == "br":
+                compressed_content = brotli.compress(response.content)
+            else:
+                compressed_content = compress_string(
+                    response.content, max_random_bytes=self.max_random_bytes
+                )
+
+            # Return the compressed content only if it's actually shorter.
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers["Content-Length"] = str(len(response.content))
+
+        # Weaken strong ETags, the compressed body is a different representation.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+
+        return response
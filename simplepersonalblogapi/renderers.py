@@ -0,0 +1,54 @@
+"""
+High-performance JSON renderer for the API.
+
+Uses `orjson` when it is installed and falls back to DRF's stdlib based
+`JSONRenderer` otherwise, so the dependency stays optional.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def orjson_default(obj):
+    """
+    Fallback for types orjson does not serialize natively (Decimal, lazy
+    strings, querysets, ...) and for datetimes, which are passed through so
+    they are formatted exactly like DRF's encoder does.
+    """
+    return JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renderer which serializes to JSON using orjson when available.
+
+    Pretty printed output (`indent`), ASCII-only output and the browsable
+    API keep using the stdlib path of the parent class.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render `data` into JSON, returning a bytestring.
+        """
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=orjson_default, option=self.options)
+
+        # keep the output a strict javascript subset, like the parent class
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -44,11 +44,15 @@ INSTALLED_APPS = [
     # CUSTOM APPS
     "blog.apps.BlogConfig",
     "account.apps.AccountConfig",
+    "core.apps.CoreConfig", # last, so its warm-up sees every other app ready
 ]
 
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "simplepersonalblogapi.middleware.CompressionMiddleware", # gzip/brotli, before anything touching the body
+    "core.queries.QueryStatsMiddleware", # query shapes by view, see QUERY_STATS_* below
+    "core.profiler.ProfilerMiddleware", # only installed when PROFILER_ENABLED
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,6 +90,9 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # SQLite ignores select_for_update(): atomic blocks take the write
+        # lock when they begin instead, so reads in them see the latest data
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
     }
 }
 
@@ -143,6 +150,18 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
 
+    # orjson backed JSON when installed, DRF's stdlib JSON otherwise
+    'DEFAULT_RENDERER_CLASSES':(
+        'simplepersonalblogapi.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+
+    'DEFAULT_PARSER_CLASSES':(
+        'simplepersonalblogapi.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+
 }
 
 # JWT Configuration
@@ -183,6 +202,69 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Caches
+# "articles" holds hot article payloads in a memory-mapped file shared by
+# every worker on the host (see simplepersonalblogapi/cache.py).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "articles": {
+        "BACKEND": "simplepersonalblogapi.cache.MmapCache",
+        "LOCATION": BASE_DIR / ".cache" / "articles.mmap",
+        "TIMEOUT": 3600,
+        "OPTIONS": {
+            "SLOTS": 4096,
+            "SLOT_SIZE": 16384,  # 64 MiB file; larger payloads are not cached
+            "PROBES": 8,
+        },
+    },
+}
+
+# Pre-built OpenAPI schema artifacts, one per code version, written by
+# `manage.py build_schema` or the worker warm-up (see core/schema.py)
+SCHEMA_CACHE_DIR = BASE_DIR / ".cache" / "schema"
+
+# Query shape stats (see core/queries.py): each worker keeps at most
+# QUERY_STATS_MAX_SHAPES (view, shape) entries and dumps them to
+# QUERY_STATS_DIR every QUERY_STATS_DUMP_INTERVAL seconds for
+# `manage.py query_stats`. Queries slower than SLOW_QUERY_THRESHOLD_MS are
+# logged (None disables the log).
+QUERY_STATS_ENABLED = True
+QUERY_STATS_MAX_SHAPES = 1000
+QUERY_STATS_DIR = BASE_DIR / ".cache" / "queries"
+QUERY_STATS_DUMP_INTERVAL = 30
+SLOW_QUERY_THRESHOLD_MS = 100
+
+# Lets staff sample the stacks of a live worker through /api/profile/
+# (see core/profiler.py). Off unless explicitly enabled.
+PROFILER_ENABLED = False
+
+# Blog settings
+# Deleted articles are soft-deleted and their rows purged by a background
+# thread; disable to leave purging to `manage.py purge_deleted_articles`.
+BLOG_PURGE_IN_BACKGROUND = True
+BLOG_PURGE_BATCH_SIZE = 500
+
+# Raw shares older than this are folded into daily rollups by
+# `manage.py compact_shares`.
+BLOG_SHARE_RETENTION_DAYS = 90
+
+# Article revisions store a full body at least every this many revisions and
+# line deltas in between, bounding how many deltas rebuilding one applies.
+BLOG_REVISION_KEYFRAME_INTERVAL = 10
+
+# Comments near-identical to one the same user posted on the same article
+# within this many seconds are rejected; 0 disables the check.
+BLOG_COMMENT_DUPLICATE_WINDOW = 3600
+
+# Cache alias holding article detail payloads, None to disable.
+BLOG_ARTICLE_CACHE = "articles"
+
+# Runs the tests with the article cache, query stats and schema artifacts
+# in a temporary directory instead of BASE_DIR/.cache.
+TEST_RUNNER = "simplepersonalblogapi.test_runner.TestRunner"
+
 CORS_ALLOWED_ORIGINS = [
 
 ]
@@ -0,0 +1,53 @@
+"""
+Test runner keeping the test run away from the on-disk state of the
+running servers.
+"""
+
+import atexit
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from core.queries import query_stats
+
+from .cache import MmapCache
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests with the caches and dumps under BASE_DIR/.cache moved to
+    a temporary directory.
+
+    The article cache is a memory-mapped file shared by every process on
+    the host and query stats are dumped by every process, so the tests would
+    otherwise read entries of a running server and leave theirs behind.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+
+        self.state_dir = Path(tempfile.mkdtemp(prefix="blog-tests-"))
+        caches = {
+            alias: {**options, "LOCATION": self.state_dir / f"{alias}.mmap"}
+            if options["BACKEND"] == f"{MmapCache.__module__}.{MmapCache.__name__}" else options
+            for alias, options in settings.CACHES.items()
+        }
+        self.state_settings = override_settings(
+            CACHES=caches,
+            QUERY_STATS_DIR=self.state_dir / "queries",
+            SCHEMA_CACHE_DIR=self.state_dir / "schema",
+        )
+        self.state_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        # the stats of the tests are not worth retiring when the process exits
+        atexit.unregister(query_stats.retire)
+
+        self.state_settings.disable()
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+        super().teardown_test_environment(**kwargs)
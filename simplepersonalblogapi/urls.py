@@ -1,16 +1,18 @@
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import (
-    SpectacularAPIView, 
     SpectacularSwaggerView, 
     SpectacularRedocView
 )
 
+from core.schema import CachedSpectacularAPIView
+from core.views import ProfileAPIView, QueryStatsAPIView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
     # OpenAPI schema
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', CachedSpectacularAPIView.as_view(), name='schema'),
 
     # Swagger UI
     path('api/docs/swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
@@ -23,4 +25,10 @@ urlpatterns = [
 
     # Account app: blog management
     path("api/blog/", include('blog.urls')),
+
+    # Query shape report, staff only
+    path("api/queries/", QueryStatsAPIView.as_view(), name='query-stats'),
+
+    # Sampling profiler, staff only
+    path("api/profile/", ProfileAPIView.as_view(), name='profile'),
 ]